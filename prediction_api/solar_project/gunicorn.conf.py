@@ -0,0 +1,30 @@
+"""
+Gunicorn settings, picked up automatically from the working directory.
+
+Each worker runs the warm-up phase (embedder load + dummy encode, prediction
+models, LLM client) right after it is forked, so the first real request does
+not pay model-loading latency. ``/solar_generation/health/ready/`` answers 503
+until that has finished.
+
+Set ``WARMUP_IN_FOREGROUND=true`` to block the worker until warm-up completes
+instead of warming on a background thread (make sure ``timeout`` covers the
+model load time in that case).
+"""
+import os
+
+
+def post_fork(server, worker):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "solar_project.settings")
+
+    import django
+
+    django.setup()
+
+    from solar_api.services.warmup import start_warm_up_in_background, warm_up
+
+    if os.getenv("WARMUP_IN_FOREGROUND", "false").lower() == "true":
+        status = warm_up()
+        server.log.info(f"Worker {worker.pid} warm-up {status['status']} in {status['total_seconds']}s")
+    else:
+        start_warm_up_in_background()
+        server.log.info(f"Worker {worker.pid} warming up in background")
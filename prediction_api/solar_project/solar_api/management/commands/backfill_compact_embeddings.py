@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from solar_api.services.rag_shared import COMPACT_EMBEDDING_DIM, get_db_connection
+
+
+class Command(BaseCommand):
+    help = "Fill documents.embedding_compact for rows ingested before migration 0003"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000, help="Rows updated per transaction")
+
+    def handle(self, *args, **options):
+        conn = get_db_connection()
+        cur = conn.cursor()
+        total = 0
+        try:
+            while True:
+                cur.execute("""
+                    UPDATE documents
+                    SET embedding_compact = subvector(embedding, 1, %s)::halfvec
+                    WHERE id IN (
+                        SELECT id FROM documents
+                        WHERE embedding_compact IS NULL
+                        LIMIT %s
+                    )
+                """, (COMPACT_EMBEDDING_DIM, options["batch_size"]))
+                updated = cur.rowcount
+                conn.commit()
+                if updated == 0:
+                    break
+                total += updated
+                self.stdout.write(self.style.NOTICE(f"Backfilled {total} rows..."))
+        finally:
+            cur.close()
+            conn.close()
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled compact embeddings for {total} rows."))
@@ -0,0 +1,119 @@
+import time
+import uuid
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from solar_api.services import pdf_ingestion_service
+from solar_api.services.pdf_ingestion_service import insert_chunks_transactional
+from solar_api.services.rag_shared import chunk_hash, get_db_connection
+
+EMBEDDING_DIM = 768
+BENCHMARK_TENANT = "benchmark-chunk-insert"
+
+
+def legacy_insert(chunk_data):
+    """The previous insert: one INSERT round trip per chunk."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    inserted = 0
+    try:
+        for chunk in chunk_data:
+            cur.execute("""
+                INSERT INTO documents (content, source, page_url, tenant_id, embedding, hash)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON CONFLICT (tenant_id, page_url, hash) DO NOTHING
+            """, (
+                chunk['content'], chunk['source'], chunk['page_url'], chunk['tenant_id'],
+                chunk['embedding'], chunk['hash'],
+            ))
+            inserted += cur.rowcount
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+    return inserted
+
+
+class Command(BaseCommand):
+    help = (
+        "Time chunk insertion into the configured database: per-row INSERT (previous), "
+        "execute_values pages and binary COPY + merge. Synthetic rows are deleted afterwards. "
+        "Results depend on round-trip latency to the database, so run it against the deployment in question."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunks", type=int, default=2000, help="Synthetic chunks per method")
+        parser.add_argument("--methods", nargs="+", choices=["legacy", "values", "copy"],
+                            default=["legacy", "values", "copy"])
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(0)
+        run_id = uuid.uuid4().hex[:8]
+        page_urls = []
+        timings = {}
+
+        try:
+            for method in options["methods"]:
+                page_url = f"benchmark://chunk-insert/{run_id}/{method}"
+                page_urls.append(page_url)
+                chunk_data = self._chunks(rng, page_url, options["chunks"])
+
+                started = time.perf_counter()
+                if method == "legacy":
+                    inserted, conflicted = legacy_insert(chunk_data), None
+                else:
+                    pdf_ingestion_service.INGEST_USE_COPY = method == "copy"
+                    result = insert_chunks_transactional(chunk_data)
+                    inserted, conflicted = result['inserted'], result['conflicted']
+                    method = f"{method} ({result['method']})"
+                seconds = time.perf_counter() - started
+                timings[method] = seconds
+
+                self.stdout.write(
+                    f"{method:<16} {inserted:6d} inserted  {seconds * 1000:9.1f} ms  "
+                    f"{len(chunk_data) / seconds:9.0f} chunks/s"
+                    + (f"  ({conflicted} conflicted)" if conflicted else "")
+                )
+
+            # Re-inserting the last batch exercises the conflict path
+            if options["methods"][-1] != "legacy":
+                result = insert_chunks_transactional(chunk_data)
+                self.stdout.write(f"re-insert        {result['inserted']} inserted, {result['conflicted']} conflicted")
+        finally:
+            conn = get_db_connection()
+            cur = conn.cursor()
+            try:
+                cur.execute(
+                    "DELETE FROM documents WHERE page_url = ANY(%s) AND tenant_id = %s",
+                    (page_urls, BENCHMARK_TENANT),
+                )
+                conn.commit()
+            finally:
+                cur.close()
+                conn.close()
+
+        legacy = next((t for m, t in timings.items() if m == "legacy"), None)
+        if legacy:
+            for method, seconds in timings.items():
+                if method != "legacy":
+                    self.stdout.write(f"{method} speedup over legacy: {legacy / seconds:.1f}x")
+        self.stdout.write(self.style.SUCCESS("Done."))
+
+    @staticmethod
+    def _chunks(rng, page_url, count):
+        vectors = rng.standard_normal((count, EMBEDDING_DIM)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        chunk_data = []
+        for i, vector in enumerate(vectors):
+            content = f"{page_url} synthetic chunk {i} " + "solar panel inverter warranty " * 30
+            chunk_data.append({
+                'content': content,
+                'source': page_url,
+                'page_url': page_url,
+                'tenant_id': BENCHMARK_TENANT,
+                'embedding': vector.tolist(),
+                'hash': chunk_hash(content),
+                'chunk_index': i,
+            })
+        return chunk_data
@@ -0,0 +1,139 @@
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from solar_api.services.chunker import MIN_CHUNK_LENGTH, iter_chunks
+from solar_api.services.rag_shared import load_embedder
+from solar_api.services.text_extraction import iter_text_pages
+
+DEFAULT_CORPUS = Path(settings.BASE_DIR).parent.parent / "SolarGenix_Knowledge_Base.txt"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare an embedding backend against the fp32 reference: retrieval ranking "
+        "agreement plus queries/s and chunks/s. Fails if agreement is below tolerance."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backend", default="int8", help="Candidate backend: int8, onnx or onnx-int8")
+        parser.add_argument("--corpus", default=str(DEFAULT_CORPUS), help="Plain-text corpus to chunk and embed")
+        parser.add_argument("--queries", type=int, default=50, help="Number of probe queries")
+        parser.add_argument("--top-k", type=int, default=10, help="Ranking depth compared")
+        parser.add_argument("--tolerance", type=float, default=0.9, help="Minimum mean top-k overlap")
+        parser.add_argument("--batch-size", type=int, default=32, help="Chunk encoding batch size")
+        parser.add_argument("--output", help="Optional path for a JSON report")
+
+    def handle(self, *args, **options):
+        corpus_path = Path(options["corpus"])
+        if not corpus_path.exists():
+            raise CommandError(f"Corpus not found: {corpus_path}")
+
+        # Chunked as ingestion chunks it
+        chunks = [
+            chunk.text for chunk in iter_chunks(enumerate(iter_text_pages(str(corpus_path)), 1))
+            if len(chunk.text.strip()) >= MIN_CHUNK_LENGTH
+        ]
+        documents = ["search_document: " + c for c in chunks]
+
+        # Probe queries: the opening words of evenly spaced chunks
+        step = max(1, len(chunks) // options["queries"])
+        queries = ["search_query: " + " ".join(c.split()[:12]) for c in chunks[::step]][:options["queries"]]
+
+        self.stdout.write(self.style.NOTICE(
+            f"{len(chunks)} chunks, {len(queries)} queries from {corpus_path.name}"
+        ))
+
+        results = {}
+        for backend in ("torch", options["backend"]):
+            self.stdout.write(self.style.NOTICE(f"Benchmarking backend: {backend}"))
+            results[backend] = self._run_backend(backend, documents, queries, options["batch_size"])
+            self.stdout.write(
+                f"  chunks/s: {results[backend]['chunks_per_second']:.1f}  "
+                f"queries/s: {results[backend]['queries_per_second']:.1f}  "
+                f"load: {results[backend]['load_seconds']:.1f}s"
+            )
+
+        reference, candidate = results["torch"], results[options["backend"]]
+        agreement = self._ranking_agreement(reference, candidate, options["top_k"])
+
+        report = {
+            "corpus": str(corpus_path),
+            "chunks": len(chunks),
+            "queries": len(queries),
+            "top_k": options["top_k"],
+            "backends": {
+                name: {k: v for k, v in r.items() if k not in ("doc_vectors", "query_vectors")}
+                for name, r in results.items()
+            },
+            "agreement": agreement,
+        }
+
+        self.stdout.write(
+            f"Top-{options['top_k']} overlap: {agreement['mean_topk_overlap']:.3f}  "
+            f"top-1 agreement: {agreement['top1_agreement']:.3f}  "
+            f"mean cosine to fp32: {agreement['mean_vector_cosine']:.4f}"
+        )
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+        if agreement["mean_topk_overlap"] < options["tolerance"]:
+            raise CommandError(
+                f"Ranking drift too large for {options['backend']}: "
+                f"{agreement['mean_topk_overlap']:.3f} < {options['tolerance']}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"{options['backend']} is within tolerance of fp32"))
+
+    def _run_backend(self, backend, documents, queries, batch_size):
+        started = time.perf_counter()
+        try:
+            # strict: a silent fallback to fp32 would compare the reference with itself
+            model = load_embedder(backend, strict=True)
+        except Exception as e:
+            raise CommandError(f"Could not load the {backend} embedding backend: {e}")
+        if model.embedding_backend != backend:
+            raise CommandError(f"Requested the {backend} backend but {model.embedding_backend} was loaded")
+        model.encode(["warm up"], normalize_embeddings=True)
+        load_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        doc_vectors = np.asarray(model.encode(documents, normalize_embeddings=True, batch_size=batch_size))
+        doc_seconds = time.perf_counter() - started
+
+        # Queries arrive one at a time in production, so encode them individually
+        started = time.perf_counter()
+        query_vectors = np.vstack([model.encode([q], normalize_embeddings=True) for q in queries])
+        query_seconds = time.perf_counter() - started
+
+        return {
+            "loaded_backend": model.embedding_backend,
+            "load_seconds": load_seconds,
+            "chunks_per_second": len(documents) / doc_seconds if doc_seconds else 0.0,
+            "queries_per_second": len(queries) / query_seconds if query_seconds else 0.0,
+            "doc_vectors": doc_vectors,
+            "query_vectors": query_vectors,
+        }
+
+    @staticmethod
+    def _ranking_agreement(reference, candidate, top_k):
+        ref_scores = reference["query_vectors"] @ reference["doc_vectors"].T
+        cand_scores = candidate["query_vectors"] @ candidate["doc_vectors"].T
+        k = min(top_k, ref_scores.shape[1])
+
+        ref_top = np.argsort(-ref_scores, axis=1)[:, :k]
+        cand_top = np.argsort(-cand_scores, axis=1)[:, :k]
+        overlaps = [len(set(r) & set(c)) / k for r, c in zip(ref_top, cand_top)]
+
+        doc_cosine = np.sum(reference["doc_vectors"] * candidate["doc_vectors"], axis=1)
+        return {
+            "mean_topk_overlap": float(np.mean(overlaps)),
+            "min_topk_overlap": float(np.min(overlaps)),
+            "top1_agreement": float(np.mean(ref_top[:, 0] == cand_top[:, 0])),
+            "mean_vector_cosine": float(np.mean(doc_cosine)),
+        }
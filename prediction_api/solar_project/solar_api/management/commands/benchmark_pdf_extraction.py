@@ -0,0 +1,83 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import PyPDF2
+from django.core.management.base import BaseCommand
+
+from solar_api.services.pdf_extraction import clean_pdf_text, extract_page_range, extract_pages
+
+
+def legacy_extract(pdf_path):
+    """The previous extraction: sequential pages, ``text +=``, one clean at the end."""
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        text = ""
+        for page in pdf_reader.pages:
+            try:
+                text += page.extract_text() + "\n\n"
+            except Exception:
+                continue
+    return clean_pdf_text(text)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure PDF text extraction in pages/s: the previous sequential loop, in-process "
+        "per-page extraction (--workers 0) and process pools of the given sizes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("pdfs", nargs="+", help="PDF files (use a few hundred-page documents)")
+        parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4],
+                            help="Pool sizes to compare; 0 = in process")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per mode; the best is reported")
+
+    def handle(self, *args, **options):
+        pools = {}
+        try:
+            for workers in options["workers"]:
+                if workers > 0:
+                    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+                    # Start the workers up front: the service keeps its pool for the process lifetime
+                    list(pool.map(extract_page_range, [options["pdfs"][0]] * workers, [0] * workers, [1] * workers))
+                    pools[workers] = pool
+
+            for pdf_path in options["pdfs"]:
+                with open(pdf_path, 'rb') as file:
+                    num_pages = len(PyPDF2.PdfReader(file).pages)
+                self.stdout.write(f"{pdf_path}: {num_pages} pages")
+
+                seconds, baseline = self._best(lambda: legacy_extract(pdf_path), options["repeat"])
+                self._report("legacy", num_pages, seconds, len(baseline))
+
+                for workers in options["workers"]:
+                    if workers > 0:
+                        pool = pools[workers]
+                        run = lambda: extract_pages(pdf_path, num_pages, pool=pool)  # noqa: E731
+                    else:
+                        run = lambda: [text for _, text, _ in extract_page_range(pdf_path, 0, num_pages)]  # noqa: E731
+                    seconds, pages = self._best(run, options["repeat"])
+                    text = "\n\n".join(page for page in pages if page)
+                    # Per-page cleaning can differ from whole-document cleaning at page joins
+                    note = "same text" if text == baseline else f"text differs ({len(text) - len(baseline):+d} chars)"
+                    self._report(f"workers={workers}", num_pages, seconds, len(text), note)
+        finally:
+            for pool in pools.values():
+                pool.shutdown()
+
+    @staticmethod
+    def _best(fn, repeat):
+        best, result = None, None
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            result = fn()
+            seconds = time.perf_counter() - started
+            best = seconds if best is None else min(best, seconds)
+        return best, result
+
+    def _report(self, mode, num_pages, seconds, chars, note=""):
+        self.stdout.write(
+            f"  {mode:<12} {seconds * 1000:9.1f} ms  {num_pages / seconds:8.1f} pages/s  {chars:9d} chars"
+            + (f"  {note}" if note else "")
+        )
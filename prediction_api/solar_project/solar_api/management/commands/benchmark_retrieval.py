@@ -0,0 +1,251 @@
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from solar_api.services.chatbot_service import (
+    LLM_TEMPERATURE,
+    MAX_COMPLETION_TOKENS,
+    TOP_K,
+    TWO_STAGE_SEARCH_ENABLED,
+    build_prompt,
+    dedupe_rows,
+    extract_query_keywords,
+    format_context_entry,
+    keyword_search,
+    merge_and_pack,
+    vector_search,
+)
+from solar_api.services.chunker import MIN_CHUNK_LENGTH, iter_chunks
+from solar_api.services.context_packer import CONTEXT_MAX_TOKENS
+from solar_api.services.llm_client import LLM_MODEL, StubBackend
+from solar_api.services.rag_shared import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL_NAME,
+    encode_texts,
+    get_db_connection,
+)
+from solar_api.services.reranker import RERANK_ENABLED
+from solar_api.services.synonyms import expand_synonyms, get_default_matcher
+from solar_api.services.text_extraction import iter_text_pages
+from solar_api.services.vector_index import TenantVectorIndex
+
+DEFAULT_CORPUS = Path(settings.BASE_DIR).parent.parent / "SolarGenix_Knowledge_Base.txt"
+DEFAULT_QUESTIONS = Path(__file__).resolve().parents[2] / "benchmarks" / "retrieval_questions.json"
+STAGES = ("expand", "embed", "vector_sql", "keyword_sql", "pack", "llm")
+
+
+def normalize(text):
+    return " ".join(text.split()).lower()
+
+
+def corpus_chunks(path):
+    """The corpus chunked as ingestion stores it (shipped chunker, short and repeated chunks dropped)."""
+    chunks = (chunk.text for chunk in iter_chunks(enumerate(iter_text_pages(str(path)), 1)))
+    return list(dict.fromkeys(text for text in chunks if len(text.strip()) >= MIN_CHUNK_LENGTH))
+
+
+class InMemoryRetriever:
+    """The corpus in a TenantVectorIndex, as CHATBOT_VECTOR_BACKEND=memory would serve it."""
+
+    def __init__(self, chunks, source):
+        matrix = encode_texts(["search_document: " + c for c in chunks], batch_size=32)
+        self.index = TenantVectorIndex(chunks, [source] * len(chunks), matrix, version=0)
+
+    def expand(self, question):
+        return get_default_matcher().expand(question)
+
+    def vector(self, query_embedding, top_k):
+        return self.index.search(query_embedding, top_k)
+
+    def keyword(self, keywords, query_embedding):
+        return self.index.keyword_search(keywords, query_embedding)
+
+    def close(self):
+        pass
+
+
+class PgvectorRetriever:
+    """Runs the production SQL against a tenant loaded with the corpus."""
+
+    def __init__(self, tenant_id, corpus_path, load):
+        self.tenant_id = tenant_id
+        if load:
+            self._load(corpus_path)
+        self.conn = get_db_connection()
+        self.cur = self.conn.cursor()
+
+    def _load(self, corpus_path):
+        # Imported here so the in-memory mode does not need the ingestion stack
+        from solar_api.services.pdf_ingestion_service import ingest_pdf
+
+        # The production ingestion path; an unchanged corpus is skipped
+        ingest_pdf(str(corpus_path), self.tenant_id)
+
+    def expand(self, question):
+        return expand_synonyms(self.tenant_id, question)
+
+    def vector(self, query_embedding, top_k):
+        return vector_search(self.cur, self.tenant_id, query_embedding, top_k=top_k)
+
+    def keyword(self, keywords, query_embedding):
+        return keyword_search(self.cur, self.tenant_id, keywords, query_embedding)
+
+    def close(self):
+        self.cur.close()
+        self.conn.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a labelled question set through the chatbot retrieval pipeline and report "
+        "recall@k, MRR and p50/p95 latency per stage (LLM via the stub backend)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--corpus", default=str(DEFAULT_CORPUS), help="Knowledge base text file")
+        parser.add_argument("--questions", default=str(DEFAULT_QUESTIONS),
+                            help='JSON list of {"question": ..., "expected": [phrases a relevant chunk contains]}')
+        parser.add_argument("--backend", choices=["memory", "pgvector"], default="memory",
+                            help="In-process tenant index or the configured Postgres database")
+        parser.add_argument("--tenant-id", default="retrieval-benchmark", help="Tenant used with --backend pgvector")
+        parser.add_argument("--no-load", action="store_true",
+                            help="With pgvector, assume the tenant already holds the corpus")
+        parser.add_argument("--top-k", type=int, default=TOP_K, help="Vector rows retrieved")
+        parser.add_argument("--k", type=int, nargs="+", default=[1, 5, 10], help="Cut-offs for recall@k")
+        parser.add_argument("--repeat", type=int, default=3, help="Passes over the question set (for latency)")
+        parser.add_argument("--output", default="retrieval_benchmark.json", help="JSON report path")
+
+    def handle(self, *args, **options):
+        corpus_path = Path(options["corpus"])
+        questions_path = Path(options["questions"])
+        for path in (corpus_path, questions_path):
+            if not path.exists():
+                raise CommandError(f"File not found: {path}")
+
+        labelled = json.loads(questions_path.read_text(encoding="utf-8"))
+        chunks = corpus_chunks(corpus_path)
+        source = f"file://{corpus_path.name}"
+
+        self.stdout.write(self.style.NOTICE(
+            f"{len(labelled)} questions, {len(chunks)} chunks, backend={options['backend']}"
+        ))
+
+        started = time.perf_counter()
+        if options["backend"] == "memory":
+            retriever = InMemoryRetriever(chunks, source)
+        else:
+            retriever = PgvectorRetriever(options["tenant_id"], corpus_path, not options["no_load"])
+        load_seconds = time.perf_counter() - started
+
+        llm = StubBackend()
+        latencies = {stage: [] for stage in STAGES}
+        per_question = []
+        try:
+            for repeat in range(options["repeat"]):
+                for item in labelled:
+                    result = self._run_question(retriever, llm, item, options["top_k"], latencies)
+                    if repeat == 0:
+                        per_question.append(result)
+        finally:
+            retriever.close()
+
+        report = {
+            "config": {
+                "backend": options["backend"],
+                "corpus": str(corpus_path),
+                "questions": str(questions_path),
+                "chunks": len(chunks),
+                "top_k": options["top_k"],
+                "context_max_tokens": CONTEXT_MAX_TOKENS,
+                "two_stage_search": TWO_STAGE_SEARCH_ENABLED,
+                "rerank": RERANK_ENABLED,
+                "embedding_model": EMBEDDING_MODEL_NAME,
+                "embedding_backend": EMBEDDING_BACKEND,
+                "repeat": options["repeat"],
+            },
+            "load_seconds": round(load_seconds, 3),
+            "metrics": self._metrics(per_question, options["k"]),
+            "latency_ms": {
+                stage: {
+                    "p50": round(float(np.percentile(values, 50)), 3),
+                    "p95": round(float(np.percentile(values, 95)), 3),
+                    "mean": round(float(np.mean(values)), 3),
+                }
+                for stage, values in latencies.items() if values
+            },
+            "per_question": per_question,
+        }
+
+        for name, value in report["metrics"].items():
+            self.stdout.write(f"{name:>16}: {value:.3f}")
+        for stage, stats in report["latency_ms"].items():
+            self.stdout.write(f"{stage:>16}: p50 {stats['p50']:8.2f} ms  p95 {stats['p95']:8.2f} ms")
+
+        Path(options["output"]).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+    @staticmethod
+    def _run_question(retriever, llm, item, top_k, latencies):
+        question = item["question"]
+        expected = [normalize(e) for e in item["expected"]]
+
+        def timed(stage, func, *args):
+            started = time.perf_counter()
+            result = func(*args)
+            latencies[stage].append((time.perf_counter() - started) * 1000)
+            return result
+
+        synonyms = timed("expand", retriever.expand, question)
+        query_embedding = timed("embed", lambda q: encode_texts(["search_query: " + q])[0].tolist(), question)
+        vector_rows = timed("vector_sql", retriever.vector, query_embedding, top_k)
+        keyword_rows = timed(
+            "keyword_sql", retriever.keyword, extract_query_keywords(question, synonyms), query_embedding
+        )
+        context_rows = timed("pack", merge_and_pack, vector_rows, keyword_rows, question)
+        context = [format_context_entry(t, s) for t, s in context_rows]
+        timed(
+            "llm", llm.complete, LLM_MODEL,
+            [{"role": "user", "content": build_prompt(question, context)}],
+            MAX_COMPLETION_TOKENS, LLM_TEMPERATURE,
+        )
+
+        def relevant(row_text):
+            row_text = normalize(row_text)
+            return [e for e in expected if e in row_text]
+
+        ranked = dedupe_rows(vector_rows, keyword_rows)
+        first_rank = None
+        found_at = {}
+        for rank, row in enumerate(ranked, start=1):
+            hits = relevant(row[0])
+            if hits and first_rank is None:
+                first_rank = rank
+            for e in hits:
+                found_at.setdefault(e, rank)
+
+        return {
+            "question": question,
+            "first_relevant_rank": first_rank,
+            "expected_found_at": [found_at.get(e) for e in expected],
+            "in_context": any(relevant(t) for t, _ in context_rows),
+            "context_chunks": len(context_rows),
+        }
+
+    @staticmethod
+    def _metrics(per_question, cutoffs):
+        metrics = {}
+        for k in cutoffs:
+            metrics[f"recall@{k}"] = float(np.mean([
+                np.mean([rank is not None and rank <= k for rank in r["expected_found_at"]])
+                for r in per_question
+            ]))
+        metrics["mrr"] = float(np.mean([
+            1.0 / r["first_relevant_rank"] if r["first_relevant_rank"] else 0.0 for r in per_question
+        ]))
+        metrics["context_hit_rate"] = float(np.mean([r["in_context"] for r in per_question]))
+        metrics["mean_context_chunks"] = float(np.mean([r["context_chunks"] for r in per_question]))
+        return metrics
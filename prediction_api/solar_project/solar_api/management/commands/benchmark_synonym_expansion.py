@@ -0,0 +1,109 @@
+import re
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from solar_api.services.synonyms import DEFAULT_SYNONYM_GROUPS, SynonymMatcher
+
+DEFAULT_CORPUS = Path(settings.BASE_DIR).parent.parent / "SolarGenix_Knowledge_Base.txt"
+
+SAMPLE_QUESTIONS = [
+    "What is your phone number?",
+    "How can I recall my order details?",
+    "Where is your office located?",
+    "What is the price of a 5 kW rooftop system?",
+    "Do you provide maintenance services?",
+    "Can I book an appointment for a site survey?",
+    "What are your working hours on Saturday?",
+    "Is there a subsidy for residential solar panels?",
+    "How do I get in touch with support?",
+    "Does the inverter come with a warranty?",
+]
+
+
+def legacy_expand_query(question, groups):
+    """The previous expand_query loop: substring checks for every synonym."""
+    question_lower = question.lower()
+    expanded_terms = [question]
+    for base_term, synonyms in groups.items():
+        for synonym in synonyms:
+            if synonym in question_lower:
+                expanded_terms.extend([s for s in synonyms if s not in question_lower])
+                break
+    return " ".join(expanded_terms)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the compiled Aho-Corasick synonym matcher against the previous "
+        "substring loop, over sample questions and sentences from the knowledge base"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--corpus", default=str(DEFAULT_CORPUS), help="Text file to draw extra questions from")
+        parser.add_argument("--questions", type=int, default=500, help="Number of questions to time")
+        parser.add_argument("--iterations", type=int, default=20, help="Passes over the question set")
+        parser.add_argument("--scale", type=int, nargs="+", default=[1, 10, 50],
+                            help="Dictionary sizes as multiples of the default groups")
+
+    def handle(self, *args, **options):
+        questions = list(SAMPLE_QUESTIONS)
+        corpus_path = Path(options["corpus"])
+        if corpus_path.exists():
+            sentences = re.split(r"(?<=[.?!])\s+", corpus_path.read_text(encoding="utf-8"))
+            questions.extend(s.strip() for s in sentences if 20 <= len(s.strip()) <= 200)
+        questions = questions[:options["questions"]]
+        if not questions:
+            raise CommandError("No questions to benchmark")
+
+        self.stdout.write(self.style.NOTICE(
+            f"{len(questions)} questions x {options['iterations']} iterations"
+        ))
+
+        for scale in options["scale"]:
+            groups = self._scaled_groups(scale)
+            phrases = sum(len(v) for v in groups.values())
+
+            started = time.perf_counter()
+            matcher = SynonymMatcher(groups)
+            compile_ms = (time.perf_counter() - started) * 1000
+
+            legacy_us = self._time(lambda q: legacy_expand_query(q, groups), questions, options["iterations"])
+            compiled_us = self._time(matcher.expand, questions, options["iterations"])
+
+            self.stdout.write(
+                f"x{scale:<3} ({phrases:5d} phrases)  legacy {legacy_us:8.1f} us/q  "
+                f"compiled {compiled_us:8.1f} us/q  speedup {legacy_us / compiled_us:5.1f}x  "
+                f"compile {compile_ms:.1f} ms"
+            )
+
+        # Where the old loop fired on a synonym inside another word
+        matcher = SynonymMatcher(DEFAULT_SYNONYM_GROUPS)
+        partial_hits = [
+            q for q in questions
+            if legacy_expand_query(q, DEFAULT_SYNONYM_GROUPS) != q and not matcher.matched_phrases(q)
+        ]
+        self.stdout.write(f"Questions expanded only by substring (non-word) matches: {len(partial_hits)}")
+        for q in partial_hits[:5]:
+            self.stdout.write(f"  {q}")
+        self.stdout.write(self.style.SUCCESS("Done."))
+
+    @staticmethod
+    def _scaled_groups(scale):
+        if scale <= 1:
+            return dict(DEFAULT_SYNONYM_GROUPS)
+        return {
+            f"{name}{i}": [f"{s}{i}" if i else s for s in synonyms]
+            for i in range(scale)
+            for name, synonyms in DEFAULT_SYNONYM_GROUPS.items()
+        }
+
+    @staticmethod
+    def _time(func, questions, iterations):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            for q in questions:
+                func(q)
+        return (time.perf_counter() - started) * 1e6 / (iterations * len(questions))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from solar_api.services.ann_index import LOCAL_INDEX_DIR, build_local_index, tenant_index_dir, tenant_lock
+from solar_api.services.rag_shared import get_db_connection
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the on-disk FAISS indexes used with CHATBOT_VECTOR_BACKEND=faiss "
+        "from the documents table (all tenants, or one)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tenant-id", help="Only rebuild this tenant")
+
+    def handle(self, *args, **options):
+        if options["tenant_id"]:
+            tenant_ids = [options["tenant_id"]]
+        else:
+            conn = get_db_connection()
+            cur = conn.cursor()
+            try:
+                cur.execute("SELECT DISTINCT tenant_id FROM pages WHERE is_active = TRUE ORDER BY tenant_id")
+                tenant_ids = [row[0] for row in cur.fetchall()]
+            finally:
+                cur.close()
+                conn.close()
+
+        self.stdout.write(self.style.NOTICE(f"Building {len(tenant_ids)} index(es) in {LOCAL_INDEX_DIR}"))
+        for tenant_id in tenant_ids:
+            with tenant_lock(tenant_index_dir(tenant_id)):
+                manifest = build_local_index(tenant_id)
+            self.stdout.write(
+                f"{tenant_id}: {manifest['count']} vectors, content version {manifest['content_version']}"
+            )
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -0,0 +1,74 @@
+import json
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from solar_api.services.chatbot_service import TOP_K, vector_search
+from solar_api.services.rag_shared import get_db_connection
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure recall@k and latency of two-stage (compact halfvec -> full vector) "
+        "search against exact full-vector search, using stored chunks as probe queries"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("tenant_id", help="Tenant whose documents are searched")
+        parser.add_argument("--queries", type=int, default=50, help="Number of probe queries")
+        parser.add_argument("--top-k", type=int, default=TOP_K, help="Rows compared per query")
+        parser.add_argument("--oversample", type=int, nargs="+", default=[2, 4, 8],
+                            help="Oversampling factors to evaluate")
+
+    def handle(self, *args, **options):
+        tenant_id = options["tenant_id"]
+        top_k = options["top_k"]
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("""
+                SELECT d.embedding::text
+                FROM documents d
+                JOIN pages p ON d.page_url = p.url AND d.tenant_id = p.tenant_id
+                WHERE p.is_active = TRUE
+                  AND p.tenant_id = %s
+                ORDER BY random()
+                LIMIT %s
+            """, (tenant_id, options["queries"]))
+            probes = [json.loads(row[0]) for row in cur.fetchall()]
+            if not probes:
+                raise CommandError(f"No documents found for tenant: {tenant_id}")
+
+            exact, exact_ms = self._search_all(cur, tenant_id, probes, top_k, two_stage=False)
+            self.stdout.write(
+                f"exact         p50 {np.percentile(exact_ms, 50):7.2f} ms  "
+                f"p95 {np.percentile(exact_ms, 95):7.2f} ms"
+            )
+
+            for oversample in options["oversample"]:
+                results, latency_ms = self._search_all(
+                    cur, tenant_id, probes, top_k, two_stage=True, oversample=oversample
+                )
+                recall = np.mean([
+                    len(set(r) & set(e)) / max(1, len(e)) for r, e in zip(results, exact)
+                ])
+                self.stdout.write(
+                    f"two-stage x{oversample:<3} p50 {np.percentile(latency_ms, 50):7.2f} ms  "
+                    f"p95 {np.percentile(latency_ms, 95):7.2f} ms  recall@{top_k} {recall:.3f}"
+                )
+        finally:
+            cur.close()
+            conn.close()
+
+        self.stdout.write(self.style.SUCCESS(f"Evaluated {len(probes)} probe queries."))
+
+    @staticmethod
+    def _search_all(cur, tenant_id, probes, top_k, **kwargs):
+        results, latency_ms = [], []
+        for probe in probes:
+            started = time.perf_counter()
+            rows = vector_search(cur, tenant_id, probe, top_k=top_k, **kwargs)
+            latency_ms.append((time.perf_counter() - started) * 1000)
+            results.append([content for content, _, _ in rows])
+        return results, latency_ms
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from solar_api.services.embedding_server import serve
+
+
+class Command(BaseCommand):
+    help = "Run the shared embedding server (one model copy, micro-batched requests)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (keep local)")
+        parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.NOTICE(f"Starting embedding server on {options['host']}:{options['port']}")
+        )
+        serve(host=options["host"], port=options["port"])
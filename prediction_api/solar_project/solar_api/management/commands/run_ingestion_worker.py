@@ -0,0 +1,76 @@
+import signal
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from solar_api.services.ingestion_queue import (
+    claim_next_job,
+    default_worker_id,
+    requeue_stale_jobs,
+    run_job,
+)
+
+STALE_CHECK_SECONDS = 60
+
+
+class Command(BaseCommand):
+    help = "Process queued PDF ingestion jobs (run alongside the web workers; no broker needed)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=1, help="Jobs processed concurrently by this worker")
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to wait when the queue is empty")
+        parser.add_argument("--once", action="store_true", help="Exit when no job is runnable")
+        parser.add_argument("--worker-id", default=default_worker_id(), help="Recorded on claimed jobs")
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self._request_stop)
+
+        # Load the embedding model before the first job instead of inside it
+        from solar_api.services.rag_shared import get_embedder
+        get_embedder()
+
+        self.stdout.write(self.style.NOTICE(
+            f"Ingestion worker {options['worker_id']} started with {options['threads']} thread(s)"
+        ))
+        threads = [
+            threading.Thread(
+                target=self._loop,
+                args=(f"{options['worker_id']}/{i}", options["poll_interval"], options["once"], i == 0),
+                name=f"ingestion-worker-{i}",
+            )
+            for i in range(options["threads"])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.stdout.write(self.style.SUCCESS("Ingestion worker stopped."))
+
+    def _request_stop(self, signum, frame):
+        self.stdout.write("Stopping after the current job(s)...")
+        self.stop.set()
+
+    def _loop(self, worker_id, poll_interval, once, check_stale):
+        stale_checked_at = 0.0
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                if check_stale and time.monotonic() - stale_checked_at >= STALE_CHECK_SECONDS:
+                    requeue_stale_jobs()
+                    stale_checked_at = time.monotonic()
+
+                job = claim_next_job(worker_id)
+                if job is None:
+                    if once:
+                        break
+                    self.stop.wait(poll_interval)
+                    continue
+
+                status = run_job(job)
+                self.stdout.write(f"[{worker_id}] job {job.id} ({job.file_name}): {status}")
+        finally:
+            close_old_connections()
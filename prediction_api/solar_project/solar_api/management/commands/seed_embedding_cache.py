@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from solar_api.services.rag_shared import EMBEDDING_MODEL_VERSION, get_db_connection
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill embedding_cache from chunks already stored in documents, so re-ingesting "
+        "existing text reuses their vectors. Only run it if the stored vectors came from "
+        "the current model (EMBEDDING_MODEL_VERSION)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows copied per transaction")
+
+    def handle(self, *args, **options):
+        conn = get_db_connection()
+        cur = conn.cursor()
+        total = 0
+        last_id = 0
+        try:
+            while True:
+                cur.execute("SELECT MAX(id) FROM (SELECT id FROM documents WHERE id > %s ORDER BY id LIMIT %s) ids",
+                            (last_id, options["batch_size"]))
+                upper = cur.fetchone()[0]
+                if upper is None:
+                    break
+                cur.execute("""
+                    INSERT INTO embedding_cache (chunk_hash, model_version, embedding, created_at)
+                    SELECT DISTINCT ON (hash) hash, %s, embedding, NOW()
+                    FROM documents
+                    WHERE id > %s AND id <= %s
+                    ORDER BY hash, id
+                    ON CONFLICT (chunk_hash, model_version) DO NOTHING
+                """, (EMBEDDING_MODEL_VERSION, last_id, upper))
+                total += cur.rowcount
+                conn.commit()
+                last_id = upper
+                self.stdout.write(self.style.NOTICE(f"Seeded {total} embeddings (documents up to id {upper})..."))
+        finally:
+            cur.close()
+            conn.close()
+
+        self.stdout.write(self.style.SUCCESS(f"Seeded {total} embeddings for model version {EMBEDDING_MODEL_VERSION}."))
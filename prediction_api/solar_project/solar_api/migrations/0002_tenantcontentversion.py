@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solar_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantContentVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.TextField(db_index=True, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'tenant_content_versions',
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:02
+#
+# Adds a compact (Matryoshka-truncated, half-precision) copy of every chunk
+# embedding for two-stage retrieval. The column is maintained by a trigger
+# so every insert path keeps it in sync with ``embedding``; existing rows are
+# filled by ``python manage.py backfill_compact_embeddings``.
+#
+# The pgvector schema is managed with raw SQL (the ``embedding`` column is
+# vector(768) in Postgres), so this migration is a no-op on other backends.
+
+from django.db import migrations
+
+COMPACT_DIM = 256  # Must match rag_shared.COMPACT_EMBEDDING_DIM
+
+FORWARD_SQL = [
+    f"ALTER TABLE documents ADD COLUMN IF NOT EXISTS embedding_compact halfvec({COMPACT_DIM})",
+    f"""
+    CREATE OR REPLACE FUNCTION documents_set_embedding_compact() RETURNS trigger AS $$
+    BEGIN
+        NEW.embedding_compact := subvector(NEW.embedding, 1, {COMPACT_DIM})::halfvec({COMPACT_DIM});
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS documents_embedding_compact ON documents",
+    """
+    CREATE TRIGGER documents_embedding_compact
+    BEFORE INSERT OR UPDATE OF embedding ON documents
+    FOR EACH ROW EXECUTE FUNCTION documents_set_embedding_compact()
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS documents_embedding_compact_hnsw
+    ON documents USING hnsw (embedding_compact halfvec_cosine_ops)
+    """,
+]
+
+REVERSE_SQL = [
+    "DROP INDEX IF EXISTS documents_embedding_compact_hnsw",
+    "DROP TRIGGER IF EXISTS documents_embedding_compact ON documents",
+    "DROP FUNCTION IF EXISTS documents_set_embedding_compact()",
+    "ALTER TABLE documents DROP COLUMN IF EXISTS embedding_compact",
+]
+
+
+def _run(statements):
+    def apply(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solar_api', '0002_tenantcontentversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(FORWARD_SQL), _run(REVERSE_SQL)),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solar_api', '0003_document_embedding_compact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantSynonymGroup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.TextField(db_index=True)),
+                ('name', models.TextField()),
+                ('synonyms', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'tenant_synonym_groups',
+                'constraints': [models.UniqueConstraint(fields=('tenant_id', 'name'), name='unique_tenant_synonym_group')],
+            },
+        ),
+    ]
@@ -0,0 +1,122 @@
+# Generated by Django 5.2.1 on 2026-10-19 16:20
+#
+# 1. ``documents.hash`` was unique across the whole table, so a chunk whose
+#    text already existed in another page (another tenant's copy of the same
+#    brochure, say) was dropped by ``ON CONFLICT (hash) DO NOTHING`` and
+#    never became retrievable for the second page. Uniqueness is now per
+#    (page_url, hash); the plain index on hash is kept.
+# 2. ``embedding_cache`` stores document embeddings by (chunk_hash,
+#    model_version) so ingestion embeds recurring text only once.
+#
+# The unique constraint on hash predates these migrations on some databases
+# (the pgvector schema was created with raw SQL), so it is looked up by
+# column rather than by name. Like 0003, the raw SQL is skipped on
+# non-PostgreSQL backends.
+
+import django.utils.timezone
+from django.db import migrations, models
+
+DOCUMENTS_FORWARD_SQL = [
+    """
+    DO $$
+    DECLARE
+        item record;
+    BEGIN
+        FOR item IN
+            SELECT con.conname
+            FROM pg_constraint con
+            JOIN pg_attribute att ON att.attrelid = con.conrelid AND att.attnum = con.conkey[1]
+            WHERE con.conrelid = 'documents'::regclass
+              AND con.contype = 'u'
+              AND array_length(con.conkey, 1) = 1
+              AND att.attname = 'hash'
+        LOOP
+            EXECUTE format('ALTER TABLE documents DROP CONSTRAINT %I', item.conname);
+        END LOOP;
+        FOR item IN
+            SELECT cls.relname
+            FROM pg_index idx
+            JOIN pg_class cls ON cls.oid = idx.indexrelid
+            JOIN pg_attribute att ON att.attrelid = idx.indrelid AND att.attnum = idx.indkey[0]
+            WHERE idx.indrelid = 'documents'::regclass
+              AND idx.indisunique
+              AND NOT idx.indisprimary
+              AND idx.indnatts = 1
+              AND att.attname = 'hash'
+        LOOP
+            EXECUTE format('DROP INDEX %I', item.relname);
+        END LOOP;
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_constraint
+            WHERE conrelid = 'documents'::regclass AND conname = 'unique_document_page_chunk'
+        ) THEN
+            ALTER TABLE documents ADD CONSTRAINT unique_document_page_chunk UNIQUE (page_url, hash);
+        END IF;
+    END
+    $$
+    """,
+]
+
+# Fails if identical chunks have since been stored for different pages
+DOCUMENTS_REVERSE_SQL = [
+    "ALTER TABLE documents DROP CONSTRAINT IF EXISTS unique_document_page_chunk",
+    "ALTER TABLE documents ADD CONSTRAINT documents_hash_key UNIQUE (hash)",
+]
+
+EMBEDDING_CACHE_FORWARD_SQL = [
+    "ALTER TABLE embedding_cache ALTER COLUMN embedding TYPE vector USING embedding::vector",
+]
+
+EMBEDDING_CACHE_REVERSE_SQL = [
+    "ALTER TABLE embedding_cache ALTER COLUMN embedding TYPE text USING embedding::text",
+]
+
+
+def _run(statements):
+    def apply(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solar_api', '0005_ingestionjob'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(_run(DOCUMENTS_FORWARD_SQL), _run(DOCUMENTS_REVERSE_SQL)),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='document',
+                    name='hash',
+                    field=models.TextField(db_index=True),
+                ),
+                migrations.AddConstraint(
+                    model_name='document',
+                    constraint=models.UniqueConstraint(fields=('page_url', 'hash'), name='unique_document_page_chunk'),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EmbeddingCache',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chunk_hash', models.TextField()),
+                ('model_version', models.TextField()),
+                ('embedding', models.TextField(help_text='Vector embedding stored as JSON array')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'embedding_cache',
+                'constraints': [models.UniqueConstraint(fields=('chunk_hash', 'model_version'), name='unique_embedding_cache_entry')],
+            },
+        ),
+        migrations.RunPython(_run(EMBEDDING_CACHE_FORWARD_SQL), _run(EMBEDDING_CACHE_REVERSE_SQL)),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solar_api', '0006_embeddingcache_document_page_chunk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='heading',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='page_end',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='page_start',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solar_api', '0007_document_chunk_metadata'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ingestionjob',
+            name='file_path',
+            field=models.TextField(help_text='Uploaded file (batch jobs: upload directory), removed once the job finishes'),
+        ),
+        migrations.AddField(
+            model_name='ingestionjob',
+            name='files',
+            field=models.JSONField(blank=True, default=list, help_text='Batch jobs: [{name, path}] of every file; empty for single-file jobs'),
+        ),
+    ]
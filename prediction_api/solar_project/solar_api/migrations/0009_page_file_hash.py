@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solar_api', '0008_ingestionjob_files'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='page',
+            name='file_hash',
+            field=models.TextField(blank=True, help_text="SHA-256 of the uploaded file's bytes (skips re-parsing identical uploads)", null=True),
+        ),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 5.2.1 on 2026-10-19 21:40
+#
+# Page keys are scoped by tenant. ``pages.url`` was unique across all
+# tenants, so a second tenant uploading a file with the same name took over
+# the first tenant's page row (``ON CONFLICT (url)`` rewrote ``tenant_id``)
+# and the two tenants shared, overwrote and deleted each other's chunks.
+#
+# - ``pages`` is unique per (tenant_id, url).
+# - ``documents`` gets a ``tenant_id`` column, backfilled from its page, and
+#   chunks are unique per (tenant_id, page_url, hash).
+#
+# As in 0006, the old unique constraint on ``pages.url`` may have been
+# created by raw SQL, so it is looked up by column rather than by name, and
+# the raw SQL is skipped on non-PostgreSQL backends.
+
+from django.db import migrations, models
+
+PAGES_FORWARD_SQL = [
+    """
+    DO $$
+    DECLARE
+        item record;
+    BEGIN
+        FOR item IN
+            SELECT con.conname
+            FROM pg_constraint con
+            JOIN pg_attribute att ON att.attrelid = con.conrelid AND att.attnum = con.conkey[1]
+            WHERE con.conrelid = 'pages'::regclass
+              AND con.contype = 'u'
+              AND array_length(con.conkey, 1) = 1
+              AND att.attname = 'url'
+        LOOP
+            EXECUTE format('ALTER TABLE pages DROP CONSTRAINT %I', item.conname);
+        END LOOP;
+        FOR item IN
+            SELECT cls.relname
+            FROM pg_index idx
+            JOIN pg_class cls ON cls.oid = idx.indexrelid
+            JOIN pg_attribute att ON att.attrelid = idx.indrelid AND att.attnum = idx.indkey[0]
+            WHERE idx.indrelid = 'pages'::regclass
+              AND idx.indisunique
+              AND NOT idx.indisprimary
+              AND idx.indnatts = 1
+              AND att.attname = 'url'
+        LOOP
+            EXECUTE format('DROP INDEX %I', item.relname);
+        END LOOP;
+    END
+    $$
+    """,
+]
+
+# Fails if two tenants have since stored a page with the same url
+PAGES_REVERSE_SQL = [
+    "ALTER TABLE pages ADD CONSTRAINT pages_url_key UNIQUE (url)",
+]
+
+BACKFILL_DOCUMENTS_SQL = [
+    """
+    UPDATE documents d
+    SET tenant_id = p.tenant_id
+    FROM pages p
+    WHERE d.page_url = p.url
+      AND d.tenant_id IS NULL
+    """,
+]
+
+
+def _run(statements):
+    def apply(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solar_api', '0009_page_file_hash'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(_run(PAGES_FORWARD_SQL), _run(PAGES_REVERSE_SQL)),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='page',
+                    name='url',
+                    field=models.TextField(db_index=True),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='page',
+            constraint=models.UniqueConstraint(fields=('tenant_id', 'url'), name='unique_page_tenant_url'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='tenant_id',
+            field=models.TextField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(_run(BACKFILL_DOCUMENTS_SQL), migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='document',
+            name='unique_document_page_chunk',
+        ),
+        migrations.AddConstraint(
+            model_name='document',
+            constraint=models.UniqueConstraint(
+                fields=('tenant_id', 'page_url', 'hash'), name='unique_document_tenant_page_chunk'
+            ),
+        ),
+    ]
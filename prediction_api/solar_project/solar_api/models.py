@@ -25,9 +25,12 @@ class Page(models.Model):
     """
     Model representing a page (URL) that has been indexed.
     """
-    url = models.TextField(unique=True, db_index=True)
+    url = models.TextField(db_index=True)
     tenant_id = models.TextField(db_index=True)
     content_hash = models.TextField()
+    file_hash = models.TextField(
+        null=True, blank=True, help_text="SHA-256 of the uploaded file's bytes (skips re-parsing identical uploads)"
+    )
     is_active = models.BooleanField(default=True, db_index=True)
     last_indexed = models.DateTimeField(default=timezone.now)
     
@@ -37,6 +40,10 @@ class Page(models.Model):
             models.Index(fields=['tenant_id', 'is_active']),
             models.Index(fields=['url']),
         ]
+        constraints = [
+            # Tenants may upload files with the same name
+            models.UniqueConstraint(fields=['tenant_id', 'url'], name='unique_page_tenant_url'),
+        ]
     
     def __str__(self):
         return f"{self.url} ({self.tenant_id})"
@@ -51,10 +58,18 @@ class Document(models.Model):
     content = models.TextField()
     source = models.TextField()
     page_url = models.TextField(db_index=True)
+    # Owner of the page; pages are keyed by (tenant_id, url)
+    tenant_id = models.TextField(null=True, blank=True, db_index=True)
     # embedding is stored as a vector(768) in PostgreSQL
     # We'll use a TextField to store it as JSON, or use raw SQL for vector operations
     embedding = models.TextField(help_text="Vector embedding stored as JSON array")
-    hash = models.TextField(unique=True, db_index=True)
+    # embedding_compact (halfvec(256), first 256 dims of embedding) is added and
+    # kept in sync by a trigger in migration 0003; it is not mapped here.
+    hash = models.TextField(db_index=True)
+    # Chunk metadata from the ingestion chunker (empty for older rows)
+    page_start = models.IntegerField(null=True, blank=True)
+    page_end = models.IntegerField(null=True, blank=True)
+    heading = models.TextField(null=True, blank=True)
     
     class Meta:
         db_table = 'documents'
@@ -62,6 +77,119 @@ class Document(models.Model):
             models.Index(fields=['page_url']),
             models.Index(fields=['hash']),
         ]
+        constraints = [
+            # Identical chunks may appear in many pages (and tenants)
+            models.UniqueConstraint(
+                fields=['tenant_id', 'page_url', 'hash'], name='unique_document_tenant_page_chunk'
+            ),
+        ]
     
     def __str__(self):
-        return f"Document {self.id} from {self.source}"
\ No newline at end of file
+        return f"Document {self.id} from {self.source}"
+
+class TenantContentVersion(models.Model):
+    """
+    Monotonic version counter for a tenant's knowledge base.
+    Bumped whenever documents are ingested or deleted so that caches
+    built from the tenant's content can detect that they are stale.
+    """
+    tenant_id = models.TextField(unique=True, db_index=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'tenant_content_versions'
+
+    def __str__(self):
+        return f"{self.tenant_id} v{self.version}"
+
+
+class TenantSynonymGroup(models.Model):
+    """
+    A tenant-specific synonym group used to expand keyword retrieval.
+    A group whose name matches a default group replaces it for that tenant.
+    """
+    tenant_id = models.TextField(db_index=True)
+    name = models.TextField()
+    synonyms = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'tenant_synonym_groups'
+        constraints = [
+            models.UniqueConstraint(fields=['tenant_id', 'name'], name='unique_tenant_synonym_group'),
+        ]
+
+    def __str__(self):
+        return f"{self.tenant_id}: {self.name}"
+
+
+class IngestionJob(models.Model):
+    """
+    A queued PDF ingestion, processed outside the request by
+    ``manage.py run_ingestion_worker``. Bulk uploads are one job whose
+    ``files`` are ingested as a batch.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    tenant_id = models.TextField(db_index=True)
+    file_name = models.TextField()
+    file_path = models.TextField(help_text="Uploaded file (batch jobs: upload directory), removed once the job finishes")
+    files = models.JSONField(
+        default=list, blank=True, help_text="Batch jobs: [{name, path}] of every file; empty for single-file jobs"
+    )
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    progress = models.JSONField(default=dict)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    run_after = models.DateTimeField(default=timezone.now, help_text="Not claimed before this time (retry backoff)")
+    worker_id = models.TextField(blank=True, default='')
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'ingestion_jobs'
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+            models.Index(fields=['tenant_id', 'status']),
+        ]
+
+    def __str__(self):
+        return f"Ingestion {self.id} ({self.tenant_id}, {self.status})"
+
+
+class EmbeddingCache(models.Model):
+    """
+    Content-addressed document embeddings shared by all tenants and sources.
+    Keyed by chunk hash and embedding model version, so text that recurs
+    across PDFs is embedded once per model.
+    Note: like ``Document.embedding``, the embedding is a pgvector ``vector``
+    in PostgreSQL (see migration 0006) and is read and written with raw SQL.
+    """
+    chunk_hash = models.TextField()
+    model_version = models.TextField()
+    embedding = models.TextField(help_text="Vector embedding stored as JSON array")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'embedding_cache'
+        constraints = [
+            models.UniqueConstraint(fields=['chunk_hash', 'model_version'], name='unique_embedding_cache_entry'),
+        ]
+
+    def __str__(self):
+        return f"{self.chunk_hash[:12]} ({self.model_version})"
@@ -0,0 +1,79 @@
+"""
+Opt-in pgvector database for tests.
+
+Tests that need a real Postgres are skipped unless ``PGVECTOR_TEST_DATABASE``
+names a database on the ``SQL_DATABASE_HOST`` server (same credentials)
+with the ``vector`` extension installed. They work on TEMP ``pages`` and
+``documents`` tables, which shadow the real tables for the session, and
+roll back, so nothing is written to permanent tables.
+"""
+import os
+import unittest
+
+PGVECTOR_TEST_DATABASE = os.getenv("PGVECTOR_TEST_DATABASE")
+
+# Mirrors the columns and keys the services rely on (0001-0010)
+TEMP_SCHEMA_SQL = [
+    """
+    CREATE TEMP TABLE pages (
+        id SERIAL PRIMARY KEY,
+        url TEXT NOT NULL,
+        tenant_id TEXT NOT NULL,
+        content_hash TEXT NOT NULL,
+        file_hash TEXT,
+        is_active BOOLEAN NOT NULL DEFAULT TRUE,
+        last_indexed TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        UNIQUE (tenant_id, url)
+    ) ON COMMIT DROP
+    """,
+    """
+    CREATE TEMP TABLE documents (
+        id SERIAL PRIMARY KEY,
+        content TEXT NOT NULL,
+        source TEXT NOT NULL,
+        page_url TEXT NOT NULL,
+        tenant_id TEXT,
+        embedding vector(768) NOT NULL,
+        embedding_compact halfvec(256) GENERATED ALWAYS AS (subvector(embedding, 1, 256)::halfvec(256)) STORED,
+        hash TEXT NOT NULL,
+        page_start INTEGER,
+        page_end INTEGER,
+        heading TEXT,
+        UNIQUE (tenant_id, page_url, hash)
+    ) ON COMMIT DROP
+    """,
+    "CREATE INDEX ON documents USING hnsw (embedding_compact halfvec_cosine_ops)",
+]
+
+
+def connect_pgvector_test_db():
+    """
+    Connection and cursor with the temp schema created (not committed).
+
+    Raises:
+        unittest.SkipTest: If no pgvector test database is configured or reachable
+    """
+    if not PGVECTOR_TEST_DATABASE:
+        raise unittest.SkipTest("PGVECTOR_TEST_DATABASE is not set")
+    try:
+        import psycopg2
+
+        from .services.rag_shared import DB_CONFIG
+    except ImportError as e:
+        raise unittest.SkipTest(f"Database dependencies unavailable: {e}")
+
+    config = {**DB_CONFIG, "dbname": PGVECTOR_TEST_DATABASE}
+    config["sslmode"] = os.getenv("PGVECTOR_TEST_SSLMODE", config["sslmode"])
+    try:
+        conn = psycopg2.connect(**config)
+    except psycopg2.Error as e:
+        raise unittest.SkipTest(f"pgvector test database unreachable: {e}")
+
+    cur = conn.cursor()
+    cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'vector'")
+    if cur.fetchone() is None:
+        conn.close()
+        raise unittest.SkipTest(f"The vector extension is not installed in {PGVECTOR_TEST_DATABASE}")
+    for statement in TEMP_SCHEMA_SQL:
+        cur.execute(statement)
+    return conn, cur
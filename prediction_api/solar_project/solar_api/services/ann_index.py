@@ -0,0 +1,460 @@
+"""
+On-disk FAISS index per tenant (``CHATBOT_VECTOR_BACKEND=faiss``).
+
+For self-hosted deployments where retrieval should not wait on a database
+round trip. Each tenant gets a directory under ``CHATBOT_LOCAL_INDEX_DIR``::
+
+    <tenant key>/
+        manifest.json               content version, generation, size
+        g<generation>/index.faiss   IndexIDMap2 keyed by documents.id
+        g<generation>/chunks.sqlite3  id -> content, source, page_url
+        .lock
+
+The ``documents`` table stays the source of truth:
+
+- PDF ingestion calls ``update_local_index`` after each commit that bumps
+  the tenant content version; it swaps the re-ingested pages' vectors in
+  place of the old ones, provided the index was at the previous version.
+- Any other mismatch (missed update, deleted directory, another worker
+  that ingested first) is fixed on the next query by rebuilding from the
+  database.
+
+Writers build a new generation directory and then replace the manifest, so
+readers always open a complete index. Indexes are memory-mapped where the
+index type allows it, so worker processes share pages through the OS cache.
+Requires ``faiss-cpu``.
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .context_packer import ScoredRow
+from .rag_shared import EMBEDDING_MODEL_NAME, get_db_connection, get_tenant_content_version
+from .vector_index import (
+    KEYWORD_ROWS_PER_TERM,
+    MEMORY_INDEX_REVALIDATE_SECONDS,
+    VECTOR_BACKEND,
+    VectorIndex,
+    VectorIndexCache,
+    normalize_rows,
+    normalize_vector,
+    parse_vector,
+)
+
+# =====================================================
+# LOGGING SETUP
+# =====================================================
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIG
+# =====================================================
+LOCAL_INDEX_DIR = Path(
+    os.getenv("CHATBOT_LOCAL_INDEX_DIR") or Path(__file__).resolve().parents[2] / "vector_indexes"
+)
+LOCAL_INDEX_TYPE = os.getenv("CHATBOT_LOCAL_INDEX_TYPE", "flat").lower()  # flat (exact) | hnsw (approximate)
+LOCAL_INDEX_HNSW_M = 32
+LOCAL_INDEX_HNSW_EF_SEARCH = int(os.getenv("CHATBOT_LOCAL_INDEX_HNSW_EF_SEARCH", "64"))
+LOCAL_INDEX_MAX_MB = int(os.getenv("CHATBOT_LOCAL_INDEX_MAX_MB", "2048"))  # Open indexes per process
+BUILD_FETCH_SIZE = 2000  # Rows per round trip when building from the database
+
+Row = Tuple[int, str, str, str, str]  # (id, content, source, page_url, embedding text)
+
+
+# =====================================================
+# FILE LAYOUT
+# =====================================================
+def tenant_index_dir(tenant_id: str) -> Path:
+    """Directory for a tenant's index; hashed so any tenant id is a safe name."""
+    return LOCAL_INDEX_DIR / hashlib.sha256(tenant_id.encode("utf-8")).hexdigest()[:32]
+
+
+@contextmanager
+def tenant_lock(tenant_dir: Path) -> Iterator[None]:
+    """Exclusive lock across processes for writers of one tenant's index."""
+    tenant_dir.mkdir(parents=True, exist_ok=True)
+    with open(tenant_dir / ".lock", "a+") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def read_manifest(tenant_dir: Path) -> Optional[Dict]:
+    try:
+        with open(tenant_dir / "manifest.json", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def write_manifest(tenant_dir: Path, manifest: Dict) -> None:
+    """Atomically replace the manifest, publishing its generation to readers."""
+    tmp_path = tenant_dir / f"manifest.json.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, tenant_dir / "manifest.json")
+
+
+def remove_old_generations(tenant_dir: Path, keep: int) -> None:
+    # Open readers keep their (unlinked) files until they close them
+    for path in tenant_dir.glob("g*"):
+        if path.is_dir() and path.name != f"g{keep}":
+            shutil.rmtree(path, ignore_errors=True)
+
+
+# =====================================================
+# BUILDING
+# =====================================================
+def new_faiss_index(dim: int):
+    import faiss
+
+    if LOCAL_INDEX_TYPE == "hnsw":
+        base = faiss.IndexHNSWFlat(dim, LOCAL_INDEX_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+    else:
+        base = faiss.IndexFlatIP(dim)
+    return faiss.IndexIDMap2(base)
+
+
+def open_chunk_store(path: Path) -> sqlite3.Connection:
+    db = sqlite3.connect(str(path))
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS chunks (
+            id INTEGER PRIMARY KEY,
+            content TEXT NOT NULL,
+            source TEXT NOT NULL,
+            page_url TEXT NOT NULL
+        )
+    """)
+    db.execute("CREATE INDEX IF NOT EXISTS chunks_page_url ON chunks (page_url)")
+    return db
+
+
+def add_rows(index, db: sqlite3.Connection, rows: Sequence[Row]):
+    """Add document rows to the FAISS index and chunk store; returns the index."""
+    if not rows:
+        return index
+    matrix = normalize_rows(np.vstack([parse_vector(r[4]) for r in rows]))
+    if index is None:
+        index = new_faiss_index(matrix.shape[1])
+    index.add_with_ids(matrix, np.array([r[0] for r in rows], dtype=np.int64))
+    db.executemany(
+        "INSERT OR REPLACE INTO chunks (id, content, source, page_url) VALUES (?, ?, ?, ?)",
+        [r[:4] for r in rows],
+    )
+    return index
+
+
+def write_generation(tenant_dir: Path, generation: int, index, db: sqlite3.Connection,
+                     tenant_id: str, content_version: int) -> Dict:
+    """Persist a finished generation and publish it through the manifest."""
+    import faiss
+
+    gen_dir = tenant_dir / f"g{generation}"
+    if index is not None:
+        faiss.write_index(index, str(gen_dir / "index.faiss"))
+    db.commit()
+    db.close()
+
+    manifest = {
+        "tenant_id": tenant_id,
+        "content_version": content_version,
+        "generation": generation,
+        "index_type": LOCAL_INDEX_TYPE,
+        "count": int(index.ntotal) if index is not None else 0,
+        "embedding_model": EMBEDDING_MODEL_NAME,
+        "updated_at": time.time(),
+    }
+    write_manifest(tenant_dir, manifest)
+    remove_old_generations(tenant_dir, keep=generation)
+    return manifest
+
+
+def new_generation_dir(tenant_dir: Path, manifest: Optional[Dict]) -> Tuple[int, Path]:
+    generation = (manifest["generation"] if manifest else 0) + 1
+    gen_dir = tenant_dir / f"g{generation}"
+    shutil.rmtree(gen_dir, ignore_errors=True)  # Leftover of an interrupted writer
+    gen_dir.mkdir(parents=True)
+    return generation, gen_dir
+
+
+def build_local_index(tenant_id: str) -> Dict:
+    """
+    Rebuild a tenant's index from the database. Caller holds ``tenant_lock``.
+
+    The content version and the rows are read in one snapshot, so the
+    manifest never claims a version newer than its contents.
+
+    Returns:
+        The new manifest
+    """
+    tenant_dir = tenant_index_dir(tenant_id)
+    generation, gen_dir = new_generation_dir(tenant_dir, read_manifest(tenant_dir))
+    started = time.perf_counter()
+
+    db = open_chunk_store(gen_dir / "chunks.sqlite3")
+    index = None
+    conn = get_db_connection()
+    try:
+        conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+        cur = conn.cursor()
+        content_version = get_tenant_content_version(tenant_id, cur)
+        cur.close()
+
+        rows_cur = conn.cursor(name="local_index_build")
+        rows_cur.itersize = BUILD_FETCH_SIZE
+        rows_cur.execute("""
+            SELECT d.id, d.content, d.source, d.page_url, d.embedding::text
+            FROM documents d
+            JOIN pages p ON d.page_url = p.url AND d.tenant_id = p.tenant_id
+            WHERE p.is_active = TRUE
+              AND p.tenant_id = %s
+            ORDER BY d.id
+        """, (tenant_id,))
+        while True:
+            rows = rows_cur.fetchmany(BUILD_FETCH_SIZE)
+            if not rows:
+                break
+            index = add_rows(index, db, rows)
+        rows_cur.close()
+        conn.rollback()
+    finally:
+        conn.close()
+
+    manifest = write_generation(tenant_dir, generation, index, db, tenant_id, content_version)
+    logger.info(
+        f"Built {LOCAL_INDEX_TYPE} index for tenant {tenant_id}: {manifest['count']} vectors, "
+        f"content version {content_version}, {(time.perf_counter() - started):.1f}s"
+    )
+    return manifest
+
+
+def fetch_page_rows(tenant_id: str, page_urls: Sequence[str]) -> List[Row]:
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT d.id, d.content, d.source, d.page_url, d.embedding::text
+            FROM documents d
+            JOIN pages p ON d.page_url = p.url AND d.tenant_id = p.tenant_id
+            WHERE p.is_active = TRUE
+              AND p.tenant_id = %s
+              AND d.page_url = ANY(%s)
+            ORDER BY d.id
+        """, (tenant_id, list(page_urls)))
+        return cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+
+
+def update_local_index(tenant_id: str, page_urls: Sequence[str], content_version: int) -> bool:
+    """
+    Replace the vectors of pages re-ingested under one content version
+    bump. Never raises.
+
+    Only applies when the on-disk index is at ``content_version - 1`` (so it
+    saw everything before this ingestion); otherwise the index is left for
+    the next query to rebuild. All pages go into one new generation, so
+    every page committed with the bump must be passed in the same call.
+
+    Args:
+        tenant_id: Tenant identifier
+        page_urls: ``pages.url`` of every page changed by the bump
+        content_version: Tenant content version after the ingestion
+
+    Returns:
+        True if the index now reflects ``content_version``
+    """
+    if VECTOR_BACKEND != "faiss":
+        return False
+    tenant_dir = tenant_index_dir(tenant_id)
+    if not tenant_dir.exists():
+        return False
+
+    try:
+        import faiss
+
+        with tenant_lock(tenant_dir):
+            manifest = read_manifest(tenant_dir)
+            if (
+                manifest is None
+                or manifest["content_version"] != content_version - 1
+                or manifest.get("index_type") != LOCAL_INDEX_TYPE
+            ):
+                logger.info(f"Local index for tenant {tenant_id} is out of step; it will be rebuilt on next query")
+                return False
+
+            old_dir = tenant_dir / f"g{manifest['generation']}"
+            generation, gen_dir = new_generation_dir(tenant_dir, manifest)
+            shutil.copyfile(old_dir / "chunks.sqlite3", gen_dir / "chunks.sqlite3")
+            db = open_chunk_store(gen_dir / "chunks.sqlite3")
+            index = faiss.read_index(str(old_dir / "index.faiss")) if manifest["count"] else None
+
+            old_ids = [
+                row[0]
+                for page_url in page_urls
+                for row in db.execute("SELECT id FROM chunks WHERE page_url = ?", (page_url,))
+            ]
+            if old_ids and LOCAL_INDEX_TYPE == "hnsw":
+                # HNSW graphs do not support removal
+                db.close()
+                shutil.rmtree(gen_dir, ignore_errors=True)
+                return build_local_index(tenant_id)["content_version"] >= content_version
+            if old_ids:
+                index.remove_ids(np.array(old_ids, dtype=np.int64))
+                db.executemany("DELETE FROM chunks WHERE page_url = ?", [(page_url,) for page_url in page_urls])
+
+            new_rows = fetch_page_rows(tenant_id, page_urls)
+            index = add_rows(index, db, new_rows)
+            write_generation(tenant_dir, generation, index, db, tenant_id, content_version)
+
+        logger.info(
+            f"Updated local index for tenant {tenant_id}: -{len(old_ids)} +{len(new_rows)} vectors "
+            f"({len(page_urls)} page(s), content version {content_version})"
+        )
+        return True
+    except Exception as e:
+        logger.warning(f"Local index update failed for tenant {tenant_id}: {e}. It will be rebuilt on next query.")
+        return False
+
+
+def remove_local_index(tenant_id: str) -> None:
+    """Delete a tenant's on-disk index (e.g. with its knowledge base)."""
+    tenant_dir = tenant_index_dir(tenant_id)
+    if tenant_dir.exists():
+        with tenant_lock(tenant_dir):
+            shutil.rmtree(tenant_dir, ignore_errors=True)
+    get_local_index_cache().invalidate(tenant_id)
+
+
+# =====================================================
+# SEARCH
+# =====================================================
+class LocalAnnIndex(VectorIndex):
+    """A tenant's published FAISS index and chunk store, opened read-only."""
+
+    backend = "faiss"
+
+    def __init__(self, gen_dir: Path, manifest: Dict):
+        import faiss
+
+        self.version = manifest["content_version"]
+        self.index = None
+        self.nbytes = 0
+        index_path = gen_dir / "index.faiss"
+        if manifest["count"]:
+            try:
+                self.index = faiss.read_index(str(index_path), faiss.IO_FLAG_MMAP)
+            except RuntimeError:
+                # Index types without mmap support are read into memory
+                self.index = faiss.read_index(str(index_path))
+            if manifest.get("index_type") == "hnsw":
+                faiss.ParameterSpace().set_index_parameter(self.index, "efSearch", LOCAL_INDEX_HNSW_EF_SEARCH)
+            self.nbytes = index_path.stat().st_size
+
+        self._db = sqlite3.connect(f"file:{gen_dir / 'chunks.sqlite3'}?mode=ro", uri=True, check_same_thread=False)
+        self._db_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return int(self.index.ntotal) if self.index is not None else 0
+
+    def _query_db(self, sql: str, params: Sequence) -> list:
+        with self._db_lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def close(self) -> None:
+        """Close the chunk store, waiting for a query in progress."""
+        with self._db_lock:
+            self._db.close()
+
+    def search(self, query_embedding: List[float], top_k: int) -> List[ScoredRow]:
+        if not len(self) or top_k <= 0:
+            return []
+        query = normalize_vector(query_embedding).reshape(1, -1)
+        scores, ids = self.index.search(query, min(top_k, len(self)))
+        hits = [(int(i), float(s)) for i, s in zip(ids[0], scores[0]) if i != -1]
+        if not hits:
+            return []
+
+        placeholders = ",".join("?" * len(hits))
+        rows = {
+            chunk_id: (content, source)
+            for chunk_id, content, source in self._query_db(
+                f"SELECT id, content, source FROM chunks WHERE id IN ({placeholders})", [i for i, _ in hits]
+            )
+        }
+        return [(rows[i][0], rows[i][1], score) for i, score in hits if i in rows]
+
+    def keyword_search(
+        self,
+        keywords: List[str],
+        query_embedding: List[float],
+        rows_per_term: int = KEYWORD_ROWS_PER_TERM,
+    ) -> List[ScoredRow]:
+        if not keywords or not len(self):
+            return []
+        query = normalize_vector(query_embedding)
+        rows = []
+        for kw in keywords:
+            pattern = "%" + kw.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            hits = self._query_db(
+                "SELECT id, content, source FROM chunks WHERE content LIKE ? ESCAPE '\\' LIMIT ?",
+                (pattern, rows_per_term),
+            )
+            rows.extend(
+                (content, source, float(self.index.reconstruct(chunk_id) @ query))
+                for chunk_id, content, source in hits
+            )
+        return rows
+
+
+def open_local_index(tenant_id: str, version: int, max_chunks: int = 0) -> LocalAnnIndex:
+    """
+    Open the tenant's index, rebuilding it from the database first if it is
+    missing or older than ``version``. ``max_chunks`` is unused: FAISS
+    serves tenants of any size (``VectorIndexCache`` loader signature).
+    """
+    tenant_dir = tenant_index_dir(tenant_id)
+
+    def stale(manifest: Optional[Dict]) -> bool:
+        return (
+            manifest is None
+            or manifest["content_version"] < version
+            or manifest.get("index_type") != LOCAL_INDEX_TYPE
+        )
+
+    manifest = read_manifest(tenant_dir)
+    if stale(manifest):
+        with tenant_lock(tenant_dir):
+            manifest = read_manifest(tenant_dir)
+            if stale(manifest):
+                manifest = build_local_index(tenant_id)
+    return LocalAnnIndex(tenant_dir / f"g{manifest['generation']}", manifest)
+
+
+_local_index_cache = VectorIndexCache(
+    open_local_index,
+    max_bytes=LOCAL_INDEX_MAX_MB * 1024 * 1024,
+    max_chunks=0,
+    revalidate_seconds=MEMORY_INDEX_REVALIDATE_SECONDS,
+)
+
+
+def get_local_index_cache() -> VectorIndexCache:
+    """Return the process-wide cache of open FAISS indexes."""
+    return _local_index_cache
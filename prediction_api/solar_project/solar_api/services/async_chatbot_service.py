@@ -0,0 +1,359 @@
+"""
+Async implementation of the chatbot RAG pipeline for the ASGI entry point.
+
+Mirrors ``chatbot_service.get_chatbot_response`` but never blocks the event
+loop: the embedding runs in a thread pool, Postgres is queried through an
+asyncpg pool, and the LLM is called through the async client manager. The
+vector and keyword searches (and the cache version read) run concurrently.
+"""
+import asyncio
+import contextvars
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import asyncpg
+
+from .chatbot_service import (
+    LLM_TEMPERATURE,
+    MAX_COMPLETION_TOKENS,
+    NO_CONTEXT_ANSWER,
+    SEMANTIC_CACHE_ENABLED,
+    TOP_K,
+    TWO_STAGE_OVERSAMPLE,
+    TWO_STAGE_SEARCH_ENABLED,
+    DatabaseError,
+    build_prompt,
+    describe_error,
+    embed_query,
+    ensure_llm_configured,
+    extract_query_keywords,
+    format_context_entry,
+    dedupe_rows,
+    distances_to_scores,
+    get_answer_cache,
+    hnsw_settings,
+    question_token_budget,
+    to_llm_error,
+    unique_sources,
+)
+from .context_packer import ScoredRow, pack_context
+from .llm_client import get_llm_manager
+from .rag_shared import COMPACT_EMBEDDING_DIM, DB_CONFIG
+from .reranker import RERANK_ENABLED, arerank
+from .synonyms import expand_synonyms
+from .tracing import annotate_trace, span
+from .vector_index import VectorIndex, get_tenant_index
+
+# =====================================================
+# LOGGING SETUP
+# =====================================================
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIG
+# =====================================================
+ASYNC_DB_POOL_MIN_SIZE = int(os.getenv("ASYNC_DB_POOL_MIN_SIZE", "2"))
+ASYNC_DB_POOL_MAX_SIZE = int(os.getenv("ASYNC_DB_POOL_MAX_SIZE", "20"))
+ASYNC_DB_COMMAND_TIMEOUT_SECONDS = float(os.getenv("ASYNC_DB_COMMAND_TIMEOUT_SECONDS", "10"))
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "2"))  # Torch releases the GIL while encoding
+KEYWORD_ROWS_PER_TERM = 3
+
+# =====================================================
+# GLOBALS
+# =====================================================
+_POOL = None
+_POOL_LOCK = None
+_EMBEDDING_EXECUTOR = ThreadPoolExecutor(max_workers=EMBEDDING_THREADS, thread_name_prefix="embed")
+
+
+async def get_db_pool() -> asyncpg.Pool:
+    """Lazily create the process-wide asyncpg pool on the serving event loop."""
+    global _POOL, _POOL_LOCK
+    if _POOL is not None:
+        return _POOL
+    if _POOL_LOCK is None:
+        _POOL_LOCK = asyncio.Lock()
+    async with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = await asyncpg.create_pool(
+                host=DB_CONFIG["host"],
+                port=int(DB_CONFIG["port"]),
+                database=DB_CONFIG["dbname"],
+                user=DB_CONFIG["user"],
+                password=DB_CONFIG["password"],
+                ssl=DB_CONFIG["sslmode"],
+                min_size=ASYNC_DB_POOL_MIN_SIZE,
+                max_size=ASYNC_DB_POOL_MAX_SIZE,
+                command_timeout=ASYNC_DB_COMMAND_TIMEOUT_SECONDS,
+            )
+            logger.info(f"Async DB pool created (max {ASYNC_DB_POOL_MAX_SIZE} connections)")
+    return _POOL
+
+
+def to_vector_literal(embedding: List[float]) -> str:
+    """Format an embedding as a pgvector text literal."""
+    return "[" + ",".join(repr(float(x)) for x in embedding) + "]"
+
+
+# =====================================================
+# RETRIEVAL
+# =====================================================
+async def aembed_query(question: str) -> List[float]:
+    """Run ``embed_query`` in the embedding thread pool (in this task's context, so it is traced)."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_EMBEDDING_EXECUTOR, context.run, embed_query, question)
+
+
+async def aget_content_version(tenant_id: str) -> Optional[int]:
+    """Async counterpart of ``get_current_content_version``."""
+    try:
+        pool = await get_db_pool()
+        with span("content_version"):
+            version = await pool.fetchval(
+                "SELECT version FROM tenant_content_versions WHERE tenant_id = $1",
+                tenant_id,
+            )
+        return version or 0
+    except Exception as e:
+        logger.warning(f"Could not read content version for tenant {tenant_id}: {e}. Skipping answer cache.")
+        return None
+
+
+async def avector_search(tenant_id: str, query_embedding: List[float]) -> List[ScoredRow]:
+    """Vector similarity search on a pooled connection."""
+    pool = await get_db_pool()
+    with span("vector_query", backend="pgvector", two_stage=TWO_STAGE_SEARCH_ENABLED) as vector_span:
+        rows = await _avector_rows(pool, tenant_id, query_embedding)
+        vector_span.set(rows=len(rows))
+    logger.info(f"Vector search returned {len(rows)} results")
+    return distances_to_scores([(r["content"], r["source"], r["distance"]) for r in rows])
+
+
+async def _avector_rows(pool: asyncpg.Pool, tenant_id: str, query_embedding: List[float]) -> list:
+    if TWO_STAGE_SEARCH_ENABLED:
+        async with pool.acquire() as conn:
+            # set_config(..., true) only lasts for this transaction
+            async with conn.transaction():
+                for name, value in hnsw_settings(TOP_K * TWO_STAGE_OVERSAMPLE):
+                    await conn.execute("SELECT set_config($1, $2, true)", name, value)
+                rows = await _atwo_stage_rows(conn, tenant_id, query_embedding)
+        if len(rows) >= TOP_K:
+            return rows
+        logger.debug(f"Two-stage search returned {len(rows)}/{TOP_K} rows; using exact search")
+    return await pool.fetch("""
+        SELECT d.content, d.source, d.embedding <=> $2::text::vector AS distance
+        FROM documents d
+        JOIN pages p ON d.page_url = p.url AND d.tenant_id = p.tenant_id
+        WHERE p.is_active = TRUE
+          AND p.tenant_id = $1
+        ORDER BY distance
+        LIMIT $3
+    """, tenant_id, to_vector_literal(query_embedding), TOP_K)
+
+
+async def _atwo_stage_rows(conn: asyncpg.Connection, tenant_id: str, query_embedding: List[float]) -> list:
+    return await conn.fetch("""
+        WITH candidates AS (
+            SELECT d.content, d.source, d.embedding
+            FROM documents d
+            JOIN pages p ON d.page_url = p.url AND d.tenant_id = p.tenant_id
+            WHERE p.is_active = TRUE
+              AND p.tenant_id = $1
+            ORDER BY d.embedding_compact <=> $2::text::halfvec
+            LIMIT $3
+        )
+        SELECT content, source, embedding <=> $4::text::vector AS distance
+        FROM candidates
+        ORDER BY distance
+        LIMIT $5
+    """, tenant_id, to_vector_literal(query_embedding[:COMPACT_EMBEDDING_DIM]),
+        TOP_K * TWO_STAGE_OVERSAMPLE, to_vector_literal(query_embedding), TOP_K)
+
+
+_KEYWORD_SQL = """
+        SELECT m.content, m.source, m.distance
+        FROM unnest($2::text[]) WITH ORDINALITY AS kw(term, ord)
+        CROSS JOIN LATERAL (
+            SELECT d.content, d.source, d.embedding <=> $4::text::vector AS distance
+            FROM documents d
+            JOIN pages p ON d.page_url = p.url AND d.tenant_id = p.tenant_id
+            WHERE p.is_active = TRUE
+              AND p.tenant_id = $1
+              AND d.content ILIKE '%' || kw.term || '%'
+            LIMIT $3
+        ) m
+        ORDER BY kw.ord
+"""
+
+
+async def akeyword_search(
+    tenant_id: str,
+    keywords: List[str],
+    query_embedding: List[float],
+) -> List[ScoredRow]:
+    """
+    Keyword fallback search in a single round trip.
+
+    Uses a LATERAL subquery per keyword so each term still contributes at
+    most ``KEYWORD_ROWS_PER_TERM`` rows, in keyword order.
+    """
+    if not keywords:
+        return []
+    pool = await get_db_pool()
+    with span("keyword_queries", backend="pgvector", keywords=len(keywords)) as keyword_span:
+        rows = await pool.fetch(_KEYWORD_SQL, tenant_id, keywords, KEYWORD_ROWS_PER_TERM,
+                                to_vector_literal(query_embedding))
+        keyword_span.set(rows=len(rows))
+    logger.info(f"Keyword search returned {len(rows)} results")
+    return distances_to_scores([(r["content"], r["source"], r["distance"]) for r in rows])
+
+
+def search_tenant_index(
+    index: VectorIndex,
+    keywords: List[str],
+    query_embedding: List[float],
+) -> Tuple[List[ScoredRow], List[ScoredRow]]:
+    """Vector and keyword search against a local tenant index."""
+    with span("vector_query", backend=index.backend) as vector_span:
+        vector_rows = index.search(query_embedding, TOP_K)
+        vector_span.set(rows=len(vector_rows))
+    with span("keyword_queries", backend=index.backend, keywords=len(keywords)) as keyword_span:
+        keyword_rows = index.keyword_search(keywords, query_embedding)
+        keyword_span.set(rows=len(keyword_rows))
+    return vector_rows, keyword_rows
+
+
+async def aretrieve_context_rows(
+    question: str,
+    tenant_id: str,
+    query_embedding: List[float],
+    content_version: Optional[int] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Hybrid retrieval with the vector and keyword searches running concurrently,
+    optionally reranked before packing. Small tenants are searched in process
+    when CHATBOT_VECTOR_BACKEND=memory.
+
+    Raises:
+        DatabaseError: If either search fails
+    """
+    # Compiled synonym matchers and tenant indexes are cached; a miss loads
+    # them with psycopg2, so keep it off the event loop.
+    loop = asyncio.get_running_loop()
+    with span("expand") as expand_span:
+        synonyms = await loop.run_in_executor(
+            None, contextvars.copy_context().run, expand_synonyms, tenant_id, question
+        )
+        expand_span.set(terms=len(synonyms))
+    keywords = extract_query_keywords(question, synonyms)
+
+    index = await loop.run_in_executor(None, get_tenant_index, tenant_id, content_version)
+    try:
+        if index is not None:
+            vector_rows, keyword_rows = await loop.run_in_executor(
+                None, contextvars.copy_context().run, search_tenant_index, index, keywords, query_embedding
+            )
+        else:
+            vector_rows, keyword_rows = await asyncio.gather(
+                avector_search(tenant_id, query_embedding),
+                akeyword_search(tenant_id, keywords, query_embedding),
+            )
+    except Exception as e:
+        logger.error(f"Database query failed: {e}")
+        raise DatabaseError(f"Failed to retrieve context from database: {e}")
+
+    with span("dedupe_pack", candidates=len(vector_rows) + len(keyword_rows)) as pack_span:
+        unique_rows = dedupe_rows(vector_rows, keyword_rows)
+        pack_span.set(unique=len(unique_rows))
+        if RERANK_ENABLED:
+            with span("rerank", candidates=len(unique_rows)):
+                unique_rows = await arerank(question, unique_rows)
+        return pack_context(unique_rows, question_token_budget(question))
+
+
+# =====================================================
+# LLM INTERACTION
+# =====================================================
+async def aask_llm(question: str, context_chunks: List[str]) -> str:
+    """Async counterpart of ``chatbot_service.ask_llm``."""
+    ensure_llm_configured()
+
+    if not context_chunks:
+        logger.warning("No context available for question")
+        return NO_CONTEXT_ANSWER
+
+    try:
+        with span("llm") as llm_span:
+            completion = await get_llm_manager().acomplete(
+                messages=[{"role": "user", "content": build_prompt(question, context_chunks)}],
+                max_tokens=MAX_COMPLETION_TOKENS,
+                temperature=LLM_TEMPERATURE,
+            )
+            llm_span.set(
+                model=completion.model,
+                prompt_tokens=completion.prompt_tokens,
+                completion_tokens=completion.completion_tokens,
+            )
+        logger.info(f"LLM response generated successfully by {completion.model} ({len(completion.text)} chars)")
+        return completion.text
+    except Exception as e:
+        raise to_llm_error(e)
+
+
+# =====================================================
+# MAIN PUBLIC API
+# =====================================================
+async def aget_chatbot_response(question: str, tenant_id: str) -> Tuple[str, Optional[str]]:
+    """
+    Async entry point for chatbot queries.
+
+    Same contract as ``get_chatbot_response``: returns (answer, None) on
+    success or (fallback_message, error_description) on failure.
+    """
+    try:
+        logger.info(f"Processing async chatbot query for tenant: {tenant_id}")
+
+        if not question or not question.strip():
+            logger.warning("Empty question received")
+            return ("Please provide a question.", "Empty question")
+
+        if not tenant_id or not tenant_id.strip():
+            logger.warning("Empty tenant_id received")
+            return ("Invalid request: tenant_id is required.", "Missing tenant_id")
+
+        question = question.strip()
+        tenant_id = tenant_id.strip()
+
+        # Embedding (thread pool) and cache version (DB) are independent
+        if SEMANTIC_CACHE_ENABLED:
+            query_embedding, content_version = await asyncio.gather(
+                aembed_query(question),
+                aget_content_version(tenant_id),
+            )
+        else:
+            query_embedding, content_version = await aembed_query(question), None
+
+        if content_version is not None:
+            with span("cache_lookup", content_version=content_version) as cache_span:
+                cached_answer = get_answer_cache().lookup(tenant_id, query_embedding, content_version)
+                cache_span.set(hit=cached_answer is not None)
+            if cached_answer is not None:
+                logger.info(f"Answered from semantic cache for tenant: {tenant_id}")
+                annotate_trace(cached=True)
+                return (cached_answer.text, None)
+
+        context_rows = await aretrieve_context_rows(question, tenant_id, query_embedding, content_version)
+        context = [format_context_entry(text, src) for text, src in context_rows]
+
+        answer = await aask_llm(question, context)
+
+        if content_version is not None and context:
+            get_answer_cache().store(tenant_id, query_embedding, answer, content_version, unique_sources(context_rows))
+
+        return (answer, None)
+
+    except Exception as e:
+        return describe_error(e)
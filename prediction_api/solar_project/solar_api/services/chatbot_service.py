@@ -5,12 +5,32 @@ logging, and performance optimizations.
 import logging
 import os
 import re
-from typing import List, Tuple, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, NamedTuple, Tuple, Optional
 
-from groq import Groq
+import numpy as np
 from groq import APIError, RateLimitError, APIConnectionError
 
-from .rag_shared import get_embedder, get_db_connection
+from .llm_client import LLMCapacityError, LLMNotConfiguredError, get_llm_manager
+from .rag_shared import (
+    COMPACT_EMBEDDING_DIM,
+    encode_texts,
+    get_db_connection,
+    get_tenant_content_version,
+)
+from .context_packer import (
+    ScoredRow,
+    context_token_budget,
+    count_tokens,
+    format_context_entry,
+    pack_context,
+)
+from .reranker import RERANK_ENABLED, rerank
+from .synonyms import expand_synonyms
+from .tracing import Trace, annotate_trace, span
+from .vector_index import KEYWORD_ROWS_PER_TERM, VectorIndex, get_tenant_index
 
 # =====================================================
 # LOGGING SETUP
@@ -21,10 +41,32 @@ logger = logging.getLogger(__name__)
 # CONFIG
 # =====================================================
 TOP_K = 15
-MAX_CONTEXT_CHARS = 3500
+# Two-stage vector search: coarse top-(TOP_K * oversample) on the compact
+# halfvec column, then exact re-scoring on the full vectors. Requires
+# migration 0003 and backfill_compact_embeddings.
+TWO_STAGE_SEARCH_ENABLED = os.getenv("CHATBOT_TWO_STAGE_SEARCH", "false").lower() == "true"
+TWO_STAGE_OVERSAMPLE = int(os.getenv("CHATBOT_TWO_STAGE_OVERSAMPLE", "4"))
+# hnsw.ef_search for the coarse stage; raised to the candidate count if lower
+# (pgvector's default of 40 returns at most 40 rows, before the tenant filter)
+HNSW_EF_SEARCH = int(os.getenv("CHATBOT_HNSW_EF_SEARCH", "100"))
+HNSW_EF_SEARCH_MAX = 1000  # pgvector's upper limit
+# pgvector >= 0.8 only: keep scanning the index until enough rows pass the
+# tenant filter (off | relaxed_order | strict_order)
+HNSW_ITERATIVE_SCAN = os.getenv("CHATBOT_HNSW_ITERATIVE_SCAN", "off").lower()
 MAX_COMPLETION_TOKENS = 300
+LLM_TEMPERATURE = 0.2  # Low temperature for factual responses
+NO_CONTEXT_ANSWER = "I don't have enough information to answer that question based on the available knowledge base."
+MAX_SYNONYM_KEYWORDS = 4  # Synonym terms added to the keyword search
 EMBEDDING_BATCH_SIZE = 32  # Process embeddings in batches to avoid memory issues
 
+# Semantic answer cache: reuse an answer when a new question is this close
+# (cosine similarity) to one already answered for the same tenant content.
+SEMANTIC_CACHE_ENABLED = os.getenv("CHATBOT_SEMANTIC_CACHE", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("CHATBOT_SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("CHATBOT_SEMANTIC_CACHE_MAX_ENTRIES", "256"))  # Per tenant
+SEMANTIC_CACHE_MAX_TENANTS = int(os.getenv("CHATBOT_SEMANTIC_CACHE_MAX_TENANTS", "100"))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("CHATBOT_SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+
 # =====================================================
 # CUSTOM EXCEPTIONS
 # =====================================================
@@ -54,84 +96,218 @@ class DatabaseError(ChatbotServiceError):
 
 
 # =====================================================
-# SYNONYM EXPANSION
+# SEMANTIC ANSWER CACHE
 # =====================================================
-SYNONYM_GROUPS = {
-    # Contact information
-    "phone": ["phone", "telephone", "mobile", "contact number", "phone number", "cell", "call"],
-    "email": ["email", "e-mail", "mail", "email address"],
-    "address": ["address", "location", "office", "office address", "place", "where"],
-    "contact": ["contact", "reach", "get in touch", "phone", "email"],
+class CachedAnswer(NamedTuple):
+    """A cached answer and the sources it was grounded in."""
+    text: str
+    sources: List[str]
+
+
+class SemanticAnswerCache:
+    """
+    Per-tenant, in-process cache of recent answers keyed by query embedding.
+    
+    A lookup hits when a stored question's embedding has cosine similarity
+    >= ``threshold`` with the new one AND the entry was produced from the
+    tenant's current content version. Any version change drops the tenant's
+    entries, so answers never outlive the knowledge base they came from.
+    
+    Embeddings are L2-normalized, so cosine similarity is a dot product.
+    """
     
-    # Time related
-    "hours": ["hours", "timing", "time", "schedule", "open", "close", "working hours"],
-    "appointment": ["appointment", "booking", "schedule", "reservation"],
+    def __init__(self, threshold: float, max_entries: int, max_tenants: int, ttl_seconds: int):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_tenants = max_tenants
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # tenant_id -> {"version": int, "entries": OrderedDict[key -> (vector, CachedAnswer, stored_at)]}
+        self._tenants: "OrderedDict[str, dict]" = OrderedDict()
+        self._next_key = 0
+    
+    def lookup(self, tenant_id: str, embedding: List[float], version: int) -> Optional[CachedAnswer]:
+        """Return the cached answer (with its sources) for a semantically equivalent question, or None."""
+        query = np.asarray(embedding, dtype=np.float32)
+        now = time.monotonic()
+        
+        with self._lock:
+            bucket = self._tenants.get(tenant_id)
+            if bucket is None:
+                return None
+            if bucket["version"] != version:
+                # Knowledge base changed since these answers were generated
+                del self._tenants[tenant_id]
+                return None
+            
+            entries = bucket["entries"]
+            expired = [k for k, (_, _, stored_at) in entries.items()
+                       if now - stored_at > self.ttl_seconds]
+            for k in expired:
+                del entries[k]
+            if not entries:
+                return None
+            
+            keys = list(entries.keys())
+            matrix = np.stack([entries[k][0] for k in keys])
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            
+            key = keys[best]
+            entries.move_to_end(key)
+            self._tenants.move_to_end(tenant_id)
+            logger.debug(f"Semantic cache hit for tenant {tenant_id} (similarity {scores[best]:.3f})")
+            return entries[key][1]
+    
+    def store(
+        self,
+        tenant_id: str,
+        embedding: List[float],
+        answer: str,
+        version: int,
+        sources: Optional[List[str]] = None,
+    ) -> None:
+        """Remember an answer and its sources for the given query embedding and content version."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        
+        with self._lock:
+            bucket = self._tenants.get(tenant_id)
+            if bucket is None or bucket["version"] != version:
+                bucket = {"version": version, "entries": OrderedDict()}
+                self._tenants[tenant_id] = bucket
+            self._tenants.move_to_end(tenant_id)
+            
+            self._next_key += 1
+            bucket["entries"][self._next_key] = (vector, CachedAnswer(answer, list(sources or [])), time.monotonic())
+            
+            while len(bucket["entries"]) > self.max_entries:
+                bucket["entries"].popitem(last=False)
+            while len(self._tenants) > self.max_tenants:
+                self._tenants.popitem(last=False)
     
-    # Common queries
-    "cost": ["cost", "price", "fee", "charge", "rate", "pricing"],
-    "service": ["service", "services", "offering", "offerings", "provide"],
-    "doctor": ["doctor", "physician", "dr", "specialist"],
+    def invalidate(self, tenant_id: str) -> None:
+        """Drop every cached answer for a tenant."""
+        with self._lock:
+            self._tenants.pop(tenant_id, None)
+
+
+_answer_cache = SemanticAnswerCache(
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+    max_tenants=SEMANTIC_CACHE_MAX_TENANTS,
+    ttl_seconds=SEMANTIC_CACHE_TTL_SECONDS,
+)
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """Return the process-wide semantic answer cache."""
+    return _answer_cache
+
+
+def get_current_content_version(tenant_id: str) -> Optional[int]:
+    """
+    Read the tenant's knowledge-base version for cache validation.
     
-    # General
-    "website": ["website", "site", "web", "online", "url"],
-}
+    Returns None when the version cannot be read, which disables the
+    semantic cache for this request rather than failing it.
+    """
+    try:
+        return get_tenant_content_version(tenant_id)
+    except Exception as e:
+        logger.warning(f"Could not read content version for tenant {tenant_id}: {e}. Skipping answer cache.")
+        return None
 
 
-def expand_query(question: str) -> str:
+def lookup_cached_answer(tenant_id: str, query_embedding: List[float]) -> Tuple[Optional[CachedAnswer], Optional[int]]:
     """
-    Expand the query with synonyms to improve retrieval coverage.
+    Look up a cached answer for the query.
     
-    This improves recall by including semantically related terms that might
-    appear in the knowledge base but not in the original question.
+    Returns:
+        Tuple of (cached_answer, content_version). ``content_version`` is the
+        version new answers should be stored under, or None when caching is
+        disabled or the version could not be read.
+    """
+    if not SEMANTIC_CACHE_ENABLED:
+        return (None, None)
+    
+    with span("cache_lookup") as cache_span:
+        content_version = get_current_content_version(tenant_id)
+        if content_version is None:
+            cache_span.set(skipped=True)
+            return (None, None)
+        
+        cached_answer = _answer_cache.lookup(tenant_id, query_embedding, content_version)
+        cache_span.set(hit=cached_answer is not None, content_version=content_version)
+    
+    if cached_answer is not None:
+        logger.info(f"Answered from semantic cache for tenant: {tenant_id}")
+        annotate_trace(cached=True)
+    return (cached_answer, content_version)
+
+
+# =====================================================
+# QUERY EMBEDDING
+# =====================================================
+def embed_query(question: str) -> List[float]:
+    """
+    Embed the question for vector search.
+    
+    Synonym expansion is applied to the keyword search only; appending
+    synonym lists here would pull the query vector away from the question.
     
     Args:
-        question: The original user question
+        question: User's question
         
     Returns:
-        Expanded query string with synonyms added
+        Normalized query embedding as a list of floats
+        
+    Raises:
+        EmbeddingError: If embedding generation fails
     """
     try:
-        question_lower = question.lower()
-        expanded_terms = [question]  # Always include original query
-        
-        # Check each synonym group
-        for base_term, synonyms in SYNONYM_GROUPS.items():
-            # If any synonym is in the question, add all related terms
-            for synonym in synonyms:
-                if synonym in question_lower:
-                    # Add other synonyms from this group
-                    expanded_terms.extend([s for s in synonyms if s not in question_lower])
-                    break  # Only add once per group
-        
-        # Join all terms together
-        expanded_query = " ".join(expanded_terms)
-        logger.debug(f"Expanded query from '{question}' to '{expanded_query}'")
-        return expanded_query
+        # Prefix with 'search_query:' for asymmetric search (Nomic embedding best practice)
+        with span("embed"):
+            query_embedding = encode_texts(["search_query: " + question])[0]
+        logger.debug(f"Generated embedding for query: {question[:50]}...")
+        return query_embedding.tolist()
     except Exception as e:
-        logger.warning(f"Query expansion failed: {e}. Using original question.")
-        return question
+        logger.error(f"Embedding generation failed: {e}")
+        raise EmbeddingError(f"Failed to generate query embedding: {e}")
 
 
 # =====================================================
 # RETRIEVAL
 # =====================================================
-def retrieve_context(question: str, tenant_id: str) -> List[str]:
+def retrieve_context_rows(
+    question: str,
+    tenant_id: str,
+    query_embedding: Optional[List[float]] = None,
+    content_version: Optional[int] = None,
+) -> List[Tuple[str, str]]:
     """
     Hybrid RAG retrieval with robust error handling.
     
     Strategy:
-    1. Synonym expansion for better recall
-    2. Generate query embedding
-    3. Vector similarity search (primary)
+    1. Generate query embedding
+    2. Vector similarity search (primary)
+    3. Tenant synonym expansion for better keyword recall
     4. Keyword fallback search (secondary)
     5. Merge and deduplicate results
     
+    Small tenants are searched in process when CHATBOT_VECTOR_BACKEND=memory
+    (see ``vector_index``); everyone else goes to pgvector.
+    
     Args:
         question: User's question
         tenant_id: Tenant identifier for multi-tenancy
+        query_embedding: Precomputed query embedding (computed if omitted)
+        content_version: Tenant content version if already read (validates
+            the in-memory index without another query)
         
     Returns:
-        List of context strings formatted as "[source] content"
+        List of (content, source) tuples that fit the context budget
         
     Raises:
         DatabaseError: If database operations fail
@@ -142,72 +318,43 @@ def retrieve_context(question: str, tenant_id: str) -> List[str]:
     
     try:
         # -------------------------------------------------
-        # 1️⃣ Synonym expansion
+        # 1️⃣ Query embedding
         # -------------------------------------------------
-        expanded_question = expand_query(question)
+        if query_embedding is None:
+            query_embedding = embed_query(question)
         
         # -------------------------------------------------
-        # 2️⃣ Query embedding
+        # 2️⃣ Database operations with connection management
         # -------------------------------------------------
+        index = get_tenant_index(tenant_id, content_version)
         try:
-            # Prefix with 'search_query:' for asymmetric search (Nomic embedding best practice)
-            embedder = get_embedder()
-            query_embedding = embedder.encode(
-                ["search_query: " + expanded_question],
-                normalize_embeddings=True
-            )[0]
-            query_embedding = query_embedding.tolist()
-            logger.debug(f"Generated embedding for query: {question[:50]}...")
-        except Exception as e:
-            logger.error(f"Embedding generation failed: {e}")
-            raise EmbeddingError(f"Failed to generate query embedding: {e}")
-        
-        # -------------------------------------------------
-        # 3️⃣ Database operations with connection management
-        # -------------------------------------------------
-        try:
-            conn = get_db_connection()
-            cur = conn.cursor()
+            if index is None:
+                conn = get_db_connection()
+                cur = conn.cursor()
             
             # Vector similarity search
             logger.debug(f"Executing vector search for tenant: {tenant_id}")
-            cur.execute("""
-                SELECT d.content, d.source
-                FROM documents d
-                JOIN pages p ON d.page_url = p.url
-                WHERE p.is_active = TRUE
-                  AND p.tenant_id = %s
-                ORDER BY d.embedding <=> %s::vector
-                LIMIT %s
-            """, (tenant_id, query_embedding, TOP_K))
-            
-            vector_rows = cur.fetchall()
+            with span("vector_query", backend=search_backend(index), two_stage=TWO_STAGE_SEARCH_ENABLED) as vector_span:
+                if index is not None:
+                    vector_rows = index.search(query_embedding, TOP_K)
+                else:
+                    vector_rows = vector_search(cur, tenant_id, query_embedding)
+                vector_span.set(rows=len(vector_rows))
             logger.info(f"Vector search returned {len(vector_rows)} results")
             
             # -------------------------------------------------
-            # 4️⃣ Keyword fallback search
+            # 3️⃣ Synonym expansion + 4️⃣ Keyword fallback search
             # -------------------------------------------------
-            # Extract meaningful keywords (3+ chars, alphanumeric)
-            keywords = re.findall(r'\b[a-zA-Z]{3,}\b', question.lower())
-            keywords = list(set(keywords))[:4]  # Limit to top 4 unique keywords
-            
-            keyword_rows = []
-            if keywords:
-                logger.debug(f"Executing keyword search with terms: {keywords}")
-                for kw in keywords:
-                    cur.execute("""
-                        SELECT d.content, d.source
-                        FROM documents d
-                        JOIN pages p ON d.page_url = p.url
-                        WHERE p.is_active = TRUE
-                          AND p.tenant_id = %s
-                          AND d.content ILIKE %s
-                        LIMIT 3
-                    """, (tenant_id, f"%{kw}%"))
-                    
-                    keyword_rows.extend(cur.fetchall())
-                
-                logger.info(f"Keyword search returned {len(keyword_rows)} results")
+            with span("expand") as expand_span:
+                synonyms = expand_synonyms(tenant_id, question)
+                expand_span.set(terms=len(synonyms))
+            keywords = extract_query_keywords(question, synonyms)
+            with span("keyword_queries", backend=search_backend(index), keywords=len(keywords)) as keyword_span:
+                if index is not None:
+                    keyword_rows = index.keyword_search(keywords, query_embedding)
+                else:
+                    keyword_rows = keyword_search(cur, tenant_id, keywords, query_embedding)
+                keyword_span.set(rows=len(keyword_rows))
             
         except Exception as e:
             logger.error(f"Database query failed: {e}")
@@ -219,38 +366,9 @@ def retrieve_context(question: str, tenant_id: str) -> List[str]:
                 conn.close()
         
         # -------------------------------------------------
-        # 5️⃣ Merge + deduplicate
-        # -------------------------------------------------
-        combined = vector_rows + keyword_rows
-        
-        seen = set()
-        unique_rows = []
-        
-        for text, src in combined:
-            # Use hash for deduplication (faster than string comparison)
-            h = hash(text)
-            if h not in seen:
-                seen.add(h)
-                unique_rows.append((text, src))
-        
-        logger.debug(f"Deduplicated to {len(unique_rows)} unique results")
-        
-        # -------------------------------------------------
-        # 6️⃣ Build final context with size limit
+        # 5️⃣ Merge + deduplicate (+ rerank), 6️⃣ Build final context
         # -------------------------------------------------
-        # Limit total context to avoid token limit issues
-        context = []
-        total_chars = 0
-        
-        for text, src in unique_rows:
-            entry = f"[{src}] {text}"
-            if total_chars + len(entry) > MAX_CONTEXT_CHARS:
-                break
-            context.append(entry)
-            total_chars += len(entry)
-        
-        logger.info(f"Built context with {len(context)} chunks ({total_chars} chars)")
-        return context
+        return merge_and_pack(vector_rows, keyword_rows, question)
         
     except (EmbeddingError, DatabaseError):
         # Re-raise our custom exceptions
@@ -261,9 +379,285 @@ def retrieve_context(question: str, tenant_id: str) -> List[str]:
         raise ChatbotServiceError(f"Context retrieval failed: {e}")
 
 
+def vector_search(
+    cur,
+    tenant_id: str,
+    query_embedding: List[float],
+    top_k: int = TOP_K,
+    two_stage: Optional[bool] = None,
+    oversample: int = TWO_STAGE_OVERSAMPLE,
+) -> List[ScoredRow]:
+    """
+    Nearest chunks for the query embedding, best first.
+    
+    With two-stage search enabled, candidates are found on the compact
+    halfvec column (small HNSW index, cache friendly) and re-ranked by exact
+    distance on the full vectors, so final ordering matches full precision.
+    ``hnsw.ef_search`` is raised for the transaction so the index can return
+    every coarse candidate; if the tenant filter still leaves fewer than
+    ``top_k`` rows, the exact search is used instead.
+    
+    Args:
+        cur: Open database cursor
+        tenant_id: Tenant identifier
+        query_embedding: Normalized query embedding
+        top_k: Number of rows to return
+        two_stage: Override CHATBOT_TWO_STAGE_SEARCH (used by the recall check)
+        oversample: Coarse candidates fetched per returned row
+        
+    Returns:
+        List of (content, source, cosine similarity) tuples
+    """
+    if two_stage is None:
+        two_stage = TWO_STAGE_SEARCH_ENABLED
+    
+    if not two_stage:
+        cur.execute("""
+            SELECT d.content, d.source, d.embedding <=> %s::vector AS distance
+            FROM documents d
+            JOIN pages p ON d.page_url = p.url AND d.tenant_id = p.tenant_id
+            WHERE p.is_active = TRUE
+              AND p.tenant_id = %s
+            ORDER BY distance
+            LIMIT %s
+        """, (query_embedding, tenant_id, top_k))
+        return distances_to_scores(cur.fetchall())
+    
+    # Transaction-local, like SET LOCAL, but takes bound parameters
+    for name, value in hnsw_settings(top_k * oversample):
+        cur.execute("SELECT set_config(%s, %s, true)", (name, value))
+    cur.execute("""
+        WITH candidates AS (
+            SELECT d.content, d.source, d.embedding
+            FROM documents d
+            JOIN pages p ON d.page_url = p.url AND d.tenant_id = p.tenant_id
+            WHERE p.is_active = TRUE
+              AND p.tenant_id = %s
+            ORDER BY d.embedding_compact <=> %s::halfvec
+            LIMIT %s
+        )
+        SELECT content, source, embedding <=> %s::vector AS distance
+        FROM candidates
+        ORDER BY distance
+        LIMIT %s
+    """, (
+        tenant_id,
+        query_embedding[:COMPACT_EMBEDDING_DIM],
+        top_k * oversample,
+        query_embedding,
+        top_k,
+    ))
+    rows = cur.fetchall()
+    if len(rows) < top_k:
+        # The tenant filter runs after the index scan, so a small tenant among
+        # large ones can come back short; its exact search is cheap
+        logger.debug(f"Two-stage search returned {len(rows)}/{top_k} rows; using exact search")
+        return vector_search(cur, tenant_id, query_embedding, top_k, two_stage=False)
+    return distances_to_scores(rows)
+
+
+def hnsw_settings(candidates: int) -> List[Tuple[str, str]]:
+    """``(name, value)`` pgvector settings for an HNSW scan that must return ``candidates`` rows."""
+    settings = [("hnsw.ef_search", str(min(max(HNSW_EF_SEARCH, candidates), HNSW_EF_SEARCH_MAX)))]
+    if HNSW_ITERATIVE_SCAN != "off":
+        settings.append(("hnsw.iterative_scan", HNSW_ITERATIVE_SCAN))
+    return settings
+
+
+def search_backend(index: Optional[VectorIndex]) -> str:
+    """Name of the backend serving a request, for traces."""
+    return "pgvector" if index is None else index.backend
+
+
+def distances_to_scores(rows: List[Tuple[str, str, float]]) -> List[ScoredRow]:
+    """Convert (content, source, cosine distance) rows to (content, source, similarity)."""
+    return [(content, source, 1.0 - float(distance)) for content, source, distance in rows]
+
+
+# Same query as async_chatbot_service._KEYWORD_SQL, with psycopg2 placeholders
+KEYWORD_SQL = """
+        SELECT m.content, m.source, m.distance
+        FROM unnest(%(keywords)s::text[]) WITH ORDINALITY AS kw(term, ord)
+        CROSS JOIN LATERAL (
+            SELECT d.content, d.source, d.embedding <=> %(embedding)s::vector AS distance
+            FROM documents d
+            JOIN pages p ON d.page_url = p.url AND d.tenant_id = p.tenant_id
+            WHERE p.is_active = TRUE
+              AND p.tenant_id = %(tenant_id)s
+              AND d.content ILIKE '%%' || kw.term || '%%'
+            LIMIT %(rows_per_term)s
+        ) m
+        ORDER BY kw.ord
+"""
+
+
+def keyword_search(
+    cur,
+    tenant_id: str,
+    keywords: List[str],
+    query_embedding: List[float],
+) -> List[ScoredRow]:
+    """
+    Keyword fallback search: up to 3 chunks containing each keyword.
+    
+    Rows are scored by vector similarity to the query so they can compete
+    with vector results during packing. All keywords go in one round trip
+    (a LATERAL subquery per keyword), in keyword order.
+    """
+    if not keywords:
+        return []
+    
+    logger.debug(f"Executing keyword search with terms: {keywords}")
+    cur.execute(KEYWORD_SQL, {
+        'keywords': keywords,
+        'embedding': query_embedding,
+        'tenant_id': tenant_id,
+        'rows_per_term': KEYWORD_ROWS_PER_TERM,
+    })
+    keyword_rows = distances_to_scores(cur.fetchall())
+    
+    logger.info(f"Keyword search returned {len(keyword_rows)} results")
+    return keyword_rows
+
+
+def extract_query_keywords(question: str, synonyms: Optional[List[str]] = None) -> List[str]:
+    """
+    Extract meaningful keywords (3+ chars, alphabetic) for the keyword fallback
+    search, followed by up to MAX_SYNONYM_KEYWORDS synonym expansions.
+    """
+    keywords = re.findall(r'\b[a-zA-Z]{3,}\b', question.lower())
+    keywords = list(set(keywords))[:4]  # Limit to top 4 unique keywords
+    extra = [s for s in (synonyms or []) if s not in keywords][:MAX_SYNONYM_KEYWORDS]
+    return keywords + extra
+
+
+def merge_and_pack(
+    vector_rows: List[ScoredRow],
+    keyword_rows: List[ScoredRow],
+    question: str,
+) -> List[Tuple[str, str]]:
+    """
+    Merge vector and keyword results, deduplicate, and pack the token budget.
+    
+    With reranking enabled, candidates are rescored by the cross-encoder
+    before packing.
+    
+    Args:
+        vector_rows: (content, source, score) rows from the vector search
+        keyword_rows: (content, source, score) rows from the keyword search
+        question: User's question
+        
+    Returns:
+        (content, source) rows chosen for the prompt, best first
+    """
+    with span("dedupe_pack", candidates=len(vector_rows) + len(keyword_rows)) as pack_span:
+        unique_rows = dedupe_rows(vector_rows, keyword_rows)
+        pack_span.set(unique=len(unique_rows))
+        if RERANK_ENABLED:
+            with span("rerank", candidates=len(unique_rows)):
+                unique_rows = rerank(question, unique_rows)
+        return pack_context(unique_rows, question_token_budget(question))
+
+
+def dedupe_rows(vector_rows: List[ScoredRow], keyword_rows: List[ScoredRow]) -> List[ScoredRow]:
+    """Concatenate vector then keyword rows, dropping repeated chunk texts."""
+    seen = set()
+    unique_rows = []
+    
+    for row in vector_rows + keyword_rows:
+        # Use hash for deduplication (faster than string comparison)
+        h = hash(row[0])
+        if h not in seen:
+            seen.add(h)
+            unique_rows.append(row)
+    
+    logger.debug(f"Deduplicated to {len(unique_rows)} unique results")
+    return unique_rows
+
+
+def question_token_budget(question: str) -> int:
+    """Context tokens left once the prompt template, question and answer are accounted for."""
+    return context_token_budget(count_tokens(build_prompt(question, [])), MAX_COMPLETION_TOKENS)
+
+
+def retrieve_context(
+    question: str,
+    tenant_id: str,
+    query_embedding: Optional[List[float]] = None,
+    content_version: Optional[int] = None,
+) -> List[str]:
+    """
+    Retrieve context for a question as prompt-ready strings.
+    
+    Args:
+        question: User's question
+        tenant_id: Tenant identifier for multi-tenancy
+        query_embedding: Precomputed query embedding (computed if omitted)
+        content_version: Tenant content version if already read
+        
+    Returns:
+        List of context strings formatted as "[source] content"
+    """
+    rows = retrieve_context_rows(question, tenant_id, query_embedding, content_version)
+    return [format_context_entry(text, src) for text, src in rows]
+
+
+def unique_sources(context_rows: List[Tuple[str, str]]) -> List[str]:
+    """Distinct sources of the retrieved rows, in retrieval order."""
+    return list(dict.fromkeys(src for _, src in context_rows))
+
+
 # =====================================================
 # LLM INTERACTION
 # =====================================================
+def build_prompt(question: str, context_chunks: List[str]) -> str:
+    """Build the grounded-answer prompt sent to the LLM."""
+    return f"""Answer using ONLY the context provided below.
+You may paraphrase or summarize clearly stated facts.
+If the answer cannot be found or reasonably inferred from the context, respond with:
+"I don't know based on the available information."
+
+CONTEXT:
+{chr(10).join(context_chunks)}
+
+QUESTION:
+{question}
+
+ANSWER:"""
+
+
+def ensure_llm_configured() -> None:
+    """
+    Validate that the LLM backend can be used before doing any work.
+    
+    Raises:
+        APIKeyMissingError: If GROQ_API_KEY (or other backend config) is missing
+    """
+    try:
+        get_llm_manager().ensure_configured()
+    except LLMNotConfiguredError as e:
+        logger.error(f"LLM backend is not configured: {e}")
+        raise APIKeyMissingError(str(e))
+
+
+def to_llm_error(e: Exception) -> LLMError:
+    """Translate an LLM client exception into a user-facing LLMError."""
+    if isinstance(e, LLMCapacityError):
+        logger.error(f"LLM capacity exhausted: {e}")
+        return LLMError("The AI service is busy right now. Please try again in a moment.")
+    if isinstance(e, RateLimitError):
+        logger.error(f"Groq API rate limit exceeded: {e}")
+        return LLMError("The AI service is currently rate limited. Please try again in a moment.")
+    if isinstance(e, APIConnectionError):
+        logger.error(f"Failed to connect to Groq API: {e}")
+        return LLMError("Failed to connect to AI service. Please check your internet connection.")
+    if isinstance(e, APIError):
+        logger.error(f"Groq API error: {e}")
+        return LLMError(f"AI service error: {str(e)}")
+    logger.error(f"Unexpected error calling LLM: {e}", exc_info=True)
+    return LLMError(f"Failed to generate response: {str(e)}")
+
+
 def ask_llm(question: str, context_chunks: List[str]) -> str:
     """
     Query the LLM with context using Groq API.
@@ -282,57 +676,89 @@ def ask_llm(question: str, context_chunks: List[str]) -> str:
         LLMError: If LLM API call fails
     """
     # Validate API key exists
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        logger.error("GROQ_API_KEY environment variable is not set")
-        raise APIKeyMissingError("GROQ_API_KEY environment variable is required")
+    ensure_llm_configured()
     
     # Handle empty context gracefully
     if not context_chunks:
         logger.warning("No context available for question")
-        return "I don't have enough information to answer that question based on the available knowledge base."
+        return NO_CONTEXT_ANSWER
     
     # Build prompt with clear instructions
-    prompt = f"""Answer using ONLY the context provided below.
-You may paraphrase or summarize clearly stated facts.
-If the answer cannot be found or reasonably inferred from the context, respond with:
-"I don't know based on the available information."
-
-CONTEXT:
-{chr(10).join(context_chunks)}
+    prompt = build_prompt(question, context_chunks)
+    
+    try:
+        logger.debug(f"Calling LLM for question: {question[:50]}...")
+        
+        with span("llm") as llm_span:
+            completion = get_llm_manager().complete(
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=MAX_COMPLETION_TOKENS,
+                temperature=LLM_TEMPERATURE,
+            )
+            llm_span.set(
+                model=completion.model,
+                prompt_tokens=completion.prompt_tokens,
+                completion_tokens=completion.completion_tokens,
+            )
+        
+        answer = completion.text
+        logger.info(f"LLM response generated successfully by {completion.model} ({len(answer)} chars)")
+        return answer
+        
+    except Exception as e:
+        raise to_llm_error(e)
 
-QUESTION:
-{question}
 
-ANSWER:"""
+def stream_llm(question: str, context_chunks: List[str]) -> Iterator[str]:
+    """
+    Stream answer tokens from the LLM as they are generated.
     
-    try:
-        logger.debug(f"Calling Groq API for question: {question[:50]}...")
-        client = Groq(api_key=api_key)
+    Closing the generator (e.g. when the HTTP client disconnects) closes the
+    upstream LLM stream, so generation stops and the connection is released.
+    
+    Args:
+        question: User's question
+        context_chunks: Retrieved context pieces
         
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
+    Yields:
+        Answer text deltas
+        
+    Raises:
+        APIKeyMissingError: If GROQ_API_KEY is not set
+        LLMError: If LLM API call fails
+    """
+    ensure_llm_configured()
+    
+    if not context_chunks:
+        logger.warning("No context available for question")
+        yield NO_CONTEXT_ANSWER
+        return
+    
+    prompt = build_prompt(question, context_chunks)
+    stream = None
+    
+    try:
+        logger.debug(f"Opening LLM stream for question: {question[:50]}...")
+        stream = get_llm_manager().stream(
             messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,  # Low temperature for factual responses
-            max_tokens=MAX_COMPLETION_TOKENS
+            max_tokens=MAX_COMPLETION_TOKENS,
+            temperature=LLM_TEMPERATURE,
         )
         
-        answer = response.choices[0].message.content
-        logger.info(f"LLM response generated successfully ({len(answer)} chars)")
-        return answer
-        
-    except RateLimitError as e:
-        logger.error(f"Groq API rate limit exceeded: {e}")
-        raise LLMError("The AI service is currently rate limited. Please try again in a moment.")
-    except APIConnectionError as e:
-        logger.error(f"Failed to connect to Groq API: {e}")
-        raise LLMError("Failed to connect to AI service. Please check your internet connection.")
-    except APIError as e:
-        logger.error(f"Groq API error: {e}")
-        raise LLMError(f"AI service error: {str(e)}")
+        for delta in stream:
+            yield delta
+    
+    except GeneratorExit:
+        logger.info("LLM stream cancelled by consumer")
+        raise
     except Exception as e:
-        logger.error(f"Unexpected error calling LLM: {e}", exc_info=True)
-        raise LLMError(f"Failed to generate response: {str(e)}")
+        raise to_llm_error(e)
+    finally:
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
 
 
 # =====================================================
@@ -343,9 +769,12 @@ def get_chatbot_response(question: str, tenant_id: str) -> Tuple[str, Optional[s
     Main entry point for chatbot queries.
     
     This function orchestrates the full RAG pipeline:
-    1. Retrieve relevant context from vector DB
-    2. Query LLM with context
-    3. Return answer with error handling
+    1. Embed the question
+    2. Return a cached answer if a near-identical question was already
+       answered against the tenant's current knowledge base
+    3. Retrieve relevant context from vector DB
+    4. Query LLM with context
+    5. Return answer with error handling
     
     Args:
         question: User's question
@@ -368,38 +797,156 @@ def get_chatbot_response(question: str, tenant_id: str) -> Tuple[str, Optional[s
             logger.warning("Empty tenant_id received")
             return ("Invalid request: tenant_id is required.", "Missing tenant_id")
         
+        question = question.strip()
+        tenant_id = tenant_id.strip()
+        
+        # Embed once: used both for the answer cache and vector search
+        query_embedding = embed_query(question)
+        
+        # Serve semantically equivalent questions from the answer cache
+        cached_answer, content_version = lookup_cached_answer(tenant_id, query_embedding)
+        if cached_answer is not None:
+            return (cached_answer.text, None)
+        
         # Retrieve context
-        context = retrieve_context(question.strip(), tenant_id.strip())
+        context_rows = retrieve_context_rows(question, tenant_id, query_embedding, content_version)
+        context = [format_context_entry(text, src) for text, src in context_rows]
         
         # Generate answer
-        answer = ask_llm(question.strip(), context)
+        answer = ask_llm(question, context)
+        
+        # Only cache answers that were grounded in retrieved context
+        if content_version is not None and context:
+            _answer_cache.store(tenant_id, query_embedding, answer, content_version, unique_sources(context_rows))
         
         return (answer, None)
         
-    except APIKeyMissingError as e:
+    except Exception as e:
+        return describe_error(e)
+
+
+def describe_error(e: Exception) -> Tuple[str, str]:
+    """
+    Map a pipeline exception to (user_message, error_description).
+    
+    Shared by the blocking and streaming entry points so both surface the
+    same user-friendly messages.
+    """
+    if isinstance(e, APIKeyMissingError):
         logger.error(f"API key missing: {e}")
         return (
             "The chatbot service is not properly configured. Please contact support.",
             str(e)
         )
-    except EmbeddingError as e:
+    if isinstance(e, EmbeddingError):
         logger.error(f"Embedding error: {e}")
         return (
             "Failed to process your question. Please try rephrasing it.",
             str(e)
         )
-    except DatabaseError as e:
+    if isinstance(e, DatabaseError):
         logger.error(f"Database error: {e}")
         return (
             "Failed to access the knowledge base. Please try again later.",
             str(e)
         )
-    except LLMError as e:
+    if isinstance(e, LLMError):
         logger.error(f"LLM error: {e}")
         return (str(e), str(e))
-    except Exception as e:
-        logger.error(f"Unexpected error in get_chatbot_response: {e}", exc_info=True)
-        return (
-            "An unexpected error occurred. Please try again.",
-            f"Unexpected error: {str(e)}"
+    logger.error(f"Unexpected error in chatbot pipeline: {e}", exc_info=True)
+    return (
+        "An unexpected error occurred. Please try again.",
+        f"Unexpected error: {str(e)}"
+    )
+
+
+def stream_chatbot_response(
+    question: str,
+    tenant_id: str,
+    include_trace: bool = False,
+) -> Iterator[Tuple[str, Dict]]:
+    """
+    Streaming entry point for chatbot queries.
+    
+    Runs the same pipeline as ``get_chatbot_response`` but yields events as
+    soon as they are available instead of waiting for the full completion:
+    
+    - ``("sources", {"sources": [...]})`` once retrieval finishes (or the
+      sources stored with a cached answer)
+    - ``("token", {"text": ...})`` for every LLM delta
+    - ``("done", {"cached": bool})`` after the last token
+    - ``("error", {"error": ...})`` if any stage fails (ends the stream)
+    
+    The answer is only written to the semantic cache if the stream ran to
+    completion, so cancelled requests never cache a truncated answer.
+    
+    Args:
+        question: User's question (already validated)
+        tenant_id: Tenant identifier (already validated)
+        include_trace: Add the request trace to the ``done`` payload
+        
+    Yields:
+        (event_name, payload) tuples
+    """
+    question = question.strip()
+    tenant_id = tenant_id.strip()
+    logger.info(f"Processing streaming chatbot query for tenant: {tenant_id}")
+    
+    # The trace is only made current around blocking steps, never across a
+    # yield, since the consumer may resume the generator in another context.
+    trace = Trace("chatbot.stream", tenant_id=tenant_id)
+    
+    def done(payload: Dict) -> Tuple[str, Dict]:
+        trace.finish()
+        if include_trace:
+            payload["trace"] = trace.to_dict()
+        return ("done", payload)
+    
+    try:
+        with trace.active():
+            query_embedding = embed_query(question)
+            cached_answer, content_version = lookup_cached_answer(tenant_id, query_embedding)
+        
+        if cached_answer is not None:
+            yield ("sources", {"sources": cached_answer.sources})
+            yield ("token", {"text": cached_answer.text})
+            yield done({"cached": True})
+            return
+        
+        with trace.active():
+            context_rows = retrieve_context_rows(question, tenant_id, query_embedding, content_version)
+        sources = unique_sources(context_rows)
+        yield ("sources", {"sources": sources})
+        
+        context = [format_context_entry(text, src) for text, src in context_rows]
+        parts = []
+        llm_started = time.perf_counter()
+        first_token_ms = None
+        for delta in stream_llm(question, context):
+            if first_token_ms is None:
+                first_token_ms = round((time.perf_counter() - llm_started) * 1000, 3)
+            parts.append(delta)
+            yield ("token", {"text": delta})
+        trace.add_span(
+            "llm", llm_started,
+            streamed=True,
+            deltas=len(parts),
+            first_token_ms=first_token_ms,
+            completion_tokens=count_tokens("".join(parts)),
         )
+        
+        if content_version is not None and context:
+            _answer_cache.store(tenant_id, query_embedding, "".join(parts), content_version, sources)
+        
+        yield done({"cached": False})
+    
+    except GeneratorExit:
+        logger.info(f"Streaming chatbot query cancelled for tenant: {tenant_id}")
+        trace.attributes["cancelled"] = True
+        raise
+    except Exception as e:
+        message, _ = describe_error(e)
+        trace.attributes["error"] = type(e).__name__
+        yield ("error", {"error": message})
+    finally:
+        trace.finish()
@@ -0,0 +1,228 @@
+"""
+Sentence-aware, token-bounded chunking for ingestion.
+
+``iter_chunks`` turns a stream of ``(page_number, text)`` pages into chunks
+of at most ``CHUNK_SIZE`` tokens, counted with the embedding model's own
+tokenizer, so chunk size matches what the model actually sees:
+
+- Text is split into paragraphs (blank lines, as kept by
+  ``clean_pdf_text``) and paragraphs into sentences; sentences are packed
+  greedily and a chunk only ends on a sentence boundary. A sentence longer
+  than a whole chunk is split between words.
+- Short stand-alone paragraphs that look like headings start a new chunk
+  and become the ``heading`` metadata of the chunks that follow. A heading
+  is never a chunk of its own: if the text after it does not fit next to
+  it, it is kept as metadata only.
+- Consecutive chunks share up to ``CHUNK_OVERLAP_TOKENS`` tokens of whole
+  trailing sentences (never pieces of a split sentence).
+- Each chunk records the first and last page it spans.
+
+Sentences are tokenized once, a page at a time, and only the sentences of
+the current chunk are held, so chunking is a linear-time generator.
+"""
+import logging
+import math
+import os
+import re
+import threading
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .rag_shared import CHUNK_SIZE, EMBEDDING_MODEL_NAME
+
+# =====================================================
+# LOGGING SETUP
+# =====================================================
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIG
+# =====================================================
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "40"))  # Whole sentences carried into the next chunk
+MIN_CHUNK_LENGTH = 50  # Minimum characters for a chunk to be stored
+HEADING_MAX_WORDS = 12
+HEADING_MAX_CHARS = 120
+# Fallback when the tokenizer cannot be loaded: BERT-style pre-tokens
+# (words and punctuation) times a word-piece factor
+ESTIMATED_PIECES_PER_TOKEN = 1.2
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+(?=["\'(\[]?[A-Z0-9])')
+PARAGRAPH_BOUNDARY = re.compile(r'\n\s*\n')
+PRE_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+# =====================================================
+# GLOBALS
+# =====================================================
+_TOKENIZER = None
+_TOKENIZER_LOADED = False
+_TOKENIZER_LOCK = threading.Lock()
+
+
+class Chunk(NamedTuple):
+    text: str
+    page_start: int
+    page_end: int
+    heading: Optional[str]
+    tokens: int
+
+
+class _Sentence(NamedTuple):
+    text: str
+    tokens: int
+    page: int
+    paragraph: int  # Running paragraph number, to rebuild paragraph breaks
+    piece: bool = False  # Part of a sentence split between words
+
+
+# =====================================================
+# TOKEN COUNTING
+# =====================================================
+def get_tokenizer():
+    """Lazily load the embedding model's tokenizer; None if unavailable."""
+    global _TOKENIZER, _TOKENIZER_LOADED
+    if not _TOKENIZER_LOADED:
+        with _TOKENIZER_LOCK:
+            if not _TOKENIZER_LOADED:
+                try:
+                    from transformers import AutoTokenizer
+
+                    _TOKENIZER = AutoTokenizer.from_pretrained(EMBEDDING_MODEL_NAME, trust_remote_code=True)
+                except Exception as e:
+                    logger.warning(f"Embedding tokenizer unavailable ({e}); estimating chunk tokens from words")
+                    _TOKENIZER = None
+                _TOKENIZER_LOADED = True
+    return _TOKENIZER
+
+
+def count_tokens_batch(texts: List[str]) -> List[int]:
+    """Token counts (without special tokens) for each text, in one tokenizer call."""
+    if not texts:
+        return []
+    tokenizer = get_tokenizer()
+    if tokenizer is not None:
+        try:
+            # Fast tokenizers are not safe for concurrent calls on one instance
+            with _TOKENIZER_LOCK:
+                encoded = tokenizer(texts, add_special_tokens=False)["input_ids"]
+            return [len(ids) for ids in encoded]
+        except Exception as e:
+            logger.warning(f"Tokenizer failed ({e}); estimating tokens")
+    return [math.ceil(len(PRE_TOKEN.findall(text)) * ESTIMATED_PIECES_PER_TOKEN) for text in texts]
+
+
+# =====================================================
+# SPLITTING
+# =====================================================
+def is_heading(paragraph: str) -> bool:
+    """Short stand-alone line without sentence punctuation, e.g. "4.2 Inverter Warranty"."""
+    words = paragraph.split()
+    if not words or len(words) > HEADING_MAX_WORDS or len(paragraph) > HEADING_MAX_CHARS:
+        return False
+    if paragraph[-1] in ".,;!?":
+        return False
+    return paragraph[0].isupper() or paragraph[0].isdigit()
+
+
+def split_sentences(paragraph: str) -> List[str]:
+    return [s for s in SENTENCE_BOUNDARY.split(paragraph) if s.strip()]
+
+
+def _split_long_sentence(sentence: str, max_tokens: int) -> List[Tuple[str, int]]:
+    """Split an over-long sentence between words into pieces of at most max_tokens."""
+    words = sentence.split()
+    pieces = []
+    current, current_tokens = [], 0
+    for word, tokens in zip(words, count_tokens_batch(words)):
+        if current and current_tokens + tokens > max_tokens:
+            pieces.append((" ".join(current), current_tokens))
+            current, current_tokens = [], 0
+        current.append(word)
+        current_tokens += tokens
+    if current:
+        pieces.append((" ".join(current), current_tokens))
+    return pieces
+
+
+# =====================================================
+# CHUNKING
+# =====================================================
+def iter_chunks(
+    pages: Iterable[Tuple[int, str]],
+    max_tokens: int = CHUNK_SIZE,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+) -> Iterator[Chunk]:
+    """
+    Chunk a stream of pages.
+
+    Args:
+        pages: ``(page_number, cleaned_text)`` in reading order
+        max_tokens: Upper bound on tokens per chunk
+        overlap_tokens: Upper bound on tokens repeated from the previous chunk
+
+    Yields:
+        ``Chunk`` records in document order
+    """
+    buffer: List[_Sentence] = []
+    buffer_tokens = 0
+    buffer_heading: Optional[str] = None
+    heading: Optional[str] = None
+    heading_only = False  # Buffer holds just the current section's heading
+    paragraph_no = 0
+
+    def emit() -> Chunk:
+        parts = []
+        for i, sentence in enumerate(buffer):
+            if i:
+                parts.append("\n\n" if sentence.paragraph != buffer[i - 1].paragraph else " ")
+            parts.append(sentence.text)
+        return Chunk("".join(parts), buffer[0].page, buffer[-1].page, buffer_heading, buffer_tokens)
+
+    def carry_overlap() -> None:
+        """Keep the trailing sentences that fit in the overlap (never the whole chunk)."""
+        nonlocal buffer, buffer_tokens
+        kept, kept_tokens = [], 0
+        for sentence in reversed(buffer[1:]):
+            if sentence.piece or kept_tokens + sentence.tokens > overlap_tokens:
+                break
+            kept.append(sentence)
+            kept_tokens += sentence.tokens
+        buffer = kept[::-1]
+        buffer_tokens = kept_tokens
+
+    for page_number, text in pages:
+        paragraphs = [p.strip() for p in PARAGRAPH_BOUNDARY.split(text or "") if p.strip()]
+        units = []  # (paragraph index, sentence, starts a heading section)
+        for paragraph in paragraphs:
+            paragraph_no += 1
+            if is_heading(paragraph):
+                units.append((paragraph_no, paragraph, True))
+            else:
+                units.extend((paragraph_no, sentence, False) for sentence in split_sentences(paragraph))
+
+        for (paragraph, sentence, starts_section), tokens in zip(units, count_tokens_batch([u[1] for u in units])):
+            if starts_section:
+                # A new section starts a new chunk, without overlap from the previous one
+                if buffer and not heading_only:
+                    yield emit()
+                buffer, buffer_tokens = [], 0
+                heading = sentence
+
+            pieces = _split_long_sentence(sentence, max_tokens) if tokens > max_tokens else [(sentence, tokens)]
+            for piece, piece_tokens in pieces:
+                if buffer and buffer_tokens + piece_tokens > max_tokens:
+                    if heading_only:
+                        # The heading alone would be dropped as too short; keep it as metadata
+                        buffer, buffer_tokens = [], 0
+                    else:
+                        yield emit()
+                        carry_overlap()
+                        # Overlap must leave room for the new sentence
+                        while buffer and buffer_tokens + piece_tokens > max_tokens:
+                            buffer_tokens -= buffer.pop(0).tokens
+                if not buffer:
+                    buffer_heading = heading
+                buffer.append(_Sentence(piece, piece_tokens, page_number, paragraph, len(pieces) > 1))
+                buffer_tokens += piece_tokens
+                heading_only = starts_section
+
+    if buffer and not heading_only:
+        yield emit()
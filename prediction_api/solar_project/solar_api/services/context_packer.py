@@ -0,0 +1,210 @@
+"""
+Token-aware context packing for the chatbot prompt.
+
+Retrieved chunks arrive with a relevance score (vector similarity or
+reranker score). The packer:
+
+1. counts tokens with a local tokenizer (tiktoken ``cl100k_base``, which is
+   close to the Llama 3 vocabulary; falls back to a chars/4 estimate),
+2. drops near-duplicate chunks using MinHash signatures, keeping the
+   higher-scoring copy,
+3. solves a 0/1 knapsack to pick the chunks with the highest total score
+   that fit a token budget derived from the model's context window.
+
+Scores are min-max normalized over the candidates before packing, since
+cross-encoder logits are unbounded and often negative.
+"""
+import logging
+import os
+import re
+import threading
+import zlib
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from .llm_client import CHARS_PER_TOKEN
+from .tracing import annotate
+
+# =====================================================
+# LOGGING SETUP
+# =====================================================
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIG
+# =====================================================
+TOKENIZER_ENCODING = os.getenv("CHATBOT_TOKENIZER_ENCODING", "cl100k_base")
+LLM_CONTEXT_WINDOW = int(os.getenv("LLM_CONTEXT_WINDOW", "8192"))  # Tokens the model accepts
+# Upper bound on context tokens even when the window allows more: prompt
+# tokens cost latency and per-minute quota.
+CONTEXT_MAX_TOKENS = int(os.getenv("CHATBOT_CONTEXT_MAX_TOKENS", "900"))
+CONTEXT_SAFETY_TOKENS = 64  # Headroom for tokenizer mismatch with the hosted model
+
+MINHASH_PERMUTATIONS = 64
+MINHASH_SHINGLE_WORDS = 3
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("CHATBOT_NEAR_DUPLICATE_THRESHOLD", "0.8"))  # Estimated Jaccard
+MIN_PACK_VALUE = 0.01  # Knapsack value of the lowest-scoring candidate (still worth filling leftover room)
+
+# Row shape used throughout retrieval: (content, source, score)
+ScoredRow = Tuple[str, str, float]
+
+# =====================================================
+# GLOBALS
+# =====================================================
+_ENCODING = None
+_ENCODING_LOADED = False
+_ENCODING_LOCK = threading.Lock()
+
+_MINHASH_PRIME = np.uint64((1 << 61) - 1)
+# Coefficients < 2**32 so (a * crc32 + b) stays within uint64
+_rng = np.random.default_rng(20240611)
+_MINHASH_A = _rng.integers(1, 1 << 32, MINHASH_PERMUTATIONS, dtype=np.uint64)
+_MINHASH_B = _rng.integers(0, 1 << 32, MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+# =====================================================
+# TOKEN COUNTING
+# =====================================================
+def get_encoding():
+    """Lazily load the tiktoken encoding; None if tiktoken is unavailable."""
+    global _ENCODING, _ENCODING_LOADED
+    if not _ENCODING_LOADED:
+        with _ENCODING_LOCK:
+            if not _ENCODING_LOADED:
+                try:
+                    import tiktoken
+
+                    _ENCODING = tiktoken.get_encoding(TOKENIZER_ENCODING)
+                except Exception as e:
+                    logger.warning(f"Tokenizer unavailable ({e}); estimating tokens from characters")
+                    _ENCODING = None
+                _ENCODING_LOADED = True
+    return _ENCODING
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in ``text`` (estimated if no tokenizer is available)."""
+    encoding = get_encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def context_token_budget(prompt_tokens: int, completion_tokens: int) -> int:
+    """
+    Tokens available for context chunks.
+
+    Args:
+        prompt_tokens: Tokens of the prompt template plus question, without context
+        completion_tokens: Tokens reserved for the answer
+
+    Returns:
+        min(CONTEXT_MAX_TOKENS, what is left of LLM_CONTEXT_WINDOW), never negative
+    """
+    available = LLM_CONTEXT_WINDOW - prompt_tokens - completion_tokens - CONTEXT_SAFETY_TOKENS
+    return max(0, min(CONTEXT_MAX_TOKENS, available))
+
+
+# =====================================================
+# NEAR-DUPLICATE DETECTION
+# =====================================================
+def minhash_signature(text: str) -> np.ndarray:
+    """MinHash signature over word shingles of ``text``."""
+    words = re.findall(r"\w+", text.lower())
+    shingles = {
+        " ".join(words[i:i + MINHASH_SHINGLE_WORDS])
+        for i in range(max(1, len(words) - MINHASH_SHINGLE_WORDS + 1))
+    }
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    return ((np.outer(hashes, _MINHASH_A) + _MINHASH_B) % _MINHASH_PRIME).min(axis=0)
+
+
+def drop_near_duplicates(rows: Sequence[ScoredRow], threshold: float = NEAR_DUPLICATE_THRESHOLD) -> List[ScoredRow]:
+    """
+    Remove rows whose estimated Jaccard similarity to an earlier row reaches
+    ``threshold``. Pass rows best first so the higher-scoring copy survives.
+    """
+    kept: List[ScoredRow] = []
+    signatures: List[np.ndarray] = []
+    for row in rows:
+        signature = minhash_signature(row[0])
+        if any(np.mean(signature == other) >= threshold for other in signatures):
+            continue
+        kept.append(row)
+        signatures.append(signature)
+    if len(kept) < len(rows):
+        logger.debug(f"Dropped {len(rows) - len(kept)} near-duplicate chunks")
+    return kept
+
+
+# =====================================================
+# PACKING
+# =====================================================
+def format_context_entry(text: str, source: str) -> str:
+    """Format a retrieved chunk as it appears in the LLM prompt."""
+    return f"[{source}] {text}"
+
+
+def knapsack(weights: List[int], values: List[float], capacity: int) -> List[int]:
+    """
+    0/1 knapsack: indices of the items with maximum total value whose total
+    weight is at most ``capacity``, in input order.
+    """
+    best = np.zeros(capacity + 1)
+    take = np.zeros((len(weights), capacity + 1), dtype=bool)
+
+    for i, (weight, value) in enumerate(zip(weights, values)):
+        if weight > capacity:
+            continue
+        candidate = best[:capacity + 1 - weight] + value
+        improved = candidate > best[weight:]
+        take[i, weight:] = improved
+        best[weight:] = np.where(improved, candidate, best[weight:])
+
+    chosen = []
+    remaining = capacity
+    for i in range(len(weights) - 1, -1, -1):
+        if take[i, remaining]:
+            chosen.append(i)
+            remaining -= weights[i]
+    return chosen[::-1]
+
+
+def normalize_scores(scores: Sequence[float]) -> List[float]:
+    """
+    Min-max scale scores to ``[MIN_PACK_VALUE, 1]``, keeping their order.
+
+    Works the same for cosine similarities and raw reranker logits; all
+    values are equal when the scores are.
+    """
+    if not scores:
+        return []
+    low, high = min(scores), max(scores)
+    if high <= low:
+        return [1.0] * len(scores)
+    return [MIN_PACK_VALUE + (1 - MIN_PACK_VALUE) * (score - low) / (high - low) for score in scores]
+
+
+def pack_context(rows: Sequence[ScoredRow], token_budget: int) -> List[Tuple[str, str]]:
+    """
+    Choose the chunks for the prompt.
+
+    Args:
+        rows: Deduplicated (content, source, score) candidates
+        token_budget: Tokens available for context (see ``context_token_budget``)
+
+    Returns:
+        (content, source) rows, highest score first
+    """
+    ranked = drop_near_duplicates(sorted(rows, key=lambda r: -r[2]))
+    # +1 for the newline that joins entries in the prompt
+    weights = [count_tokens(format_context_entry(text, src)) + 1 for text, src, _ in ranked]
+    values = normalize_scores([float(score) for _, _, score in ranked])
+
+    chosen = knapsack(weights, values, token_budget)
+    total_tokens = sum(weights[i] for i in chosen)
+
+    annotate(chunks=len(chosen), context_tokens=total_tokens, token_budget=token_budget)
+    logger.info(f"Built context with {len(chosen)} of {len(ranked)} chunks ({total_tokens}/{token_budget} tokens)")
+    return [(ranked[i][0], ranked[i][1]) for i in chosen]
@@ -0,0 +1,131 @@
+"""
+Content-addressed cache of document embeddings.
+
+Warranty clauses, subsidy scheme descriptions and other boilerplate recur
+across many tenants' PDFs. ``embed_documents`` looks the chunk hashes up
+in ``embedding_cache`` with one query per batch, embeds only the misses
+and stores them for the next upload, whichever tenant or source it comes
+from. Entries are keyed by ``(chunk_hash, model_version)``; changing
+``EMBEDDING_MODEL_VERSION`` starts a fresh cache. By default the version
+is the model name, suffixed with ``EMBEDDING_BACKEND`` for the quantized
+and ONNX backends, so their approximate vectors are never served to
+workers on the fp32 backend (or the other way round). Workers that embed
+through ``EMBEDDING_SERVER_URL`` should set the server's backend (or an
+explicit version) so entries are keyed by what actually produced them.
+
+The cache is best effort: if it cannot be read or written, chunks are
+embedded as if it did not exist.
+"""
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+from .rag_shared import EMBEDDING_MODEL_VERSION, chunk_hash, encode_texts, get_db_connection
+from .vector_index import parse_vector
+
+# =====================================================
+# LOGGING SETUP
+# =====================================================
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIG
+# =====================================================
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+DOCUMENT_PREFIX = "search_document: "  # Nomic task prefix for indexed text
+
+
+def open_cache_connection():
+    """Autocommit connection for cache reads and writes (None if disabled or unavailable)."""
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+    try:
+        conn = get_db_connection()
+        conn.autocommit = True
+        return conn
+    except Exception as e:
+        logger.warning(f"Embedding cache unavailable: {e}")
+        return None
+
+
+def lookup_embeddings(cur, hashes: List[str], model_version: str = EMBEDDING_MODEL_VERSION) -> Dict[str, np.ndarray]:
+    """Cached embeddings for the given chunk hashes, as ``{hash: vector}``."""
+    if not hashes:
+        return {}
+    cur.execute("""
+        SELECT chunk_hash, embedding::text
+        FROM embedding_cache
+        WHERE model_version = %s
+          AND chunk_hash = ANY(%s)
+    """, (model_version, list(set(hashes))))
+    return {row[0]: parse_vector(row[1]) for row in cur.fetchall()}
+
+
+def store_embeddings(
+    cur,
+    items: List[Tuple[str, np.ndarray]],
+    model_version: str = EMBEDDING_MODEL_VERSION,
+) -> int:
+    """Add ``(hash, vector)`` pairs to the cache; existing entries are kept. Returns rows added."""
+    if not items:
+        return 0
+    added = execute_values(
+        cur,
+        """
+        INSERT INTO embedding_cache (chunk_hash, model_version, embedding, created_at)
+        VALUES %s
+        ON CONFLICT (chunk_hash, model_version) DO NOTHING
+        RETURNING 1
+        """,
+        [(digest, model_version, vector.tolist()) for digest, vector in items],
+        template="(%s, %s, %s::vector, NOW())",
+        fetch=True,
+    )
+    return len(added)
+
+
+def embed_documents(chunks: List[str], conn=None, batch_size: int = 32) -> Tuple[np.ndarray, int]:
+    """
+    Embed chunks for indexing ("search_document: " prefix), reusing cached
+    vectors.
+
+    Args:
+        chunks: Chunk texts
+        conn: Autocommit connection for the cache; None embeds everything
+        batch_size: Encoder batch size for the misses
+
+    Returns:
+        Tuple of (float32 matrix with one row per chunk, number of cache hits)
+    """
+    if not chunks:
+        return np.zeros((0, 0), dtype=np.float32), 0
+    use_cache = EMBEDDING_CACHE_ENABLED and conn is not None
+    hashes = [chunk_hash(chunk) for chunk in chunks]
+
+    cached = {}
+    if use_cache:
+        try:
+            with conn.cursor() as cur:
+                cached = lookup_embeddings(cur, hashes)
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed ({e}); embedding all {len(chunks)} chunks")
+
+    missing = [i for i, digest in enumerate(hashes) if digest not in cached]
+    vectors: List[Optional[np.ndarray]] = [cached.get(digest) for digest in hashes]
+    if missing:
+        embeddings = encode_texts([DOCUMENT_PREFIX + chunks[i] for i in missing], batch_size=batch_size)
+        for i, embedding in zip(missing, embeddings):
+            vectors[i] = embedding
+        if use_cache:
+            try:
+                with conn.cursor() as cur:
+                    store_embeddings(cur, [(hashes[i], vectors[i]) for i in missing])
+            except Exception as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+
+    hits = len(chunks) - len(missing)
+    logger.debug(f"Embedded {len(chunks)} chunks ({hits} from cache)")
+    return np.vstack(vectors).astype(np.float32, copy=False), hits
@@ -0,0 +1,178 @@
+"""
+Local embedding server that holds a single copy of the embedding model and
+micro-batches concurrent requests.
+
+Web workers call it through ``rag_shared.encode_texts`` (set
+``EMBEDDING_SERVER_URL``); start it with ``python manage.py run_embedding_server``.
+
+Protocol:
+    POST /embed   {"texts": [...]}  ->  raw float32 matrix (row-major),
+                  shape given by the X-Embedding-Count / X-Embedding-Dim headers
+    GET  /health  ->  {"status": "ok", "model": ..., "batches": ..., "texts": ...}
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+import numpy as np
+
+from .rag_shared import EMBEDDING_MODEL_NAME, EMBEDDING_SERVER_MAX_TEXTS, get_embedder
+
+# =====================================================
+# LOGGING SETUP
+# =====================================================
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIG
+# =====================================================
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))  # Max wait to fill a batch
+EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "64"))  # Texts per forward pass
+MAX_TEXTS_PER_REQUEST = EMBEDDING_SERVER_MAX_TEXTS
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent embedding requests into shared forward passes.
+
+    Requests are queued with a Future. A single worker thread takes the first
+    pending request, keeps collecting more for up to ``window_ms`` (or until
+    ``max_batch_size`` texts are gathered), runs one ``encode`` call, and
+    resolves every Future with its slice of the result.
+    """
+
+    def __init__(self, window_ms: float = EMBEDDING_BATCH_WINDOW_MS, max_batch_size: int = EMBEDDING_MAX_BATCH_SIZE):
+        self.window_seconds = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.texts = 0
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        """Queue texts for embedding; the Future resolves to a float32 matrix."""
+        future: Future = Future()
+        self._queue.put((texts, future))
+        return future
+
+    def _collect(self) -> list:
+        pending = [self._queue.get()]
+        size = len(pending[0][0])
+        deadline = time.monotonic() + self.window_seconds
+
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _run(self) -> None:
+        embedder = get_embedder()
+        while True:
+            pending = self._collect()
+            texts = [t for item_texts, _ in pending for t in item_texts]
+            try:
+                embeddings = np.asarray(
+                    embedder.encode(texts, normalize_embeddings=True, batch_size=self.max_batch_size),
+                    dtype=np.float32,
+                )
+            except Exception as e:
+                logger.error(f"Batch embedding failed: {e}", exc_info=True)
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.texts += len(texts)
+            offset = 0
+            for item_texts, future in pending:
+                future.set_result(embeddings[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+            logger.debug(f"Embedded batch of {len(texts)} texts from {len(pending)} requests")
+
+
+class EmbeddingRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end for the shared MicroBatcher."""
+
+    batcher: MicroBatcher = None
+    protocol_version = "HTTP/1.1"  # Keep-alive for the client session
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        self._send_json(200, {
+            "status": "ok",
+            "model": EMBEDDING_MODEL_NAME,
+            "batches": self.batcher.batches,
+            "texts": self.batcher.texts,
+        })
+
+    def do_POST(self):
+        if self.path != "/embed":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            texts = json.loads(self.rfile.read(length))["texts"]
+            if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                raise ValueError("texts must be a list of strings")
+            if not texts or len(texts) > MAX_TEXTS_PER_REQUEST:
+                raise ValueError(f"texts must contain 1-{MAX_TEXTS_PER_REQUEST} items")
+        except (ValueError, KeyError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        try:
+            embeddings = self.batcher.submit(texts).result()
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+
+        body = np.ascontiguousarray(embeddings, dtype=np.float32).tobytes()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Embedding-Count", str(embeddings.shape[0]))
+        self.send_header("X-Embedding-Dim", str(embeddings.shape[1]))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("embedding-server: " + format, *args)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765) -> None:
+    """Load the model once and serve embedding requests until interrupted."""
+    logger.info(f"Loading embedding model {EMBEDDING_MODEL_NAME}")
+    get_embedder().encode(["warm up"], normalize_embeddings=True)
+
+    EmbeddingRequestHandler.batcher = MicroBatcher()
+    server = ThreadingHTTPServer((host, port), EmbeddingRequestHandler)
+    server.daemon_threads = True
+    logger.info(f"Embedding server listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
@@ -0,0 +1,130 @@
+"""
+Bounded-queue pipeline for streaming ingestion.
+
+``run_pipeline`` runs a source iterable and a chain of stages, each in its
+own thread, linked by queues of at most ``INGEST_PIPELINE_QUEUE_SIZE``
+items; the sink consumes the last queue in the calling thread (so a
+database transaction opened there stays on that thread). A stage that
+falls behind blocks the ones before it, which bounds memory, and because
+all stages run concurrently the wall-clock time approaches that of the
+slowest one.
+
+A stage is a function that takes an iterator of inputs and yields outputs:
+
+    def embed(batches):
+        for batch in batches:
+            yield encode(batch)
+
+If any stage or the sink raises, the others are cancelled and the first
+error is re-raised to the caller.
+"""
+import logging
+import os
+import queue
+import threading
+from typing import Callable, Iterable, Iterator, List, TypeVar
+
+# =====================================================
+# LOGGING SETUP
+# =====================================================
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIG
+# =====================================================
+INGEST_PIPELINE_QUEUE_SIZE = int(os.getenv("INGEST_PIPELINE_QUEUE_SIZE", "4"))  # Items buffered between stages
+POLL_SECONDS = 0.1  # How often blocked stages check for cancellation
+
+T = TypeVar("T")
+_END = object()
+
+
+class PipelineCancelled(Exception):
+    """Raised inside a stage when another stage has failed."""
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> None:
+    while True:
+        if stop.is_set():
+            raise PipelineCancelled()
+        try:
+            q.put(item, timeout=POLL_SECONDS)
+            return
+        except queue.Full:
+            continue
+
+
+def _drain(q: queue.Queue, stop: threading.Event) -> Iterator:
+    while True:
+        if stop.is_set():
+            raise PipelineCancelled()
+        try:
+            item = q.get(timeout=POLL_SECONDS)
+        except queue.Empty:
+            continue
+        if item is _END:
+            return
+        yield item
+
+
+def run_pipeline(
+    source: Iterable,
+    stages: List[Callable[[Iterator], Iterator]],
+    sink: Callable[[Iterator], T],
+    queue_size: int = INGEST_PIPELINE_QUEUE_SIZE,
+    name: str = "pipeline",
+) -> T:
+    """
+    Run ``sink(stage_n(...stage_1(source)))`` with every step concurrent.
+
+    Args:
+        source: Iterable producing the first items (iterated in a thread)
+        stages: Functions from an iterator of inputs to an iterator of outputs
+        sink: Consumes the last stage's output in the calling thread
+        queue_size: Maximum items waiting between two steps
+        name: Thread name prefix
+
+    Returns:
+        Whatever ``sink`` returns
+    """
+    stop = threading.Event()
+    errors = []
+    queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in range(len(stages) + 1)]
+
+    def run_step(produce: Callable[[], Iterable], out: queue.Queue) -> None:
+        try:
+            for item in produce():
+                _put(out, item, stop)
+            _put(out, _END, stop)
+        except PipelineCancelled:
+            pass
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    steps = [lambda: source]
+    for i, stage in enumerate(stages):
+        steps.append(lambda stage=stage, inbox=queues[i]: stage(_drain(inbox, stop)))
+
+    threads = [
+        threading.Thread(target=run_step, args=(produce, queues[i]), name=f"{name}-{i}", daemon=True)
+        for i, produce in enumerate(steps)
+    ]
+    for thread in threads:
+        thread.start()
+
+    sink_failed = False
+    try:
+        return sink(_drain(queues[-1], stop))
+    except PipelineCancelled:
+        pass  # The upstream error is re-raised below
+    except BaseException:
+        sink_failed = True
+        raise
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        if errors and not sink_failed:
+            raise errors[0]
+    raise PipelineCancelled()
@@ -0,0 +1,405 @@
+"""
+Database-backed queue for PDF (and text, Markdown, HTML) ingestion.
+
+Uploads are stored on disk and recorded as ``IngestionJob`` rows; the HTTP
+request returns as soon as the job exists. ``manage.py run_ingestion_worker``
+claims queued jobs with ``SELECT ... FOR UPDATE SKIP LOCKED`` (no external
+broker), runs the normal ``ingest_pdf`` pipeline and writes progress back to
+the row so clients can poll it. A bulk upload (several PDFs or a ZIP) is one
+job that runs ``ingest_pdf_batch`` over all of its files.
+
+- At most ``INGESTION_MAX_JOBS_PER_TENANT`` jobs run per tenant at a time,
+  enforced with a transaction-scoped advisory lock per tenant while claiming.
+- Failures are retried with exponential backoff up to ``max_attempts``;
+  content errors (unreadable or empty PDFs) fail immediately.
+- Jobs whose worker stopped sending heartbeats are put back in the queue.
+
+The web process and the workers must share the upload directory.
+"""
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+import zipfile
+from datetime import timedelta
+from pathlib import PurePosixPath
+from typing import Dict, List, Optional, Tuple
+
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from solar_api.models import IngestionJob
+
+from .pdf_ingestion_service import (
+    InsufficientContentError,
+    PDFExtractionError,
+    document_source,
+    get_extractor,
+    get_page_file_hashes,
+    ingest_pdf,
+    ingest_pdf_batch,
+    save_upload,
+)
+
+# =====================================================
+# LOGGING SETUP
+# =====================================================
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIG
+# =====================================================
+# False: ingest inline in the request, as before the queue existed
+INGESTION_QUEUE_ENABLED = os.getenv("INGESTION_QUEUE_ENABLED", "true").lower() == "true"
+INGESTION_MAX_JOBS_PER_TENANT = int(os.getenv("INGESTION_MAX_JOBS_PER_TENANT", "1"))
+INGESTION_MAX_ATTEMPTS = int(os.getenv("INGESTION_MAX_ATTEMPTS", "3"))
+INGESTION_RETRY_BASE_SECONDS = int(os.getenv("INGESTION_RETRY_BASE_SECONDS", "30"))  # Doubles per attempt
+INGESTION_STALE_SECONDS = int(os.getenv("INGESTION_STALE_SECONDS", "600"))  # No heartbeat for this long = requeue
+INGESTION_UPLOAD_DIR = "ingestion_jobs"
+PROGRESS_FLUSH_SECONDS = 1.0  # Minimum interval between progress writes
+CLAIM_CANDIDATES = 20  # Queued jobs examined per claim attempt
+# Bulk uploads: per-file cap matches the single-file endpoint
+BULK_MAX_FILES = int(os.getenv("BULK_INGEST_MAX_FILES", "100"))
+BULK_MAX_FILE_BYTES = 10 * 1024 * 1024
+BULK_MAX_TOTAL_BYTES = int(os.getenv("BULK_INGEST_MAX_TOTAL_MB", "500")) * 1024 * 1024
+BULK_MAX_ARCHIVE_ENTRIES = 10 * BULK_MAX_FILES  # Including directories and skipped members
+COPY_CHUNK_BYTES = 1024 * 1024  # ZIP members are decompressed to disk this much at a time
+
+# Errors that will not go away on retry
+NON_RETRYABLE_ERRORS = (InsufficientContentError, PDFExtractionError, FileNotFoundError, ValueError)
+
+
+# =====================================================
+# ENQUEUE / STATUS
+# =====================================================
+def enqueue_ingestion(uploaded_file, tenant_id: str) -> Optional[IngestionJob]:
+    """
+    Store an uploaded document and queue it for ingestion.
+
+    The file keeps its original name inside a per-job directory, since the
+    name becomes the document source (e.g. ``pdf://<name>``). Its SHA-256 is
+    computed while it is written; if it matches the tenant's stored copy
+    of that file, the upload is discarded and no job is created.
+
+    Returns:
+        The queued job, or None if the file is unchanged
+    """
+    job_id = uuid.uuid4()
+    file_path = default_storage.path(f"{INGESTION_UPLOAD_DIR}/{job_id}/{uploaded_file.name}")
+    try:
+        file_hash = save_upload(uploaded_file, file_path)
+    except Exception:
+        remove_upload_dir(job_id)
+        raise
+    source = document_source(uploaded_file.name)
+    if get_page_file_hashes([source], tenant_id).get(source) == file_hash:
+        logger.info(f"Upload unchanged for tenant {tenant_id} (file hash match), not queued: {uploaded_file.name}")
+        remove_upload_dir(job_id)
+        return None
+    job = IngestionJob.objects.create(
+        id=job_id,
+        tenant_id=tenant_id,
+        file_name=uploaded_file.name,
+        file_path=file_path,
+        max_attempts=INGESTION_MAX_ATTEMPTS,
+    )
+    logger.info(f"Queued ingestion job {job.id} for tenant {tenant_id}: {uploaded_file.name}")
+    return job
+
+
+def _copy_limited(src, dest_path: str, limit: int) -> int:
+    """Copy a stream to a file in chunks; raises ValueError past ``limit`` bytes."""
+    written = 0
+    with open(dest_path, 'wb') as dst:
+        while True:
+            block = src.read(COPY_CHUNK_BYTES)
+            if not block:
+                return written
+            written += len(block)
+            if written > limit:
+                raise ValueError(f"exceeds {limit // (1024 * 1024)}MB")
+            dst.write(block)
+
+
+def stage_bulk_upload(job_id: uuid.UUID, uploaded_files: List, archive=None) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Write the documents of a bulk upload into the job's upload directory.
+
+    Uploaded files are handed to the storage backend, which moves a
+    temporary upload into place (or copies it in chunks). ZIP members are
+    decompressed one at a time in COPY_CHUNK_BYTES pieces; their size is
+    checked against what is actually written, not what the archive claims.
+    Files beyond BULK_MAX_FILES or BULK_MAX_TOTAL_BYTES, unsupported types, oversized
+    files and repeated names are skipped.
+
+    The caller removes the upload directory if the job is not queued.
+
+    Returns:
+        Tuple of (accepted ``[{name, path}]``, skipped ``[{name, reason}]``)
+
+    Raises:
+        ValueError: If the archive is not a valid ZIP file or has too many entries
+    """
+    upload_dir = f"{INGESTION_UPLOAD_DIR}/{job_id}"
+    accepted, skipped = [], []
+    total_bytes = 0
+
+    def check(name: str, size: int) -> Optional[str]:
+        if get_extractor(name) is None:
+            return 'unsupported file type'
+        if size > BULK_MAX_FILE_BYTES:
+            return f'exceeds {BULK_MAX_FILE_BYTES // (1024 * 1024)}MB'
+        if any(f['name'] == name for f in accepted):
+            return 'duplicate file name'
+        if len(accepted) >= BULK_MAX_FILES:
+            return f'more than {BULK_MAX_FILES} files'
+        if total_bytes + size > BULK_MAX_TOTAL_BYTES:
+            return f'upload exceeds {BULK_MAX_TOTAL_BYTES // (1024 * 1024)}MB in total'
+        return None
+
+    for uploaded_file in uploaded_files:
+        reason = check(uploaded_file.name, uploaded_file.size)
+        if reason:
+            skipped.append({'name': uploaded_file.name, 'reason': reason})
+            continue
+        stored_name = default_storage.save(f"{upload_dir}/{uploaded_file.name}", uploaded_file)
+        accepted.append({'name': uploaded_file.name, 'path': default_storage.path(stored_name)})
+        total_bytes += uploaded_file.size
+
+    if archive is not None:
+        # A temporary upload is opened by path; a small in-memory one as is
+        source = archive.temporary_file_path() if hasattr(archive, 'temporary_file_path') else archive
+        try:
+            zf = zipfile.ZipFile(source)
+        except zipfile.BadZipFile:
+            raise ValueError(f"{archive.name} is not a valid ZIP archive")
+        with zf:
+            if len(zf.infolist()) > BULK_MAX_ARCHIVE_ENTRIES:
+                raise ValueError(f"{archive.name} has more than {BULK_MAX_ARCHIVE_ENTRIES} entries")
+            target_dir = default_storage.path(upload_dir)
+            os.makedirs(target_dir, exist_ok=True)
+            for member in zf.infolist():
+                # Only the base name is used, so members cannot escape the job directory
+                name = PurePosixPath(member.filename.replace('\\', '/')).name
+                if member.is_dir() or not name or name.startswith('.') or '__MACOSX' in member.filename:
+                    continue
+                reason = check(name, member.file_size)
+                if reason:
+                    skipped.append({'name': name, 'reason': reason})
+                    continue
+                path = os.path.join(target_dir, name)
+                try:
+                    with zf.open(member) as src:
+                        size = _copy_limited(src, path, min(BULK_MAX_FILE_BYTES, BULK_MAX_TOTAL_BYTES - total_bytes))
+                except (ValueError, RuntimeError, zipfile.BadZipFile, OSError) as e:
+                    # Oversized, encrypted or corrupt member
+                    if os.path.exists(path):
+                        os.remove(path)
+                    skipped.append({'name': name, 'reason': str(e)})
+                    continue
+                accepted.append({'name': name, 'path': path})
+                total_bytes += size
+
+    return accepted, skipped
+
+
+def enqueue_batch_ingestion(job_id: uuid.UUID, files: List[Dict], tenant_id: str) -> IngestionJob:
+    """Queue files staged by ``stage_bulk_upload`` as one batch job."""
+    job = IngestionJob.objects.create(
+        id=job_id,
+        tenant_id=tenant_id,
+        file_name=f"{len(files)} files",
+        file_path=default_storage.path(f"{INGESTION_UPLOAD_DIR}/{job_id}"),
+        files=files,
+        max_attempts=INGESTION_MAX_ATTEMPTS,
+    )
+    logger.info(f"Queued batch ingestion job {job.id} for tenant {tenant_id}: {len(files)} files")
+    return job
+
+
+def remove_upload_dir(job_id: uuid.UUID) -> None:
+    """Delete an upload's job directory (used when it is not queued)."""
+    shutil.rmtree(default_storage.path(f"{INGESTION_UPLOAD_DIR}/{job_id}"), ignore_errors=True)
+
+
+def describe_job(job: IngestionJob) -> Dict:
+    """API representation of a job."""
+    return {
+        'job_id': str(job.id),
+        'tenant_id': job.tenant_id,
+        'file_name': job.file_name,
+        'files': [f['name'] for f in job.files] or None,
+        'status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'progress': job.progress,
+        'result': job.result,
+        'error': job.error or None,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+    }
+
+
+# =====================================================
+# CLAIMING
+# =====================================================
+def _try_lock_tenant(tenant_id: str) -> bool:
+    """Advisory lock held until the claiming transaction ends."""
+    with connection.cursor() as cur:
+        cur.execute("SELECT pg_try_advisory_xact_lock(hashtext(%s))", [f"ingestion:{tenant_id}"])
+        return cur.fetchone()[0]
+
+
+def claim_next_job(worker_id: str) -> Optional[IngestionJob]:
+    """
+    Mark the oldest runnable job as running and return it (None if idle).
+
+    Rows locked by other workers are skipped. A tenant's job is only taken
+    while the tenant has fewer than INGESTION_MAX_JOBS_PER_TENANT running;
+    the per-tenant advisory lock makes that count race-free across workers.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        candidates = list(
+            IngestionJob.objects.select_for_update(skip_locked=True)
+            .filter(status=IngestionJob.STATUS_QUEUED, run_after__lte=now)
+            .order_by('created_at')[:CLAIM_CANDIDATES]
+        )
+        for job in candidates:
+            if not _try_lock_tenant(job.tenant_id):
+                continue
+            running = IngestionJob.objects.filter(
+                tenant_id=job.tenant_id, status=IngestionJob.STATUS_RUNNING
+            ).count()
+            if running >= INGESTION_MAX_JOBS_PER_TENANT:
+                continue
+
+            job.status = IngestionJob.STATUS_RUNNING
+            job.attempts += 1
+            job.worker_id = worker_id
+            job.started_at = now
+            job.heartbeat_at = now
+            job.save(update_fields=['status', 'attempts', 'worker_id', 'started_at', 'heartbeat_at'])
+            return job
+    return None
+
+
+def requeue_stale_jobs() -> int:
+    """Put running jobs whose worker stopped heartbeating back in the queue."""
+    now = timezone.now()
+    stale = IngestionJob.objects.filter(
+        status=IngestionJob.STATUS_RUNNING, heartbeat_at__lt=now - timedelta(seconds=INGESTION_STALE_SECONDS)
+    )
+    # A job that keeps killing its worker must not loop forever
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=IngestionJob.STATUS_FAILED, error='Worker stopped responding', finished_at=now
+    )
+    requeued = stale.update(status=IngestionJob.STATUS_QUEUED, worker_id='', error='Worker stopped responding')
+    if requeued or failed:
+        logger.warning(f"Stale ingestion jobs: {requeued} requeued, {failed} failed")
+    return requeued
+
+
+# =====================================================
+# RUNNING
+# =====================================================
+class JobProgress:
+    """
+    Progress callback for ``ingest_pdf`` that merges updates into the job's
+    ``progress`` and writes them (with a heartbeat) at most once per
+    PROGRESS_FLUSH_SECONDS, plus on every stage change.
+    """
+
+    def __init__(self, job: IngestionJob):
+        self.job_id = job.id
+        self.progress = {}
+        self._flushed_at = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, fields: Dict) -> None:
+        with self._lock:
+            stage_changed = 'stage' in fields and fields['stage'] != self.progress.get('stage')
+            self.progress.update(fields)
+            if stage_changed or time.monotonic() - self._flushed_at >= PROGRESS_FLUSH_SECONDS:
+                self.flush()
+
+    def flush(self) -> None:
+        IngestionJob.objects.filter(pk=self.job_id).update(progress=dict(self.progress), heartbeat_at=timezone.now())
+        self._flushed_at = time.monotonic()
+
+
+def _remove_upload(job: IngestionJob) -> None:
+    if job.files:
+        shutil.rmtree(job.file_path, ignore_errors=True)
+        return
+    try:
+        if os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        os.rmdir(os.path.dirname(job.file_path))
+    except OSError as e:
+        logger.debug(f"Could not fully remove upload for job {job.id}: {e}")
+
+
+def run_job(job: IngestionJob) -> str:
+    """
+    Run a claimed job to completion and record the outcome.
+
+    Returns:
+        The job's new status (queued again if it will be retried)
+    """
+    progress = JobProgress(job)
+    started = time.perf_counter()
+    logger.info(f"Running ingestion job {job.id} (attempt {job.attempts}/{job.max_attempts})")
+
+    try:
+        if job.files:
+            result = ingest_pdf_batch([f['path'] for f in job.files], job.tenant_id, progress=progress)
+        else:
+            result = ingest_pdf(job.file_path, job.tenant_id, progress=progress)
+    except Exception as e:
+        retry = not isinstance(e, NON_RETRYABLE_ERRORS) and job.attempts < job.max_attempts
+        job.error = f"{type(e).__name__}: {e}"
+        job.progress = {**progress.progress, 'stage': 'retrying' if retry else 'failed'}
+        if retry:
+            delay = INGESTION_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+            job.status = IngestionJob.STATUS_QUEUED
+            job.run_after = timezone.now() + timedelta(seconds=delay)
+            logger.warning(f"Ingestion job {job.id} failed ({job.error}); retrying in {delay}s")
+        else:
+            job.status = IngestionJob.STATUS_FAILED
+            job.finished_at = timezone.now()
+            logger.error(f"Ingestion job {job.id} failed permanently: {job.error}")
+            _remove_upload(job)
+        job.save(update_fields=['status', 'error', 'progress', 'run_after', 'finished_at'])
+        return job.status
+
+    # Drop non-JSON values (PDF metadata may hold library objects)
+    for document in [result, *result.get('documents', [])]:
+        if 'metadata' in document:
+            document['metadata'] = {
+                k: v if isinstance(v, (str, int, float, bool, type(None))) else str(v)
+                for k, v in (document.get('metadata') or {}).items()
+            }
+    job.status = IngestionJob.STATUS_SUCCEEDED
+    job.result = result
+    job.error = ''
+    job.progress = {**progress.progress, 'stage': 'done'}
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'progress', 'finished_at'])
+    _remove_upload(job)
+
+    logger.info(
+        f"Ingestion job {job.id} {result.get('status')} in {time.perf_counter() - started:.1f}s "
+        f"({result.get('chunks_inserted', 0)} chunks inserted)"
+    )
+    return job.status
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
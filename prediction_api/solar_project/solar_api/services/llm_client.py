@@ -0,0 +1,550 @@
+"""
+Process-level LLM client manager with connection reuse, concurrency
+limits, provider-quota rate limiting and model fallback.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+import httpx
+from groq import AsyncGroq, Groq, RateLimitError
+
+# =====================================================
+# LOGGING SETUP
+# =====================================================
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIG
+# =====================================================
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")  # "groq" or "stub" (local, no network)
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+LLM_FALLBACK_MODEL = os.getenv("LLM_FALLBACK_MODEL", "llama-3.1-8b-instant")  # Empty to disable
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))  # In-flight requests per process
+LLM_ACQUIRE_TIMEOUT_SECONDS = float(os.getenv("LLM_ACQUIRE_TIMEOUT_SECONDS", "10"))
+LLM_SLOT_POLL_SECONDS = 0.05  # Async callers poll the shared slot semaphore at this interval
+
+# Provider quota, applied per model (Groq limits are per model)
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "12000"))
+
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "10"))
+LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS", "60"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1"))
+
+CHARS_PER_TOKEN = 4  # Rough estimate used to charge the token bucket before a call
+
+# =====================================================
+# CUSTOM EXCEPTIONS
+# =====================================================
+class LLMClientError(Exception):
+    """Base exception for LLM client manager errors."""
+    pass
+
+
+class LLMNotConfiguredError(LLMClientError):
+    """Raised when the LLM backend is missing required configuration."""
+    pass
+
+
+class LLMCapacityError(LLMClientError):
+    """Raised when no concurrency slot or rate budget frees up in time."""
+    pass
+
+
+class LLMCompletion(NamedTuple):
+    """Result of a non-streaming completion."""
+    text: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+
+
+# =====================================================
+# RATE LIMITING
+# =====================================================
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    ``reserve`` debits immediately (the balance may go negative) and returns
+    how long the caller must wait before proceeding, so the same bucket can
+    be used from threads (``time.sleep``) and coroutines (``asyncio.sleep``).
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Debit ``amount`` and return the number of seconds to wait."""
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.refill_per_second
+
+    def refund(self, amount: float) -> None:
+        """Return previously reserved tokens (e.g. a reservation that was abandoned)."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + float(amount))
+
+
+class ModelQuota:
+    """Requests-per-minute and tokens-per-minute buckets for one model."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+
+    def reserve(self, estimated_tokens: int) -> float:
+        """Reserve one request and ``estimated_tokens``; return the wait in seconds."""
+        return max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+
+    def refund(self, estimated_tokens: int) -> None:
+        self.requests.refund(1)
+        self.tokens.refund(estimated_tokens)
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the token bucket once the real usage is known."""
+        difference = estimated_tokens - actual_tokens
+        if difference > 0:
+            self.tokens.refund(difference)
+        elif difference < 0:
+            self.tokens.reserve(-difference)
+
+
+def estimate_tokens(messages: List[Dict], max_tokens: int) -> int:
+    """Upper-bound token cost of a request for rate limiting purposes."""
+    prompt_chars = sum(len(m.get("content", "")) for m in messages)
+    return prompt_chars // CHARS_PER_TOKEN + max_tokens
+
+
+# =====================================================
+# BACKENDS
+# =====================================================
+class GroqDeltaStream:
+    """
+    Text deltas of a Groq completion stream; ``close()`` releases the HTTP connection.
+
+    ``usage`` holds the token usage Groq reports in the final chunk, once read.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._chunks = iter(stream)
+        self.usage = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        while True:
+            chunk = next(self._chunks)
+            usage = getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None)
+            if usage:
+                self.usage = usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                return chunk.choices[0].delta.content
+
+    def close(self) -> None:
+        self._stream.close()
+
+
+class GroqBackend:
+    """Groq backend sharing one pooled, keep-alive HTTP client per process."""
+
+    def __init__(self):
+        api_key = os.getenv("GROQ_API_KEY")
+        if not api_key:
+            raise LLMNotConfiguredError("GROQ_API_KEY environment variable is required")
+
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            timeout=LLM_TIMEOUT_SECONDS,
+        )
+        self.client = Groq(
+            api_key=api_key,
+            http_client=self.http_client,
+            max_retries=LLM_MAX_RETRIES,
+        )
+        self._api_key = api_key
+        self._async_client = None
+
+    @property
+    def async_client(self) -> AsyncGroq:
+        """AsyncGroq client on its own pooled connection, created on first async use."""
+        if self._async_client is None:
+            self._async_client = AsyncGroq(
+                api_key=self._api_key,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+                        keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+                    ),
+                    timeout=LLM_TIMEOUT_SECONDS,
+                ),
+                max_retries=LLM_MAX_RETRIES,
+            )
+        return self._async_client
+
+    def complete(self, model: str, messages: List[Dict], max_tokens: int, temperature: float) -> LLMCompletion:
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        usage = response.usage
+        return LLMCompletion(
+            text=response.choices[0].message.content,
+            model=model,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+        )
+
+    def stream(self, model: str, messages: List[Dict], max_tokens: int, temperature: float) -> Iterator[str]:
+        # Open the stream eagerly so RateLimitError surfaces before the first token
+        stream = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+        )
+        return GroqDeltaStream(stream)
+
+    async def acomplete(self, model: str, messages: List[Dict], max_tokens: int, temperature: float) -> LLMCompletion:
+        response = await self.async_client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        usage = response.usage
+        return LLMCompletion(
+            text=response.choices[0].message.content,
+            model=model,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+        )
+
+    def close(self) -> None:
+        self.http_client.close()
+
+
+class StubBackend:
+    """
+    Local, deterministic backend for tests and offline development.
+
+    Answers with the first context line of the prompt so callers can assert
+    on grounded output without network access or an API key.
+    """
+
+    def complete(self, model: str, messages: List[Dict], max_tokens: int, temperature: float) -> LLMCompletion:
+        text = self._answer(messages)
+        prompt_chars = sum(len(m.get("content", "")) for m in messages)
+        return LLMCompletion(
+            text=text,
+            model=f"stub:{model}",
+            prompt_tokens=prompt_chars // CHARS_PER_TOKEN,
+            completion_tokens=len(text) // CHARS_PER_TOKEN,
+        )
+
+    async def acomplete(self, model: str, messages: List[Dict], max_tokens: int, temperature: float) -> LLMCompletion:
+        return self.complete(model, messages, max_tokens, temperature)
+
+    def stream(self, model: str, messages: List[Dict], max_tokens: int, temperature: float) -> Iterator[str]:
+        words = self._answer(messages).split(" ")
+        return (word if i == 0 else " " + word for i, word in enumerate(words))
+
+    @staticmethod
+    def _answer(messages: List[Dict]) -> str:
+        prompt = messages[-1].get("content", "") if messages else ""
+        marker = "CONTEXT:\n"
+        if marker in prompt:
+            first_line = prompt.split(marker, 1)[1].split("\n", 1)[0].strip()
+            if first_line:
+                return f"Based on the available information: {first_line}"
+        return "I don't know based on the available information."
+
+    def close(self) -> None:
+        pass
+
+
+BACKENDS = {
+    "groq": GroqBackend,
+    "stub": StubBackend,
+}
+
+
+# =====================================================
+# CLIENT MANAGER
+# =====================================================
+class SlotStream:
+    """
+    Iterator over streamed deltas that owns a concurrency slot.
+
+    The slot is released exactly once: when the deltas are exhausted, when
+    the consumer calls ``close()`` (client disconnect), or on garbage
+    collection if the stream was never consumed. At the same point the
+    model's token bucket is settled against the real usage: the backend's
+    reported ``usage`` if it has one, otherwise the prompt estimate plus
+    the streamed characters.
+    """
+
+    def __init__(
+        self,
+        deltas: Iterator[str],
+        slots: threading.BoundedSemaphore,
+        quota: Optional[ModelQuota] = None,
+        estimated_tokens: int = 0,
+        prompt_tokens: int = 0,
+    ):
+        self._deltas = deltas
+        self._slots = slots
+        self._quota = quota
+        self._estimated_tokens = estimated_tokens
+        self._prompt_tokens = prompt_tokens
+        self._completion_chars = 0
+        self._released = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        try:
+            delta = next(self._deltas)
+        except BaseException:
+            self.close()
+            raise
+        self._completion_chars += len(delta)
+        return delta
+
+    def _settle(self) -> None:
+        if self._quota is None:
+            return
+        usage = getattr(self._deltas, "usage", None)
+        if usage:
+            actual = usage.prompt_tokens + usage.completion_tokens
+        else:
+            actual = self._prompt_tokens + self._completion_chars // CHARS_PER_TOKEN
+        self._quota.settle(self._estimated_tokens, actual)
+
+    def close(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        try:
+            close = getattr(self._deltas, "close", None)
+            if close:
+                close()
+        finally:
+            self._slots.release()
+            self._settle()
+
+    def __del__(self):
+        self.close()
+
+
+class LLMClientManager:
+    """
+    Shared entry point for LLM calls within a process.
+
+    - One backend (and therefore one HTTP connection pool) per process
+    - A semaphore caps in-flight requests
+    - Per-model token buckets keep traffic within the provider quota
+    - On ``RateLimitError`` the request falls back to the next model
+    """
+
+    def __init__(self, backend_name: str = LLM_BACKEND, models: Optional[List[str]] = None):
+        if backend_name not in BACKENDS:
+            raise LLMNotConfiguredError(f"Unknown LLM_BACKEND '{backend_name}' (expected one of {sorted(BACKENDS)})")
+        self.backend_name = backend_name
+        self.models = models or [m for m in (LLM_MODEL, LLM_FALLBACK_MODEL) if m]
+        self._backend = None
+        self._backend_lock = threading.Lock()
+        # One limit for sync and async callers alike (async callers poll it, see _aacquire_slot)
+        self._slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+        self._quotas = {
+            model: ModelQuota(LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE)
+            for model in self.models
+        }
+
+    @property
+    def backend(self):
+        """Backend instance, created on first use."""
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    logger.info(f"Initializing LLM backend: {self.backend_name}")
+                    self._backend = BACKENDS[self.backend_name]()
+        return self._backend
+
+    def ensure_configured(self) -> None:
+        """Raise LLMNotConfiguredError early if the backend cannot be created."""
+        _ = self.backend
+
+    def _acquire_quota(self, model: str, estimated_tokens: int) -> None:
+        quota = self._quotas[model]
+        wait = quota.reserve(estimated_tokens)
+        if wait > LLM_ACQUIRE_TIMEOUT_SECONDS:
+            quota.refund(estimated_tokens)
+            raise LLMCapacityError(f"Rate budget for {model} exhausted (next slot in {wait:.1f}s)")
+        if wait > 0:
+            logger.debug(f"Rate limiting {model}: waiting {wait:.2f}s")
+            time.sleep(wait)
+
+    def _acquire_slot(self, model: str, estimated_tokens: int) -> None:
+        """Take a concurrency slot; without one, refund the quota reserved for the request."""
+        if not self._slots.acquire(timeout=LLM_ACQUIRE_TIMEOUT_SECONDS):
+            self._quotas[model].refund(estimated_tokens)
+            raise LLMCapacityError("Too many concurrent LLM requests")
+
+    async def _aacquire_quota(self, model: str, estimated_tokens: int) -> None:
+        quota = self._quotas[model]
+        wait = quota.reserve(estimated_tokens)
+        if wait > LLM_ACQUIRE_TIMEOUT_SECONDS:
+            quota.refund(estimated_tokens)
+            raise LLMCapacityError(f"Rate budget for {model} exhausted (next slot in {wait:.1f}s)")
+        if wait > 0:
+            logger.debug(f"Rate limiting {model}: waiting {wait:.2f}s")
+            await asyncio.sleep(wait)
+
+    async def _aacquire_slot(self, model: str, estimated_tokens: int) -> None:
+        """
+        Take a slot from the semaphore shared with the sync path.
+
+        The semaphore is polled without blocking so the event loop keeps
+        running, and it is not tied to any loop; the caller releases it with
+        ``self._slots.release()``.
+        """
+        deadline = time.monotonic() + LLM_ACQUIRE_TIMEOUT_SECONDS
+        while not self._slots.acquire(blocking=False):
+            if time.monotonic() >= deadline:
+                self._quotas[model].refund(estimated_tokens)
+                raise LLMCapacityError("Too many concurrent LLM requests")
+            await asyncio.sleep(LLM_SLOT_POLL_SECONDS)
+
+    def complete(self, messages: List[Dict], max_tokens: int, temperature: float) -> LLMCompletion:
+        """
+        Run a chat completion, falling back to the next model when rate limited.
+
+        Raises:
+            LLMNotConfiguredError: If the backend is not configured
+            LLMCapacityError: If no slot or rate budget is available in time
+            groq.APIError: For provider errors (after fallbacks are exhausted)
+        """
+        backend = self.backend
+        estimated = estimate_tokens(messages, max_tokens)
+
+        for attempt, model in enumerate(self.models):
+            self._acquire_quota(model, estimated)
+            self._acquire_slot(model, estimated)
+            try:
+                result = backend.complete(model, messages, max_tokens, temperature)
+                self._quotas[model].settle(estimated, result.prompt_tokens + result.completion_tokens)
+                return result
+            except RateLimitError:
+                if attempt == len(self.models) - 1:
+                    raise
+                logger.warning(f"Rate limited on {model}, falling back to {self.models[attempt + 1]}")
+            finally:
+                self._slots.release()
+
+    async def acomplete(self, messages: List[Dict], max_tokens: int, temperature: float) -> LLMCompletion:
+        """
+        Async variant of ``complete`` for the ASGI pipeline.
+
+        Shares the concurrency slots and per-model quotas with the sync path;
+        waiting for either never blocks the event loop.
+        """
+        backend = self.backend
+        estimated = estimate_tokens(messages, max_tokens)
+
+        for attempt, model in enumerate(self.models):
+            await self._aacquire_quota(model, estimated)
+            await self._aacquire_slot(model, estimated)
+            try:
+                result = await backend.acomplete(model, messages, max_tokens, temperature)
+                self._quotas[model].settle(estimated, result.prompt_tokens + result.completion_tokens)
+                return result
+            except RateLimitError:
+                if attempt == len(self.models) - 1:
+                    raise
+                logger.warning(f"Rate limited on {model}, falling back to {self.models[attempt + 1]}")
+            finally:
+                self._slots.release()
+
+    def stream(self, messages: List[Dict], max_tokens: int, temperature: float) -> Iterator[str]:
+        """
+        Stream a chat completion as text deltas.
+
+        Fallback applies only while opening the stream; once tokens flow the
+        model is fixed. The concurrency slot is held until the stream is
+        exhausted or closed by the consumer, and the quota is settled then.
+        """
+        backend = self.backend
+        estimated = estimate_tokens(messages, max_tokens)
+
+        for attempt, model in enumerate(self.models):
+            self._acquire_quota(model, estimated)
+            self._acquire_slot(model, estimated)
+            try:
+                deltas = backend.stream(model, messages, max_tokens, temperature)
+            except RateLimitError:
+                self._slots.release()
+                if attempt == len(self.models) - 1:
+                    raise
+                logger.warning(f"Rate limited on {model}, falling back to {self.models[attempt + 1]}")
+                continue
+            except Exception:
+                self._slots.release()
+                raise
+            return SlotStream(deltas, self._slots, self._quotas[model], estimated, estimated - max_tokens)
+
+    def close(self) -> None:
+        """Close the backend's connection pool."""
+        with self._backend_lock:
+            if self._backend is not None:
+                self._backend.close()
+                self._backend = None
+
+
+# =====================================================
+# GLOBALS
+# =====================================================
+_MANAGER = None
+_MANAGER_LOCK = threading.Lock()
+
+
+def get_llm_manager() -> LLMClientManager:
+    """Return the process-wide LLM client manager."""
+    global _MANAGER
+    if _MANAGER is None:
+        with _MANAGER_LOCK:
+            if _MANAGER is None:
+                _MANAGER = LLMClientManager()
+    return _MANAGER
@@ -0,0 +1,287 @@
+"""
+Page-parallel PDF text extraction.
+
+Pages are split into ranges of ``PDF_EXTRACT_PAGES_PER_TASK``; each task
+opens the file, extracts its pages and cleans them with ``clean_pdf_text``.
+Results come back in page order, either as a list the caller joins once
+with ``"\\n\\n".join`` (``extract_pages``) or streamed (``iter_pages``).
+Ranges run on a process pool because PyPDF2 is pure Python and holds the
+GIL. Documents shorter than ``PDF_PARALLEL_MIN_PAGES`` are extracted in
+process, where pool overhead would dominate.
+
+This module deliberately avoids Django and the embedding stack: pool
+workers are spawned (forking a process that holds DB connections, model
+threads and locks is unsafe), and they only import what is here.
+"""
+import logging
+import multiprocessing
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import PyPDF2
+
+# =====================================================
+# LOGGING SETUP
+# =====================================================
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIG
+# =====================================================
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))  # 0 = in process
+PDF_EXTRACT_PAGES_PER_TASK = int(os.getenv("PDF_EXTRACT_PAGES_PER_TASK", "16"))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "24"))
+PDF_EXTRACT_MAX_IN_FLIGHT = max(1, 2 * PDF_EXTRACT_WORKERS)  # Page ranges submitted ahead of the consumer
+
+# Heading lines are kept as paragraphs of their own so the chunker sees them
+# (same limits as chunker.is_heading, which this module cannot import)
+HEADING_LINE_MAX_WORDS = 12
+HEADING_LINE_MAX_CHARS = 120
+
+# (page index, cleaned text, error message or None)
+PageResult = Tuple[int, str, Optional[str]]
+
+# =====================================================
+# GLOBALS
+# =====================================================
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+# =====================================================
+# TEXT CLEANING
+# =====================================================
+def _is_heading_line(line: str) -> bool:
+    words = line.split()
+    if not words or len(words) > HEADING_LINE_MAX_WORDS or len(line) > HEADING_LINE_MAX_CHARS:
+        return False
+    if line[-1] in ".,;:!?-":
+        return False
+    return line[0].isupper() or line[0].isdigit()
+
+
+def separate_heading_lines(text: str) -> str:
+    """
+    Put heading-like lines in paragraphs of their own.
+
+    PDF text breaks every line with a single newline, which cleaning joins
+    into spaces, so a heading would end up glued to the first sentence of
+    its section. A line is treated as a heading when it is short, has no
+    sentence punctuation at the end, follows a finished sentence (or the
+    start of the text or a paragraph) and is followed by a longer,
+    capitalized line (wrapped body lines run the full width).
+    """
+    lines = text.split("\n")
+    result = []
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        previous = lines[i - 1].strip() if i else ""
+        following = lines[i + 1].strip() if i + 1 < len(lines) else ""
+        if (
+            _is_heading_line(stripped)
+            and (not previous or previous[-1] in ".!?:")
+            and (not following or (len(following) > len(stripped) and (following[0].isupper() or following[0].isdigit())))
+        ):
+            result.extend(["", stripped, ""])
+        else:
+            result.append(line)
+    return "\n".join(result)
+
+
+def clean_pdf_text(text: str) -> str:
+    """
+    Clean and normalize text extracted from PDF.
+
+    Improvements over basic cleaning:
+    - Remove excessive newlines while preserving paragraph breaks
+    - Keep heading lines as paragraphs of their own
+    - Normalize whitespace
+    - Remove special characters that don't add semantic value
+    - Preserve sentence boundaries
+
+    Args:
+        text: Raw text from PDF
+
+    Returns:
+        Cleaned and normalized text
+    """
+    if not text:
+        return ""
+
+    try:
+        # Remove null bytes (can cause database issues)
+        text = text.replace("\x00", "")
+
+        # Replace multiple newlines with double newline (preserve paragraphs)
+        text = re.sub(r'\n{3,}', '\n\n', text)
+
+        # Keep headings apart before line breaks are joined
+        text = separate_heading_lines(text)
+
+        # Replace single newlines with space (fix PDF line breaks)
+        text = re.sub(r'(?<!\n)\n(?!\n)', ' ', text)
+
+        # Normalize multiple spaces to single space
+        text = re.sub(r' {2,}', ' ', text)
+
+        # Remove spaces before punctuation
+        text = re.sub(r'\s+([.,;:!?])', r'\1', text)
+
+        # Normalize paragraph breaks
+        text = re.sub(r'\n\n+', '\n\n', text)
+
+        # Strip leading/trailing whitespace
+        text = text.strip()
+
+        logger.debug(f"Cleaned text: {len(text)} chars")
+        return text
+
+    except Exception as e:
+        logger.warning(f"Text cleaning encountered error: {e}. Returning basic cleaned text.")
+        # Fallback to basic cleaning
+        return text.replace("\x00", "").strip()
+
+
+# =====================================================
+# PAGE EXTRACTION
+# =====================================================
+def read_pdf_info(pdf_path: str) -> Tuple[int, Dict]:
+    """Page count and optional title / author of a PDF."""
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        num_pages = len(reader.pages)
+        info = {}
+        try:
+            if reader.metadata:
+                info['title'] = reader.metadata.get('/Title', '')
+                info['author'] = reader.metadata.get('/Author', '')
+        except Exception:
+            pass  # Metadata extraction is optional
+    return num_pages, info
+
+
+def extract_page_range(pdf_path: str, start: int, end: int) -> List[PageResult]:
+    """Extract and clean pages ``[start, end)``; runs in pool workers."""
+    results = []
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        for page_num in range(start, end):
+            try:
+                results.append((page_num, clean_pdf_text(reader.pages[page_num].extract_text() or ""), None))
+            except Exception as e:
+                results.append((page_num, "", str(e)))
+    return results
+
+
+def page_ranges(num_pages: int, pages_per_task: int = PDF_EXTRACT_PAGES_PER_TASK) -> List[Tuple[int, int]]:
+    return [(start, min(start + pages_per_task, num_pages)) for start in range(0, num_pages, pages_per_task)]
+
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all extractions in this process (created on first use)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(
+                max_workers=PDF_EXTRACT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _POOL
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is pool:
+            _POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_page_ranges(
+    pdf_path: str,
+    num_pages: int,
+    pool: Optional[ProcessPoolExecutor] = None,
+) -> Iterator[List[PageResult]]:
+    """
+    Results of each page range, in page order.
+
+    At most PDF_EXTRACT_MAX_IN_FLIGHT ranges are outstanding, so a slow
+    consumer holds back extraction instead of buffering the document.
+
+    Args:
+        pdf_path: Path to PDF file
+        num_pages: Page count (already read by the caller)
+        pool: Process pool to use; defaults to the shared pool for documents
+            of at least PDF_PARALLEL_MIN_PAGES pages, in process otherwise
+    """
+    if pool is None and PDF_EXTRACT_WORKERS > 0 and num_pages >= PDF_PARALLEL_MIN_PAGES:
+        pool = get_extraction_pool()
+
+    ranges = deque(page_ranges(num_pages))
+    if pool is not None:
+        pending = deque()
+        try:
+            while ranges or pending:
+                while ranges and len(pending) < PDF_EXTRACT_MAX_IN_FLIGHT:
+                    start, end = ranges[0]
+                    future = pool.submit(extract_page_range, pdf_path, start, end)
+                    ranges.popleft()
+                    pending.append((start, end, future))
+                results = pending[0][2].result()
+                pending.popleft()
+                yield results
+        except BrokenProcessPool as e:
+            # A worker died (e.g. OOM on a pathological page); finish in process
+            logger.warning(f"PDF extraction pool failed ({e}); extracting in process")
+            _discard_pool(pool)
+            ranges.extendleft((start, end) for start, end, _ in reversed(pending))
+        finally:
+            for _, _, future in pending:
+                future.cancel()
+
+    while ranges:
+        start, end = ranges.popleft()
+        yield extract_page_range(pdf_path, start, end)
+
+
+def _log_failures(results: List[PageResult]) -> None:
+    for page_num, _, error in results:
+        if error:
+            logger.warning(f"Failed to extract text from page {page_num + 1}: {error}")
+
+
+def iter_pages(pdf_path: str, num_pages: int, pool: Optional[ProcessPoolExecutor] = None) -> Iterator[str]:
+    """Cleaned text of each page in page order ('' for pages that failed)."""
+    for results in iter_page_ranges(pdf_path, num_pages, pool):
+        _log_failures(results)
+        for _, text, _ in results:
+            yield text
+
+
+def extract_pages(
+    pdf_path: str,
+    num_pages: int,
+    pool: Optional[ProcessPoolExecutor] = None,
+    on_pages: Optional[Callable[[int], None]] = None,
+) -> List[str]:
+    """
+    Cleaned text of every page, in page order ('' for pages that failed).
+
+    Args:
+        pdf_path: Path to PDF file
+        num_pages: Page count (already read by the caller)
+        pool: See ``iter_page_ranges``
+        on_pages: Called with the number of pages finished after each range
+    """
+    pages = []
+    for results in iter_page_ranges(pdf_path, num_pages, pool):
+        _log_failures(results)
+        pages.extend(text for _, text, _ in results)
+        if on_pages:
+            on_pages(len(results))
+    return pages
@@ -1,23 +1,37 @@
 """
 Production-grade PDF ingestion service with batching, transactions,
 metadata tracking, and comprehensive error handling.
+
+Besides PDFs, plain-text, Markdown and HTML files are ingested through the
+same pipeline; each file type is read by an ``Extractor`` registered for
+its extension (see ``register_extractor``).
 """
+import hashlib
+import io
 import logging
 import os
-import re
+import struct
+import time
+from functools import partial
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, Iterable, List, Dict, NamedTuple, Optional, Sequence, Set, Tuple
 
-import PyPDF2
+import numpy as np
+import psycopg2
 from django.db import transaction
+from psycopg2.extras import execute_values
 
+from .ann_index import remove_local_index, update_local_index
+from .chunker import MIN_CHUNK_LENGTH, Chunk, iter_chunks
+from .embedding_cache import embed_documents, open_cache_connection
+from .ingestion_pipeline import run_pipeline
+from .pdf_extraction import iter_pages, read_pdf_info
 from .rag_shared import (
-    get_embedder,
+    bump_tenant_content_version,
     chunk_hash,
-    chunk_text,
     get_db_connection,
-    page_hash,
 )
+from .text_extraction import iter_text_pages, read_text_info
 
 # =====================================================
 # LOGGING SETUP
@@ -28,8 +42,22 @@ logger = logging.getLogger(__name__)
 # CONFIG
 # =====================================================
 EMBEDDING_BATCH_SIZE = 32  # Process embeddings in batches to avoid memory overflow
-MIN_CHUNK_LENGTH = 50  # Minimum characters for a valid chunk
 MIN_PDF_TEXT_LENGTH = 100  # Minimum text length to consider PDF valid
+# Bulk insert with binary COPY into a staging table; false = execute_values only
+INGEST_USE_COPY = os.getenv("INGEST_USE_COPY", "true").lower() == "true"
+INSERT_PAGE_SIZE = 1000  # Rows per execute_values statement
+INSERT_BATCH_ROWS = 256  # Rows buffered per insert round trip while streaming
+# Re-uploads embed only new chunks and delete vanished ones; false = replace every chunk
+INGEST_INCREMENTAL = os.getenv("INGEST_INCREMENTAL", "true").lower() == "true"
+# Documents written per transaction during multi-file ingestion
+INGEST_COMMIT_DOCUMENTS = max(1, int(os.getenv("INGEST_COMMIT_DOCUMENTS", "10")))
+FILE_HASH_CHUNK_BYTES = 1024 * 1024  # Read/write size while streaming and hashing uploads
+# Columns written for each chunk (staging table and documents)
+CHUNK_COLUMNS = "content, source, page_url, tenant_id, embedding, hash, page_start, page_end, heading"
+COPY_BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+
+# Receives partial progress dicts, e.g. {"pages_extracted": 12, "pages_total": 40}
+ProgressCallback = Callable[[Dict], None]
 
 # =====================================================
 # CUSTOM EXCEPTIONS
@@ -49,139 +77,143 @@ class InsufficientContentError(PDFIngestionError):
     pass
 
 
+def report_progress(progress: Optional[ProgressCallback], **fields) -> None:
+    """Send progress to the caller's callback; a failing callback never stops ingestion."""
+    if progress is None:
+        return
+    try:
+        progress(fields)
+    except Exception as e:
+        logger.warning(f"Progress callback failed: {e}")
+
+
 # =====================================================
-# TEXT CLEANING
+# EXTRACTOR REGISTRY
 # =====================================================
-def clean_pdf_text(text: str) -> str:
+class Extractor(NamedTuple):
     """
-    Clean and normalize text extracted from PDF.
-    
-    Improvements over basic cleaning:
-    - Remove excessive newlines while preserving paragraph breaks
-    - Normalize whitespace
-    - Remove special characters that don't add semantic value
-    - Preserve sentence boundaries
+    Reads one file type for the ingestion pipeline.
     
-    Args:
-        text: Raw text from PDF
-        
-    Returns:
-        Cleaned and normalized text
+    ``read_info(path)`` returns ``(num_pages, info)`` (info may hold
+    ``title`` / ``author``); ``iter_pages(path, num_pages)`` yields the
+    cleaned text of each page in order.
     """
-    if not text:
-        return ""
-    
-    try:
-        # Remove null bytes (can cause database issues)
-        text = text.replace("\x00", "")
-        
-        # Replace multiple newlines with double newline (preserve paragraphs)
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        
-        # Replace single newlines with space (fix PDF line breaks)
-        text = re.sub(r'(?<!\n)\n(?!\n)', ' ', text)
-        
-        # Normalize multiple spaces to single space
-        text = re.sub(r' {2,}', ' ', text)
-        
-        # Remove spaces before punctuation
-        text = re.sub(r'\s+([.,;:!?])', r'\1', text)
-        
-        # Normalize paragraph breaks
-        text = re.sub(r'\n\n+', '\n\n', text)
-        
-        # Strip leading/trailing whitespace
-        text = text.strip()
-        
-        logger.debug(f"Cleaned text: {len(text)} chars")
-        return text
-        
-    except Exception as e:
-        logger.warning(f"Text cleaning encountered error: {e}. Returning basic cleaned text.")
-        # Fallback to basic cleaning
-        return text.replace("\x00", "").strip()
+    scheme: str  # Documents are stored as "<scheme>://<file name>"
+    read_info: Callable[[str], Tuple[int, Dict]]
+    iter_pages: Callable[[str, int], Iterable[str]]
+
+
+EXTRACTORS: Dict[str, Extractor] = {}
+
+
+def register_extractor(extensions: Iterable[str], extractor: Extractor) -> None:
+    """Use ``extractor`` for files with these extensions (e.g. ``['.txt']``)."""
+    for extension in extensions:
+        EXTRACTORS[extension.lower()] = extractor
+
+
+def get_extractor(path: str) -> Optional[Extractor]:
+    """Extractor for a file name or path, by extension (None if unsupported)."""
+    return EXTRACTORS.get(Path(path).suffix.lower())
+
+
+def document_source(path: str) -> str:
+    """Source identifier of a file, e.g. ``pdf://brochure.pdf`` or ``file://faq.md``."""
+    extractor = get_extractor(path)
+    return f"{extractor.scheme if extractor else 'pdf'}://{Path(path).name}"
+
+
+register_extractor(['.pdf'], Extractor('pdf', read_pdf_info, iter_pages))
+for _fmt, _extensions in (('text', ['.txt']), ('markdown', ['.md', '.markdown']), ('html', ['.html', '.htm'])):
+    register_extractor(
+        _extensions,
+        Extractor('file', partial(read_text_info, fmt=_fmt), partial(iter_text_pages, fmt=_fmt)),
+    )
 
 
 # =====================================================
 # PDF EXTRACTION
 # =====================================================
-def extract_text_from_pdf(pdf_path: str) -> Tuple[str, Dict]:
+class DocumentHash:
     """
-    Extract text from PDF with metadata.
+    Incremental ``page_hash`` of a document's text.
+    
+    Feeding the cleaned pages in order gives the same digest (and length)
+    as hashing ``"\\n\\n".join`` of the non-empty pages, without holding
+    the joined text.
+    """
+    
+    def __init__(self):
+        self._sha = hashlib.sha256()
+        self.length = 0
+    
+    def update(self, page: str) -> None:
+        if not page:
+            return
+        if self.length:
+            self._sha.update(b"\n\n")
+            self.length += 2
+        self._sha.update(page.encode("utf-8"))
+        self.length += len(page)
+    
+    def hexdigest(self) -> str:
+        return self._sha.hexdigest()
+
+
+def hash_pdf_text(
+    pdf_path: str,
+    num_pages: int,
+    read_pages: Callable[[str, int], Iterable[str]] = iter_pages,
+) -> str:
+    """``page_hash`` of a document's cleaned text, streamed page by page."""
+    text_hash = DocumentHash()
+    for page in read_pages(pdf_path, num_pages):
+        text_hash.update(page)
+    return text_hash.hexdigest()
+
+
+def save_upload(uploaded_file, dest_path: str) -> str:
+    """
+    Stream an uploaded file to ``dest_path`` in chunks, hashing the raw
+    bytes on the way, so the upload is never held in memory as a whole.
+    An existing file is never overwritten; a partial file is removed.
     
-    Args:
-        pdf_path: Path to PDF file
-        
     Returns:
-        Tuple of (cleaned_text, metadata_dict)
-        
-    Raises:
-        PDFExtractionError: If extraction fails
-        InsufficientContentError: If PDF has too little text
+        SHA-256 hex digest of the file
     """
+    sha = hashlib.sha256()
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    out = open(dest_path, 'xb')
     try:
-        logger.info(f"Extracting text from PDF: {pdf_path}")
-        
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            num_pages = len(pdf_reader.pages)
-            
-            logger.debug(f"PDF has {num_pages} pages")
-            
-            # Extract text from all pages
-            text = ""
-            for page_num in range(num_pages):
-                try:
-                    page = pdf_reader.pages[page_num]
-                    page_text = page.extract_text()
-                    text += page_text + "\n\n"  # Add paragraph break between pages
-                except Exception as e:
-                    logger.warning(f"Failed to extract text from page {page_num + 1}: {e}")
-                    continue
-            
-            # Clean the extracted text
-            cleaned_text = clean_pdf_text(text)
-            
-            # Validate extracted text
-            if len(cleaned_text) < MIN_PDF_TEXT_LENGTH:
-                raise InsufficientContentError(
-                    f"PDF contains insufficient text ({len(cleaned_text)} chars, minimum {MIN_PDF_TEXT_LENGTH})"
-                )
-            
-            # Build metadata
-            metadata = {
-                'num_pages': num_pages,
-                'file_name': Path(pdf_path).name,
-                'text_length': len(cleaned_text),
-            }
-            
-            # Try to extract PDF metadata
-            try:
-                if pdf_reader.metadata:
-                    metadata['title'] = pdf_reader.metadata.get('/Title', '')
-                    metadata['author'] = pdf_reader.metadata.get('/Author', '')
-            except Exception:
-                pass  # Metadata extraction is optional
-            
-            logger.info(f"Successfully extracted {len(cleaned_text)} chars from {num_pages} pages")
-            return cleaned_text, metadata
-            
-    except InsufficientContentError:
+        with out:
+            for block in uploaded_file.chunks(FILE_HASH_CHUNK_BYTES):
+                sha.update(block)
+                out.write(block)
+    except BaseException:
+        os.remove(dest_path)
         raise
-    except Exception as e:
-        logger.error(f"PDF extraction failed: {e}", exc_info=True)
-        raise PDFExtractionError(f"Failed to extract text from PDF: {e}")
+    return sha.hexdigest()
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 hex digest of a file's raw bytes, read in chunks."""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(FILE_HASH_CHUNK_BYTES), b''):
+            sha.update(block)
+    return sha.hexdigest()
 
 
 # =====================================================
 # DB HELPERS
 # =====================================================
-def get_page_hash_by_source(source: str) -> Optional[str]:
+def get_page_hash_by_source(source: str, tenant_id: str) -> Optional[str]:
     """
     Get the content hash for a given source.
     
     Args:
         source: Source identifier (e.g., "pdf://filename.pdf")
+        tenant_id: Tenant identifier
         
     Returns:
         Content hash if exists, None otherwise
@@ -192,8 +224,8 @@ def get_page_hash_by_source(source: str) -> Optional[str]:
         conn = get_db_connection()
         cur = conn.cursor()
         cur.execute(
-            "SELECT content_hash FROM pages WHERE url = %s AND is_active = TRUE",
-            (source,)
+            "SELECT content_hash FROM pages WHERE url = %s AND tenant_id = %s AND is_active = TRUE",
+            (source, tenant_id)
         )
         row = cur.fetchone()
         return row[0] if row else None
@@ -207,7 +239,127 @@ def get_page_hash_by_source(source: str) -> Optional[str]:
             conn.close()
 
 
-def upsert_page(source: str, content_hash: str, tenant_id: str) -> None:
+def get_page_file_hashes(sources: List[str], tenant_id: str) -> Dict[str, str]:
+    """
+    Stored raw-file hashes of a tenant's active pages.
+    
+    Args:
+        sources: Source identifiers to look up
+        tenant_id: Tenant identifier
+        
+    Returns:
+        ``{source: file_hash}`` for the sources that have one
+    """
+    if not sources:
+        return {}
+    conn = None
+    cur = None
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT url, file_hash FROM pages
+            WHERE url = ANY(%s) AND tenant_id = %s AND is_active = TRUE AND file_hash IS NOT NULL
+            """,
+            (list(sources), tenant_id)
+        )
+        return dict(cur.fetchall())
+    except Exception as e:
+        logger.error(f"Failed to get file hashes: {e}")
+        return {}
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+
+class ChunkLocation(NamedTuple):
+    """Where a chunk sits in its document: page span and section heading."""
+    page_start: Optional[int]
+    page_end: Optional[int]
+    heading: Optional[str]
+
+
+def get_page_chunk_hashes(cur, sources: List[str], tenant_id: str) -> Dict[str, Dict[str, ChunkLocation]]:
+    """
+    Chunks a tenant has stored for each source (read in the caller's transaction).
+    
+    Returns:
+        Dict of source -> {chunk hash: stored location}
+    """
+    cur.execute(
+        """
+        SELECT page_url, hash, page_start, page_end, heading
+        FROM documents
+        WHERE page_url = ANY(%s) AND tenant_id = %s
+        """,
+        (sources, tenant_id),
+    )
+    hashes: Dict[str, Dict[str, ChunkLocation]] = {}
+    for source, digest, page_start, page_end, heading in cur.fetchall():
+        hashes.setdefault(source, {})[digest] = ChunkLocation(page_start, page_end, heading)
+    return hashes
+
+
+RELOCATE_CHUNKS_SQL = """
+    UPDATE documents AS d
+    SET page_start = v.page_start, page_end = v.page_end, heading = v.heading
+    FROM (VALUES %s) AS v(tenant_id, page_url, hash, page_start, page_end, heading)
+    WHERE d.tenant_id = v.tenant_id AND d.page_url = v.page_url AND d.hash = v.hash
+"""
+
+
+def relocate_kept_chunks(
+    cur, source: str, tenant_id: str, stored: Dict[str, ChunkLocation], kept: Dict[str, ChunkLocation]
+) -> int:
+    """
+    Rewrite the page span and heading of unchanged chunks that moved.
+    
+    The chunk diff matches on text hash only, so a chunk whose text is
+    unchanged keeps its row and embedding even when an edit earlier in
+    the document shifted it to other pages or under another heading.
+    
+    Args:
+        cur: Cursor in the caller's transaction
+        source: Page URL of the document
+        tenant_id: Tenant identifier
+        stored: Locations currently stored, by chunk hash
+        kept: Locations in the new version of the document, by chunk hash
+        
+    Returns:
+        Number of chunks updated
+    """
+    moved = [
+        (tenant_id, source, digest, *location)
+        for digest, location in kept.items()
+        if digest in stored and stored[digest] != location
+    ]
+    if moved:
+        execute_values(
+            cur,
+            RELOCATE_CHUNKS_SQL,
+            moved,
+            template="(%s, %s, %s, %s::integer, %s::integer, %s::text)",
+            page_size=INSERT_PAGE_SIZE,
+        )
+    return len(moved)
+
+
+UPSERT_PAGE_SQL = """
+    INSERT INTO pages (url, content_hash, is_active, tenant_id, file_hash)
+    VALUES (%s, %s, TRUE, %s, %s)
+    ON CONFLICT (tenant_id, url)
+    DO UPDATE SET
+        content_hash = EXCLUDED.content_hash,
+        file_hash = EXCLUDED.file_hash,
+        last_indexed = NOW(),
+        is_active = TRUE
+"""
+
+
+def upsert_page(source: str, content_hash: str, tenant_id: str, file_hash: Optional[str] = None) -> None:
     """
     Insert or update page record with transaction safety.
     
@@ -215,6 +367,7 @@ def upsert_page(source: str, content_hash: str, tenant_id: str) -> None:
         source: Source identifier
         content_hash: Hash of page content
         tenant_id: Tenant identifier
+        file_hash: Hash of the uploaded file's bytes, if known
     """
     conn = None
     cur = None
@@ -222,16 +375,7 @@ def upsert_page(source: str, content_hash: str, tenant_id: str) -> None:
         conn = get_db_connection()
         cur = conn.cursor()
         
-        cur.execute("""
-            INSERT INTO pages (url, content_hash, is_active, tenant_id)
-            VALUES (%s, %s, TRUE, %s)
-            ON CONFLICT (url)
-            DO UPDATE SET
-                content_hash = EXCLUDED.content_hash,
-                last_indexed = NOW(),
-                is_active = TRUE,
-                tenant_id = EXCLUDED.tenant_id
-        """, (source, content_hash, tenant_id))
+        cur.execute(UPSERT_PAGE_SQL, (source, content_hash, tenant_id, file_hash))
         
         conn.commit()
         logger.debug(f"Upserted page: {source}")
@@ -248,12 +392,13 @@ def upsert_page(source: str, content_hash: str, tenant_id: str) -> None:
             conn.close()
 
 
-def delete_page_chunks(source: str) -> int:
+def delete_page_chunks(source: str, tenant_id: str) -> int:
     """
-    Delete all chunks associated with a source.
+    Delete all of a tenant's chunks associated with a source.
     
     Args:
         source: Source identifier
+        tenant_id: Tenant identifier
         
     Returns:
         Number of deleted chunks
@@ -264,7 +409,7 @@ def delete_page_chunks(source: str) -> int:
         conn = get_db_connection()
         cur = conn.cursor()
         
-        cur.execute("DELETE FROM documents WHERE page_url = %s", (source,))
+        cur.execute("DELETE FROM documents WHERE page_url = %s AND tenant_id = %s", (source, tenant_id))
         deleted_count = cur.rowcount
         
         conn.commit()
@@ -286,88 +431,171 @@ def delete_page_chunks(source: str) -> int:
 # =====================================================
 # EMBEDDING & CHUNKING
 # =====================================================
-def process_chunks_in_batches(chunks: List[str], source: str, metadata: Dict) -> List[Dict]:
+def build_chunk_row(
+    chunk: Chunk, embedding: np.ndarray, source: str, metadata: Dict, position: int, tenant_id: str
+) -> Dict:
+    """Chunk data with metadata, ready for DB insertion."""
+    return {
+        'content': chunk.text,
+        'source': source,
+        'page_url': source,
+        'tenant_id': tenant_id,
+        'embedding': embedding.tolist(),
+        'hash': chunk_hash(chunk.text),
+        'chunk_index': position,  # Metadata: position in document
+        'file_name': metadata.get('file_name', ''),  # Metadata: source file
+        'page_start': chunk.page_start,
+        'page_end': chunk.page_end,
+        'heading': chunk.heading,
+    }
+
+
+def encode_copy_binary(chunk_data: List[Dict]) -> io.BytesIO:
     """
-    Generate embeddings in batches and prepare chunk data.
+    Encode chunks as a PostgreSQL binary COPY stream for the staging table
+    (content, source, page_url, tenant_id, embedding, hash, page_start,
+    page_end, heading); missing metadata is written as NULL.
     
-    Batching prevents memory overflow and allows for progress tracking.
-    Each chunk includes metadata for better retrieval.
+    Vectors use pgvector's binary representation (int16 dimensions, int16
+    unused, big-endian float4 values), which skips parsing text literals
+    on the server.
+    """
+    buf = io.BytesIO()
+    buf.write(COPY_BINARY_HEADER)
+    
+    def text_field(value: str) -> bytes:
+        # NUL is not allowed in PostgreSQL text
+        data = value.replace("\x00", "").encode("utf-8")
+        return struct.pack("!i", len(data)) + data
+    
+    def optional_text_field(value: Optional[str]) -> bytes:
+        return text_field(value) if value is not None else struct.pack("!i", -1)
+    
+    def optional_int_field(value: Optional[int]) -> bytes:
+        return struct.pack("!ii", 4, value) if value is not None else struct.pack("!i", -1)
+    
+    for chunk in chunk_data:
+        vector = np.asarray(chunk['embedding'], dtype=">f4")
+        vector_data = struct.pack("!hh", len(vector), 0) + vector.tobytes()
+        buf.write(struct.pack("!h", 9))
+        buf.write(text_field(chunk['content']))
+        buf.write(text_field(chunk['source']))
+        buf.write(text_field(chunk['page_url']))
+        buf.write(optional_text_field(chunk.get('tenant_id')))
+        buf.write(struct.pack("!i", len(vector_data)) + vector_data)
+        buf.write(text_field(chunk['hash']))
+        buf.write(optional_int_field(chunk.get('page_start')))
+        buf.write(optional_int_field(chunk.get('page_end')))
+        buf.write(optional_text_field(chunk.get('heading')))
+    
+    buf.write(struct.pack("!h", -1))
+    buf.seek(0)
+    return buf
+
+
+def _copy_into_staging(cur, chunk_data: List[Dict]) -> None:
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS documents_staging (
+            content TEXT,
+            source TEXT,
+            page_url TEXT,
+            tenant_id TEXT,
+            embedding vector,
+            hash TEXT,
+            page_start INTEGER,
+            page_end INTEGER,
+            heading TEXT
+        ) ON COMMIT DROP
+    """)
+    # Reused by later batches of the same transaction
+    cur.execute("TRUNCATE documents_staging")
+    cur.copy_expert(
+        f"COPY documents_staging ({CHUNK_COLUMNS}) FROM STDIN WITH (FORMAT binary)",
+        encode_copy_binary(chunk_data),
+    )
+
+
+def _insert_values(cur, chunk_data: List[Dict]) -> int:
+    # RETURNING collects every page; cur.rowcount would only cover the last one
+    inserted = execute_values(
+        cur,
+        f"""
+        INSERT INTO documents ({CHUNK_COLUMNS})
+        VALUES %s
+        ON CONFLICT (tenant_id, page_url, hash) DO NOTHING
+        RETURNING 1
+        """,
+        [
+            (
+                c['content'].replace("\x00", ""), c['source'], c['page_url'], c.get('tenant_id'),
+                c['embedding'], c['hash'], c.get('page_start'), c.get('page_end'), c.get('heading'),
+            )
+            for c in chunk_data
+        ],
+        template="(%s, %s, %s, %s, %s::vector, %s, %s, %s, %s)",
+        page_size=INSERT_PAGE_SIZE,
+        fetch=True,
+    )
+    return len(inserted)
+
+
+def insert_chunk_batch(cur, chunk_data: List[Dict], method: str) -> Tuple[int, str]:
+    """
+    Insert one batch of chunks inside the caller's transaction.
+    
+    ``method`` is ``copy`` (binary COPY into a staging table, then one
+    merge) or ``values`` (``execute_values`` pages). A failed COPY is
+    rolled back to a savepoint and the batch is retried with
+    ``execute_values``.
     
-    Args:
-        chunks: List of text chunks
-        source: Source identifier
-        metadata: PDF metadata
-        
     Returns:
-        List of dicts with chunk data ready for DB insertion
+        Tuple of (rows inserted, method used); callers keep using the
+        returned method for later batches
     """
-    try:
-        embedder = get_embedder()
-        chunk_data = []
-        
-        # Filter out chunks that are too short
-        valid_chunks = [c for c in chunks if len(c.strip()) >= MIN_CHUNK_LENGTH]
-        logger.info(f"Processing {len(valid_chunks)} valid chunks in batches of {EMBEDDING_BATCH_SIZE}")
-        
-        # Process in batches
-        for i in range(0, len(valid_chunks), EMBEDDING_BATCH_SIZE):
-            batch = valid_chunks[i:i + EMBEDDING_BATCH_SIZE]
-            batch_num = (i // EMBEDDING_BATCH_SIZE) + 1
-            total_batches = (len(valid_chunks) + EMBEDDING_BATCH_SIZE - 1) // EMBEDDING_BATCH_SIZE
-            
-            logger.debug(f"Processing batch {batch_num}/{total_batches} ({len(batch)} chunks)")
-            
-            try:
-                # Prefix with 'search_document:' for asymmetric search (Nomic best practice)
-                prefixed_batch = ["search_document: " + chunk for chunk in batch]
-                embeddings = embedder.encode(
-                    prefixed_batch,
-                    normalize_embeddings=True,
-                    batch_size=EMBEDDING_BATCH_SIZE
-                )
-                
-                # Build chunk data with metadata
-                for j, (chunk, embedding) in enumerate(zip(batch, embeddings)):
-                    chunk_index = i + j
-                    chunk_data.append({
-                        'content': chunk,
-                        'source': source,
-                        'page_url': source,
-                        'embedding': embedding.tolist(),
-                        'hash': chunk_hash(chunk),
-                        'chunk_index': chunk_index,  # Metadata: position in document
-                        'file_name': metadata.get('file_name', ''),  # Metadata: source file
-                    })
-                
-            except Exception as e:
-                logger.error(f"Batch {batch_num} embedding failed: {e}")
-                # Continue with next batch instead of failing completely
-                continue
-        
-        logger.info(f"Successfully processed {len(chunk_data)} chunks")
-        return chunk_data
-        
-    except Exception as e:
-        logger.error(f"Chunk processing failed: {e}", exc_info=True)
-        raise
+    if method == 'copy':
+        cur.execute("SAVEPOINT chunk_copy")
+        try:
+            _copy_into_staging(cur, chunk_data)
+            cur.execute(f"""
+                INSERT INTO documents ({CHUNK_COLUMNS})
+                SELECT {CHUNK_COLUMNS}
+                FROM documents_staging
+                ON CONFLICT (tenant_id, page_url, hash) DO NOTHING
+            """)
+            inserted = cur.rowcount
+            cur.execute("RELEASE SAVEPOINT chunk_copy")
+            return inserted, 'copy'
+        except psycopg2.Error as e:
+            logger.warning(f"COPY insert failed ({e}); retrying with execute_values")
+            cur.execute("ROLLBACK TO SAVEPOINT chunk_copy")
+    return _insert_values(cur, chunk_data), 'values'
 
 
-def insert_chunks_transactional(chunk_data: List[Dict]) -> int:
+def insert_chunks_transactional(chunk_data: List[Dict]) -> Dict:
     """
-    Insert chunks into database within a transaction.
+    Bulk insert chunks into the database within a transaction.
     
-    Uses transaction to ensure all-or-nothing insertion.
-    Implements batch insertion for better performance.
+    Chunks are streamed with a binary ``COPY`` into a temporary staging
+    table and merged with a single ``INSERT ... ON CONFLICT (tenant_id,
+    page_url, hash) DO NOTHING``, so a whole document costs a few round trips instead
+    of one per chunk. If COPY is unavailable (e.g. behind a statement-level
+    pooler), the batch is retried with multi-row ``execute_values``
+    pages. Either way the insert is all-or-nothing.
     
     Args:
         chunk_data: List of chunk dictionaries
         
     Returns:
-        Number of successfully inserted chunks
+        Dict with ``inserted`` (new rows), ``conflicted`` (skipped because
+        the page already has a chunk with the same hash) and ``method`` (copy | values)
     """
+    result = {'inserted': 0, 'conflicted': 0, 'method': 'copy' if INGEST_USE_COPY else 'values'}
+    if not chunk_data:
+        return result
+    
     conn = None
     cur = None
-    inserted_count = 0
+    started = time.perf_counter()
     
     try:
         conn = get_db_connection()
@@ -376,35 +604,19 @@ def insert_chunks_transactional(chunk_data: List[Dict]) -> int:
         # Start explicit transaction
         conn.autocommit = False
         
-        logger.debug(f"Inserting {len(chunk_data)} chunks in transaction")
+        logger.debug(f"Inserting {len(chunk_data)} chunks in transaction ({result['method']})")
         
-        for chunk in chunk_data:
-            try:
-                # ON CONFLICT DO NOTHING prevents duplicate entries based on hash
-                cur.execute("""
-                    INSERT INTO documents (content, source, page_url, embedding, hash)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT (hash) DO NOTHING
-                """, (
-                    chunk['content'],
-                    chunk['source'],
-                    chunk['page_url'],
-                    chunk['embedding'],
-                    chunk['hash']
-                ))
-                
-                if cur.rowcount > 0:
-                    inserted_count += 1
-                    
-            except Exception as e:
-                logger.warning(f"Failed to insert chunk {chunk.get('chunk_index')}: {e}")
-                # Continue with other chunks
-                continue
+        result['inserted'], result['method'] = insert_chunk_batch(cur, chunk_data, result['method'])
         
         # Commit transaction
         conn.commit()
-        logger.info(f"Successfully inserted {inserted_count}/{len(chunk_data)} chunks")
-        return inserted_count
+        result['conflicted'] = len(chunk_data) - result['inserted']
+        logger.info(
+            f"Inserted {result['inserted']}/{len(chunk_data)} chunks "
+            f"({result['conflicted']} already present) via {result['method']} "
+            f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        return result
         
     except Exception as e:
         logger.error(f"Transaction failed: {e}")
@@ -423,13 +635,494 @@ def insert_chunks_transactional(chunk_data: List[Dict]) -> int:
 # =====================================================
 # MAIN SYNC LOGIC
 # =====================================================
-def sync_pdf_to_db(pdf_path: str, tenant_id: str) -> Dict:
+class _Document:
+    """State of one PDF while it streams through a (possibly shared) ingestion pipeline."""
+    
+    def __init__(self, pdf_path: str, file_hash: Optional[str] = None):
+        self.path = pdf_path
+        self.extractor = get_extractor(pdf_path)
+        self.source = document_source(pdf_path)
+        self.file_hash = file_hash
+        self.num_pages = 0
+        self.metadata: Dict = {'file_name': Path(pdf_path).name}
+        self.old_hash: Optional[str] = None
+        self.stored_hashes: Dict[str, ChunkLocation] = {}
+        self.new_hashes: Set[str] = set()
+        self.kept: Dict[str, ChunkLocation] = {}  # Unchanged chunks, at their new location
+        self.text_hash = DocumentHash()
+        # Written by the stage threads (keys fixed up front); progress is only
+        # reported from the calling thread, as the callback may use the database
+        self.counts = {
+            'pages_extracted': 0,
+            'chunks_generated': 0,
+            'chunks_unchanged': 0,
+            'chunks_duplicate': 0,
+            'chunks_embedded': 0,
+        }
+        self.chunks_total: Optional[int] = None
+        self.inserted = 0
+        self.conflicted = 0
+        self.deleted = 0
+        self.relocated = 0
+        self.changed = False
+        self.error: Optional[Exception] = None
+        self.result: Optional[Dict] = None
+    
+    @property
+    def pending(self) -> bool:
+        return self.error is None and self.result is None
+    
+    def fail(self, error: Exception) -> None:
+        logger.error(f"PDF ingestion failed for {self.source}: {error}")
+        self.error = error
+
+
+def _sync_documents(
+    pdf_paths: Sequence[str],
+    tenant_id: str,
+    progress: Optional[ProgressCallback] = None,
+    file_hashes: Optional[Sequence[Optional[str]]] = None,
+) -> Tuple[List[_Document], int]:
+    """
+    Ingest PDFs through one pipeline, committing a few documents at a time.
+    
+    The documents follow each other through the stages as a stream of
+    entries: ``begin``, ``page`` and ``end`` (or ``failed``) markers around
+    each document's pages, and ``chunk`` / ``row`` entries in between.
+    Chunk batches are filled across document boundaries, so many small
+    PDFs share full embedding batches instead of each sending a partial
+    one.
+    
+    Each document is written inside its own savepoint: a file that turns
+    out to be unreadable or empty (or whose insert fails) is rolled back
+    and reported without affecting the others. The writer commits after
+    every ``INGEST_COMMIT_DOCUMENTS`` documents, with one content version
+    bump per commit, so page locks are held for one group at a time and
+    finished documents become searchable while the batch runs.
+    
+    A file whose raw bytes hash to the ``file_hash`` stored for the
+    tenant's page is skipped before the PDF is opened at all. Hashes
+    given in ``file_hashes`` (computed while the upload was saved) are
+    used as is; missing ones are computed here.
+    
+    Returns:
+        Tuple of (documents in input order, embeddings served from cache)
+        
+    Raises:
+        PDFIngestionError: If the batch fails part-way (groups committed
+            before the failure stay committed)
+    """
+    docs = [_Document(path, file_hash) for path, file_hash in zip(pdf_paths, file_hashes or [None] * len(pdf_paths))]
+    batch = len(docs) > 1
+    started = time.perf_counter()
+    
+    seen = set()
+    for doc in docs:
+        if doc.source in seen:
+            doc.fail(PDFIngestionError(f"Duplicate file name in batch: {doc.metadata['file_name']}"))
+            continue
+        seen.add(doc.source)
+        if doc.extractor is None:
+            doc.fail(PDFExtractionError(f"Unsupported file type: {doc.metadata['file_name']}"))
+            continue
+        if doc.file_hash is None:
+            try:
+                doc.file_hash = hash_file(doc.path)
+            except OSError:
+                pass  # Reported by read_info below
+    
+    # A byte-identical re-upload needs no parsing at all
+    stored_file_hashes = get_page_file_hashes([doc.source for doc in docs if doc.pending and doc.file_hash], tenant_id)
+    for doc in docs:
+        if doc.pending and doc.file_hash and stored_file_hashes.get(doc.source) == doc.file_hash:
+            logger.info(f"File unchanged (hash match), skipping: {doc.source}")
+            doc.result = {'status': 'skipped', 'reason': 'file_unchanged', 'source': doc.source}
+    
+    for doc in docs:
+        if not doc.pending:
+            continue
+        try:
+            doc.num_pages, pdf_info = doc.extractor.read_info(doc.path)
+        except Exception as e:
+            doc.fail(PDFExtractionError(f"Failed to extract text from {doc.metadata['file_name']}: {e}"))
+            continue
+        doc.metadata = {'num_pages': doc.num_pages, 'file_name': doc.metadata['file_name'], **pdf_info}
+    
+    # Without the chunk diff, hash the text in a first pass so an unchanged
+    # re-upload is skipped before anything is embedded
+    if not INGEST_INCREMENTAL:
+        for doc in docs:
+            if not doc.pending:
+                continue
+            old_hash = get_page_hash_by_source(doc.source, tenant_id)
+            if old_hash:
+                report_progress(progress, stage='hashing', pages_total=doc.num_pages)
+                if hash_pdf_text(doc.path, doc.num_pages, doc.extractor.iter_pages) == old_hash:
+                    logger.info(f"PDF unchanged (hash match), skipping: {doc.source}")
+                    doc.result = {'status': 'skipped', 'reason': 'content_unchanged', 'source': doc.source}
+    
+    active = [doc for doc in docs if doc.pending]
+    if not active:
+        return docs, 0
+    
+    pages_total = sum(doc.num_pages for doc in active)
+    cache_hits = 0
+    committed: List[_Document] = []
+    content_version = None
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            conn.autocommit = False
+            
+            # Unlocked snapshot for the chunk stage, which runs ahead of the
+            # writer; each page is locked and re-read when its document is
+            # written (see lock_document)
+            sources = [doc.source for doc in active]
+            stored_hashes = get_page_chunk_hashes(cur, sources, tenant_id) if INGEST_INCREMENTAL else {}
+            conn.rollback()
+            for doc in active:
+                doc.stored_hashes = stored_hashes.get(doc.source, {})
+            
+            logger.info(
+                f"Processing {len(active)} PDF(s), {pages_total} pages, "
+                f"{sum(len(doc.stored_hashes) for doc in active)} chunks stored, "
+                f"{'incremental' if INGEST_INCREMENTAL else 'full'} mode"
+            )
+            batch_fields = {'documents_total': len(docs), 'documents_done': len(docs) - len(active)} if batch else {}
+            report_progress(
+                progress, stage='ingesting', pages_total=pages_total, pages_extracted=0,
+                chunks_embedded=0, rows_inserted=0, **batch_fields
+            )
+            
+            def events():
+                for doc in active:
+                    yield ('begin', doc)
+                    try:
+                        for page in doc.extractor.iter_pages(doc.path, doc.num_pages):
+                            doc.text_hash.update(page)
+                            doc.counts['pages_extracted'] += 1
+                            yield ('page', doc, page)
+                    except Exception as e:
+                        error = PDFExtractionError(f"Failed to extract text from {doc.metadata['file_name']}: {e}")
+                        yield ('failed', doc, error)
+                        continue
+                    yield ('end', doc)
+            
+            def chunk_entries(stream):
+                stream = iter(stream)
+                entries = []
+                batch_chunks = 0
+                for begin in stream:
+                    doc = begin[1]
+                    entries.append(begin)
+                    closing = []
+                    
+                    def doc_pages():
+                        for event in stream:
+                            if event[0] != 'page':
+                                closing.append(event)
+                                return
+                            yield event[2]
+                    
+                    valid_chunks = 0
+                    for chunk in iter_chunks(enumerate(doc_pages(), 1)):
+                        doc.counts['chunks_generated'] += 1
+                        # Filter out chunks that are too short
+                        if len(chunk.text.strip()) < MIN_CHUNK_LENGTH:
+                            continue
+                        position = valid_chunks
+                        valid_chunks += 1
+                        
+                        digest = chunk_hash(chunk.text)
+                        if digest in doc.new_hashes:
+                            doc.counts['chunks_duplicate'] += 1
+                            continue
+                        doc.new_hashes.add(digest)
+                        if digest in doc.stored_hashes:
+                            doc.counts['chunks_unchanged'] += 1
+                            doc.kept[digest] = ChunkLocation(chunk.page_start, chunk.page_end, chunk.heading)
+                            continue
+                        
+                        entries.append(('chunk', doc, position, chunk))
+                        batch_chunks += 1
+                        if batch_chunks == EMBEDDING_BATCH_SIZE:
+                            yield entries
+                            entries, batch_chunks = [], 0
+                    doc.chunks_total = valid_chunks
+                    entries.extend(closing)
+                if entries:
+                    yield entries
+            
+            def embedded_entries(batches):
+                nonlocal cache_hits
+                failed_docs = set()
+                cache_conn = open_cache_connection()
+                try:
+                    for entries in batches:
+                        entries = [entry for entry in entries if entry[0] != 'chunk' or entry[1] not in failed_docs]
+                        chunks = [entry for entry in entries if entry[0] == 'chunk']
+                        embeddings = None
+                        if chunks:
+                            try:
+                                embeddings, hits = embed_documents(
+                                    [entry[3].text for entry in chunks], cache_conn, batch_size=EMBEDDING_BATCH_SIZE
+                                )
+                                cache_hits += hits
+                            except Exception as e:
+                                # A document missing some of its chunks must not
+                                # commit: fail every document in the batch (the
+                                # writer rolls back its savepoint) and skip the
+                                # rest of their chunks
+                                logger.error(f"Embedding failed for a batch of {len(chunks)} chunks: {e}")
+                                error = PDFIngestionError(f"Embedding failed: {e}")
+                                failed_docs.update(entry[1] for entry in chunks)
+                        
+                        vectors = iter(embeddings if embeddings is not None else [])
+                        out = []
+                        reported = set()
+                        for entry in entries:
+                            if entry[0] != 'chunk':
+                                out.append(entry)
+                            elif embeddings is None:
+                                if entry[1] not in reported:
+                                    reported.add(entry[1])
+                                    out.append(('failed', entry[1], error))
+                            else:
+                                _, doc, position, chunk = entry
+                                doc.counts['chunks_embedded'] += 1
+                                row = build_chunk_row(
+                                    chunk, next(vectors), doc.source, doc.metadata, position, tenant_id
+                                )
+                                out.append(('row', doc, row))
+                        yield out
+                finally:
+                    if cache_conn:
+                        cache_conn.close()
+            
+            def report(method_state: Dict, current: Optional[_Document] = None) -> None:
+                totals = {key: sum(doc.counts[key] for doc in active) for key in active[0].counts}
+                chunk_totals = [doc.chunks_total for doc in active]
+                fields = {
+                    **totals,
+                    'chunks_cached': cache_hits,
+                    'chunks_total': None if None in chunk_totals else sum(chunk_totals),
+                    'rows_inserted': method_state['inserted'],
+                    'rows_conflicted': method_state['conflicted'],
+                }
+                if batch:
+                    fields['documents_done'] = sum(1 for doc in docs if not doc.pending)
+                    fields['current_file'] = current.metadata['file_name'] if current else None
+                report_progress(progress, **fields)
+            
+            def write_entries(batches) -> Dict:
+                nonlocal content_version
+                state = {'inserted': 0, 'conflicted': 0, 'method': 'copy' if INGEST_USE_COPY else 'values'}
+                pending = []
+                group: List[_Document] = []
+                current = None
+                
+                def commit_group() -> None:
+                    # One content version bump per commit, so the local
+                    # index swaps every page of the group in one update
+                    nonlocal content_version
+                    changed_now = [doc for doc in group if doc.changed]
+                    if changed_now:
+                        content_version = bump_tenant_content_version(tenant_id, cur)
+                    conn.commit()
+                    committed.extend(group)
+                    group.clear()
+                    if changed_now:
+                        update_local_index(tenant_id, [doc.source for doc in changed_now], content_version)
+                
+                def flush(doc: _Document) -> None:
+                    inserted, state['method'] = insert_chunk_batch(cur, pending, state['method'])
+                    doc.inserted += inserted
+                    doc.conflicted += len(pending) - inserted
+                    state['inserted'] += inserted
+                    state['conflicted'] += len(pending) - inserted
+                    pending.clear()
+                
+                for entries in batches:
+                    for entry in entries:
+                        kind, doc = entry[0], entry[1]
+                        if not doc.pending:
+                            continue
+                        try:
+                            if kind == 'begin':
+                                current = doc
+                                group.append(doc)
+                                cur.execute("SAVEPOINT ingest_document")
+                                lock_document(cur, doc, tenant_id)
+                                if not INGEST_INCREMENTAL:
+                                    cur.execute(
+                                        "DELETE FROM documents WHERE page_url = %s AND tenant_id = %s",
+                                        (doc.source, tenant_id),
+                                    )
+                                    doc.deleted = cur.rowcount
+                            elif kind == 'row':
+                                pending.append(entry[2])
+                                if len(pending) >= INSERT_BATCH_ROWS:
+                                    flush(doc)
+                            elif kind == 'end':
+                                if pending:
+                                    flush(doc)
+                                _finish_document(cur, doc, tenant_id)
+                            else:
+                                raise entry[2]
+                        except Exception as e:
+                            pending.clear()
+                            cur.execute("ROLLBACK TO SAVEPOINT ingest_document")
+                            cur.execute("RELEASE SAVEPOINT ingest_document")
+                            doc.fail(e)
+                        if not doc.pending and len(group) >= INGEST_COMMIT_DOCUMENTS:
+                            commit_group()
+                    report(state, current)
+                if group:
+                    report_progress(progress, stage='committing')
+                    commit_group()
+                report(state, current)
+                return state
+            
+            insert_result = run_pipeline(
+                events(), [chunk_entries, embedded_entries], write_entries,
+                name=f"ingest-{Path(active[0].path).stem[:20]}",
+            )
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+    except PDFIngestionError:
+        raise
+    except Exception as e:
+        logger.error(
+            f"Unexpected error during PDF sync ({len(committed)} document(s) committed before it): {e}",
+            exc_info=True,
+        )
+        raise PDFIngestionError(f"PDF ingestion failed: {e}")
+    
+    changed = [doc for doc in active if doc.changed]
+    seconds = time.perf_counter() - started
+    logger.info(
+        f"PDF ingestion completed (content version {content_version}): {len(changed)}/{len(docs)} document(s) "
+        f"changed, {pages_total} pages, {sum(doc.inserted for doc in changed)} chunks inserted "
+        f"({cache_hits} embeddings from cache), {sum(doc.counts['chunks_unchanged'] for doc in active)} unchanged, "
+        f"{sum(doc.deleted for doc in active)} deleted via {insert_result['method']} in {seconds:.1f}s "
+        f"({pages_total / max(seconds, 1e-9):.1f} pages/s)"
+    )
+    return docs, cache_hits
+
+
+def lock_document(cur, doc: _Document, tenant_id: str) -> None:
+    """
+    Lock a document's page row and re-read its stored state in the writer's transaction.
+    
+    The chunk stage skipped the chunks it found in the unlocked snapshot
+    (``doc.stored_hashes``); if another ingestion of the same page
+    committed since, some of those may be gone and the document has to be
+    ingested again.
+    """
+    cur.execute(
+        "SELECT content_hash, is_active FROM pages WHERE url = %s AND tenant_id = %s FOR UPDATE",
+        (doc.source, tenant_id),
+    )
+    row = cur.fetchone()
+    doc.old_hash = row[0] if row and row[1] else None
+    if not INGEST_INCREMENTAL:
+        return
+    stored = get_page_chunk_hashes(cur, [doc.source], tenant_id).get(doc.source, {})
+    if doc.stored_hashes.keys() - stored.keys():
+        raise PDFIngestionError(f"{doc.source} was re-ingested concurrently; upload it again")
+    doc.stored_hashes = stored
+
+
+def _finish_document(cur, doc: _Document, tenant_id: str) -> None:
+    """Apply a fully inserted document's diff and page record, or roll it back if unchanged."""
+    # Validate extracted text (known once every page has been seen)
+    if doc.text_hash.length < MIN_PDF_TEXT_LENGTH:
+        raise InsufficientContentError(
+            f"PDF contains insufficient text ({doc.text_hash.length} chars, minimum {MIN_PDF_TEXT_LENGTH})"
+        )
+    
+    new_hash = doc.text_hash.hexdigest()
+    if new_hash == doc.old_hash:
+        cur.execute("ROLLBACK TO SAVEPOINT ingest_document")
+        cur.execute("RELEASE SAVEPOINT ingest_document")
+        # Same text in different bytes: remember these bytes so the next
+        # identical upload is skipped without parsing
+        if doc.file_hash:
+            cur.execute(
+                "UPDATE pages SET file_hash = %s WHERE url = %s AND tenant_id = %s",
+                (doc.file_hash, doc.source, tenant_id),
+            )
+        logger.info(f"PDF unchanged (hash match), skipping: {doc.source}")
+        doc.result = {'status': 'skipped', 'reason': 'content_unchanged', 'source': doc.source}
+        return
+    
+    # Drop chunks that no longer occur in the document
+    vanished = doc.stored_hashes.keys() - doc.new_hashes
+    if vanished:
+        cur.execute(
+            "DELETE FROM documents WHERE page_url = %s AND tenant_id = %s AND hash = ANY(%s)",
+            (doc.source, tenant_id, list(vanished)),
+        )
+        doc.deleted = cur.rowcount
+    
+    # Kept chunks may have moved to other pages or under another heading
+    doc.relocated = relocate_kept_chunks(cur, doc.source, tenant_id, doc.stored_hashes, doc.kept)
+    
+    cur.execute(UPSERT_PAGE_SQL, (doc.source, new_hash, tenant_id, doc.file_hash))
+    cur.execute("RELEASE SAVEPOINT ingest_document")
+    
+    doc.changed = bool(doc.inserted or doc.deleted or doc.relocated)
+    doc.metadata['text_length'] = doc.text_hash.length
+    doc.result = {
+        'status': 'success',
+        'source': doc.source,
+        'chunks_generated': doc.counts['chunks_generated'],
+        'chunks_inserted': doc.inserted,
+        'chunks_conflicted': doc.conflicted + doc.counts['chunks_duplicate'],
+        'chunks_unchanged': doc.counts['chunks_unchanged'],
+        'chunks_relocated': doc.relocated,
+        'chunks_deleted': doc.deleted,
+        'text_length': doc.text_hash.length,
+        'metadata': doc.metadata,
+    }
+
+
+def sync_pdf_to_db(
+    pdf_path: str,
+    tenant_id: str,
+    progress: Optional[ProgressCallback] = None,
+    file_hash: Optional[str] = None,
+) -> Dict:
     """
     Extract PDF content and sync to vector database with full error handling.
     
+    Ingestion is streamed through a bounded pipeline (see
+    ``ingestion_pipeline``): extracted pages feed the chunker, chunk
+    batches feed the embedder and embedded rows are inserted as they
+    arrive. All stages run at once, so memory stays bounded by the queue
+    sizes and the database writes while later pages are still being
+    embedded. Everything happens in one transaction that holds a lock on
+    the page row, so readers see the previous chunks until it commits.
+    
+    Re-uploads are applied as a chunk-level diff (INGEST_INCREMENTAL):
+    chunks whose hash is already stored for the source are kept as they
+    are, only new chunks are embedded and inserted, and chunks that no
+    longer occur are deleted at the end. An unchanged file is therefore
+    extracted but never embedded. With INGEST_INCREMENTAL=false every
+    chunk of the source is replaced. A byte-identical file is not even
+    extracted: its raw SHA-256 is compared with the page's ``file_hash``
+    first.
+    
     Args:
         pdf_path: Path to PDF file
         tenant_id: Tenant identifier
+        progress: Optional callback receiving stage and page/chunk/row counts
+        file_hash: SHA-256 of the file's bytes if already known (see ``save_upload``)
         
     Returns:
         Dict with ingestion results
@@ -437,62 +1130,59 @@ def sync_pdf_to_db(pdf_path: str, tenant_id: str) -> Dict:
     Raises:
         PDFIngestionError: If ingestion fails
     """
-    source = f"pdf://{Path(pdf_path).name}"
+    logger.info(f"Starting PDF ingestion: {pdf_path} for tenant: {tenant_id}")
+    docs, cache_hits = _sync_documents([pdf_path], tenant_id, progress, [file_hash])
+    doc = docs[0]
+    if doc.error is not None:
+        if isinstance(doc.error, PDFIngestionError):
+            raise doc.error
+        raise PDFIngestionError(f"PDF ingestion failed: {doc.error}")
+    if doc.result['status'] == 'success':
+        doc.result['chunks_cached'] = cache_hits
+    return doc.result
+
+
+def sync_pdfs_to_db(pdf_paths: Sequence[str], tenant_id: str, progress: Optional[ProgressCallback] = None) -> Dict:
+    """
+    Ingest several PDFs as one batch.
     
-    try:
-        logger.info(f"Starting PDF ingestion: {pdf_path} for tenant: {tenant_id}")
-        
-        # Extract text with metadata
-        text, metadata = extract_text_from_pdf(pdf_path)
-        
-        # Check if content has changed (skip if unchanged)
-        new_hash = page_hash(text)
-        old_hash = get_page_hash_by_source(source)
-        
-        if old_hash == new_hash:
-            logger.info(f"PDF unchanged (hash match), skipping: {source}")
-            return {
-                'status': 'skipped',
-                'reason': 'content_unchanged',
-                'source': source,
-            }
-        
-        logger.info(f"PDF content changed or new, processing...")
-        
-        # Delete old chunks if updating
-        if old_hash:
-            delete_page_chunks(source)
-        
-        # Generate chunks
-        chunks = list(chunk_text(text))
-        logger.info(f"Generated {len(chunks)} chunks")
-        
-        # Process chunks with embeddings
-        chunk_data = process_chunks_in_batches(chunks, source, metadata)
-        
-        # Insert into database with transaction
-        inserted_count = insert_chunks_transactional(chunk_data)
-        
-        # Update page record
-        upsert_page(source, new_hash, tenant_id)
-        
-        logger.info(f"PDF ingestion completed: {source}")
+    Works like ``sync_pdf_to_db`` for each file, but all files share one
+    pipeline, so embedding batches are filled across documents. The writer
+    commits after every ``INGEST_COMMIT_DOCUMENTS`` documents, so finished
+    groups stay committed (and searchable) if a later one fails. A file
+    that fails is reported in its entry of ``documents`` and does not stop
+    the others.
+    
+    Args:
+        pdf_paths: Paths to PDF files (file names must be unique)
+        tenant_id: Tenant identifier
+        progress: Optional callback receiving stage, document and page/chunk/row counts
         
-        return {
-            'status': 'success',
-            'source': source,
-            'chunks_generated': len(chunks),
-            'chunks_inserted': inserted_count,
-            'text_length': len(text),
-            'metadata': metadata,
-        }
+    Returns:
+        Dict with totals and one result per file, in input order
         
-    except (PDFExtractionError, InsufficientContentError) as e:
-        logger.error(f"PDF ingestion failed: {e}")
-        raise
-    except Exception as e:
-        logger.error(f"Unexpected error during PDF sync: {e}", exc_info=True)
-        raise PDFIngestionError(f"PDF ingestion failed: {e}")
+    Raises:
+        PDFIngestionError: If the batch as a whole fails (groups committed
+            before the failure stay committed)
+    """
+    logger.info(f"Starting batch PDF ingestion of {len(pdf_paths)} files for tenant: {tenant_id}")
+    docs, cache_hits = _sync_documents(pdf_paths, tenant_id, progress)
+    documents = [
+        doc.result if doc.error is None else {'status': 'failed', 'source': doc.source, 'error': str(doc.error)}
+        for doc in docs
+    ]
+    statuses = [document['status'] for document in documents]
+    failed = statuses.count('failed')
+    return {
+        'status': 'success' if not failed else 'partial' if failed < len(documents) else 'failed',
+        'documents_total': len(documents),
+        'documents_ingested': statuses.count('success'),
+        'documents_skipped': statuses.count('skipped'),
+        'documents_failed': failed,
+        'chunks_inserted': sum(document.get('chunks_inserted', 0) for document in documents),
+        'chunks_cached': cache_hits,
+        'documents': documents,
+    }
 
 
 # =====================================================
@@ -601,9 +1291,7 @@ def delete_tenant_knowledge_base(tenant_id: str) -> Dict:
             cur.execute(
                 """
                 DELETE FROM documents
-                WHERE page_url IN (
-                    SELECT url FROM pages WHERE tenant_id = %s
-                )
+                WHERE tenant_id = %s
                 """,
                 (tenant_id,),
             )
@@ -616,6 +1304,9 @@ def delete_tenant_knowledge_base(tenant_id: str) -> Dict:
             )
             deleted_pages = cur.rowcount
 
+            # Invalidate answer caches built from the deleted content.
+            bump_tenant_content_version(tenant_id, cur)
+
             conn.commit()
 
         except Exception:
@@ -623,6 +1314,8 @@ def delete_tenant_knowledge_base(tenant_id: str) -> Dict:
             conn.rollback()
             raise
 
+        remove_local_index(tenant_id)
+
         logger.info(
             "Deleted %d documents and %d pages for tenant: %s",
             deleted_docs,
@@ -658,32 +1351,72 @@ def delete_tenant_knowledge_base(tenant_id: str) -> Dict:
 # =====================================================
 # CONTROLLER
 # =====================================================
-def ingest_pdf(pdf_path: str, tenant_id: str) -> Dict:
+def ingest_pdf(
+    pdf_path: str,
+    tenant_id: str,
+    progress: Optional[ProgressCallback] = None,
+    file_hash: Optional[str] = None,
+) -> Dict:
     """
-    Main entry point for PDF ingestion with validation.
+    Main entry point for document ingestion with validation.
+    
+    Accepts every registered file type (PDF, plain text, Markdown, HTML).
     
     Args:
-        pdf_path: Path to PDF file
+        pdf_path: Path to the file
         tenant_id: Tenant identifier
+        progress: Optional callback for stage and counts (see ``sync_pdf_to_db``)
+        file_hash: SHA-256 of the file's bytes if already known
         
     Returns:
         Dict with ingestion results
         
     Raises:
-        FileNotFoundError: If PDF file doesn't exist
-        ValueError: If file is not a PDF
+        FileNotFoundError: If the file doesn't exist
+        ValueError: If the file type is not supported
         PDFIngestionError: If ingestion fails
     """
     # Validate file exists
     if not os.path.exists(pdf_path):
-        raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        raise FileNotFoundError(f"File not found: {pdf_path}")
     
     # Validate file extension
-    if not pdf_path.lower().endswith('.pdf'):
-        raise ValueError("File must be a PDF")
+    if get_extractor(pdf_path) is None:
+        raise ValueError(f"Unsupported file type; expected one of: {', '.join(sorted(EXTRACTORS))}")
+    
+    # Validate tenant_id
+    if not tenant_id or not tenant_id.strip():
+        raise ValueError("tenant_id is required")
+    
+    return sync_pdf_to_db(pdf_path, tenant_id.strip(), progress, file_hash)
+
+
+def ingest_pdf_batch(pdf_paths: Sequence[str], tenant_id: str, progress: Optional[ProgressCallback] = None) -> Dict:
+    """
+    Entry point for bulk ingestion of several files as one batch.
+    
+    Args:
+        pdf_paths: Paths to files of any registered type
+        tenant_id: Tenant identifier
+        progress: Optional callback for stage and counts (see ``sync_pdfs_to_db``)
+        
+    Returns:
+        Dict with batch totals and per-file results
+        
+    Raises:
+        ValueError: If no files are given, a file type is not supported or tenant_id is missing
+        PDFIngestionError: If the batch as a whole fails
+    """
+    if not pdf_paths:
+        raise ValueError("At least one file is required")
+    
+    # Validate file extensions (missing or unreadable files fail individually)
+    unsupported = [Path(path).name for path in pdf_paths if get_extractor(path) is None]
+    if unsupported:
+        raise ValueError(f"Unsupported file types: {', '.join(unsupported)}")
     
     # Validate tenant_id
     if not tenant_id or not tenant_id.strip():
         raise ValueError("tenant_id is required")
     
-    return sync_pdf_to_db(pdf_path, tenant_id.strip())
+    return sync_pdfs_to_db(pdf_paths, tenant_id.strip(), progress)
@@ -1,12 +1,19 @@
 import hashlib
+import logging
 import os
 import re
+import threading
+import time
 from urllib.parse import urlparse
 
+import numpy as np
 import psycopg2
+import requests
 from dotenv import load_dotenv
 from sentence_transformers import SentenceTransformer
 
+logger = logging.getLogger(__name__)
+
 # =====================================================
 # LOAD ENV
 # =====================================================
@@ -15,7 +22,24 @@ load_dotenv()
 # =====================================================
 # CONFIG
 # =====================================================
-CHUNK_SIZE = 220
+# Maximum tokens per chunk, counted with the embedding tokenizer (see chunker)
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "220"))
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "nomic-ai/nomic-embed-text-v1")
+# "torch" (fp32), "int8" (torch dynamic quantization), "onnx" or "onnx-int8" (onnxruntime)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Key for cached document embeddings; change it whenever the vectors would change.
+# Approximate backends get their own key so their vectors never mix with fp32 ones.
+EMBEDDING_MODEL_VERSION = os.getenv("EMBEDDING_MODEL_VERSION") or (
+    EMBEDDING_MODEL_NAME if EMBEDDING_BACKEND == "torch" else f"{EMBEDDING_MODEL_NAME}:{EMBEDDING_BACKEND}"
+)
+EMBEDDING_ONNX_INT8_FILE = os.getenv("EMBEDDING_ONNX_INT8_FILE", "onnx/model_quantized.onnx")
+# Optional shared embedding server (see run_embedding_server); empty = embed in-process
+EMBEDDING_SERVER_URL = os.getenv("EMBEDDING_SERVER_URL", "").rstrip("/")
+EMBEDDING_SERVER_TIMEOUT_SECONDS = float(os.getenv("EMBEDDING_SERVER_TIMEOUT_SECONDS", "30"))
+EMBEDDING_SERVER_RETRY_SECONDS = 30  # Use the in-process model this long after a server failure
+EMBEDDING_SERVER_MAX_TEXTS = 256  # Texts per /embed request the server accepts
+# Leading dimensions kept in documents.embedding_compact (halfvec); see migration 0003
+COMPACT_EMBEDDING_DIM = 256
 DB_CONFIG = {
     "host": os.getenv("SQL_DATABASE_HOST"),
     "dbname": os.getenv("SQL_DATABASE"),
@@ -29,23 +53,204 @@ DB_CONFIG = {
 # GLOBALS
 # =====================================================
 _EMBEDDER = None
+_EMBEDDER_LOCK = threading.Lock()
+_EMBEDDING_SESSION = None
+_EMBEDDING_SERVER_RETRY_AT = 0.0
+
+def load_embedder(backend=None, strict=False):
+    """
+    Load the embedding model with the requested inference backend.
+
+    - ``torch``: full-precision PyTorch (reference)
+    - ``int8``: PyTorch with dynamic int8 quantization of Linear layers (CPU)
+    - ``onnx``: ONNX export run by onnxruntime
+    - ``onnx-int8``: int8-quantized ONNX export
+
+    ONNX backends need ``optimum[onnxruntime]``; if it is missing the fp32
+    torch model is used instead so the service keeps working, unless
+    ``strict`` is set. The backend actually loaded is stored on the model
+    as ``embedding_backend``.
+
+    Raises:
+        ValueError: With ``strict``, if the requested backend is unknown
+        Exception: With ``strict``, whatever stopped the ONNX model loading
+    """
+    backend = backend or EMBEDDING_BACKEND
+
+    if backend in ("onnx", "onnx-int8"):
+        model_kwargs = {"file_name": EMBEDDING_ONNX_INT8_FILE} if backend == "onnx-int8" else None
+        try:
+            model = SentenceTransformer(
+                EMBEDDING_MODEL_NAME,
+                trust_remote_code=True,
+                backend="onnx",
+                model_kwargs=model_kwargs,
+            )
+            model.embedding_backend = backend
+            return model
+        except Exception as e:
+            if strict:
+                raise
+            logger.warning(f"ONNX embedding backend unavailable ({e}); falling back to torch fp32")
+            backend = "torch"
+    elif backend not in ("torch", "int8") and strict:
+        raise ValueError(f"Unknown embedding backend '{backend}'")
+
+    model = SentenceTransformer(
+        EMBEDDING_MODEL_NAME,
+        trust_remote_code=True,
+        device="cpu" if backend == "int8" else None,
+    )
+
+    if backend == "int8":
+        import torch
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif backend != "torch":
+        logger.warning(f"Unknown EMBEDDING_BACKEND '{backend}'; using torch fp32")
+        backend = "torch"
+
+    model.embedding_backend = backend
+    return model
 
 def get_embedder():
     """Lazy load the sentence transformer model."""
     global _EMBEDDER
     if _EMBEDDER is None:
-        _EMBEDDER = SentenceTransformer(
-            "nomic-ai/nomic-embed-text-v1",
-            trust_remote_code=True
-        )
+        with _EMBEDDER_LOCK:
+            if _EMBEDDER is None:
+                logger.info(f"Loading embedding model {EMBEDDING_MODEL_NAME} ({EMBEDDING_BACKEND} backend)")
+                _EMBEDDER = load_embedder()
+                if _EMBEDDER.embedding_backend != EMBEDDING_BACKEND:
+                    logger.warning(
+                        f"Embedding model running on {_EMBEDDER.embedding_backend}, "
+                        f"not the configured {EMBEDDING_BACKEND} backend"
+                    )
     return _EMBEDDER
 
+# =====================================================
+# EMBEDDING CLIENT
+# =====================================================
+def _get_embedding_session():
+    """Keep-alive HTTP session for the embedding server."""
+    global _EMBEDDING_SESSION
+    if _EMBEDDING_SESSION is None:
+        _EMBEDDING_SESSION = requests.Session()
+    return _EMBEDDING_SESSION
+
+def _encode_remote(texts):
+    response = _get_embedding_session().post(
+        f"{EMBEDDING_SERVER_URL}/embed",
+        json={"texts": texts},
+        timeout=EMBEDDING_SERVER_TIMEOUT_SECONDS,
+    )
+    response.raise_for_status()
+    dim = int(response.headers["X-Embedding-Dim"])
+    return np.frombuffer(response.content, dtype=np.float32).reshape(len(texts), dim)
+
+def encode_texts(texts, batch_size=32):
+    """
+    Embed texts into L2-normalized float32 vectors.
+
+    Uses the shared embedding server when EMBEDDING_SERVER_URL is set, so web
+    workers don't each hold a model copy; falls back to the in-process model
+    if the server is unreachable, times out or answers with a 5xx (a proxy in
+    front of a dead server, or the server failing to encode). Larger inputs
+    are sent in requests of EMBEDDING_SERVER_MAX_TEXTS. Callers add the Nomic
+    task prefix ("search_query: " / "search_document: ") themselves.
+
+    Raises:
+        requests.HTTPError: If the server rejects a request with a 4xx; that
+            is a client bug, not an outage, so it is not retried in-process
+    """
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    global _EMBEDDING_SERVER_RETRY_AT
+    if EMBEDDING_SERVER_URL and time.monotonic() >= _EMBEDDING_SERVER_RETRY_AT:
+        texts = list(texts)
+        try:
+            return np.vstack([
+                _encode_remote(texts[start:start + EMBEDDING_SERVER_MAX_TEXTS])
+                for start in range(0, len(texts), EMBEDDING_SERVER_MAX_TEXTS)
+            ])
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+            if isinstance(e, requests.HTTPError) and (e.response is None or e.response.status_code < 500):
+                raise
+            _EMBEDDING_SERVER_RETRY_AT = time.monotonic() + EMBEDDING_SERVER_RETRY_SECONDS
+            logger.warning(
+                f"Embedding server unavailable ({e}); encoding in-process for {EMBEDDING_SERVER_RETRY_SECONDS}s"
+            )
+    return np.asarray(
+        get_embedder().encode(list(texts), normalize_embeddings=True, batch_size=batch_size),
+        dtype=np.float32,
+    )
+
 # =====================================================
 # DB SETUP
 # =====================================================
 def get_db_connection():
     return psycopg2.connect(**DB_CONFIG)
 
+# =====================================================
+# TENANT CONTENT VERSION
+# =====================================================
+def get_tenant_content_version(tenant_id, cur=None):
+    """Return the current knowledge-base version for a tenant (0 if never bumped)."""
+    conn = None
+    own_cursor = cur is None
+    try:
+        if own_cursor:
+            conn = get_db_connection()
+            cur = conn.cursor()
+        cur.execute(
+            "SELECT version FROM tenant_content_versions WHERE tenant_id = %s",
+            (tenant_id,)
+        )
+        row = cur.fetchone()
+        return row[0] if row else 0
+    finally:
+        if own_cursor:
+            if cur:
+                cur.close()
+            if conn:
+                conn.close()
+
+def bump_tenant_content_version(tenant_id, cur=None):
+    """
+    Increment a tenant's knowledge-base version and return the new value.
+
+    Pass ``cur`` to bump inside the caller's transaction; otherwise a
+    short-lived connection is opened and committed.
+    """
+    conn = None
+    own_cursor = cur is None
+    try:
+        if own_cursor:
+            conn = get_db_connection()
+            cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO tenant_content_versions (tenant_id, version, updated_at)
+            VALUES (%s, 1, NOW())
+            ON CONFLICT (tenant_id)
+            DO UPDATE SET
+                version = tenant_content_versions.version + 1,
+                updated_at = NOW()
+            RETURNING version
+        """, (tenant_id,))
+        version = cur.fetchone()[0]
+        if own_cursor:
+            conn.commit()
+        return version
+    except Exception:
+        if own_cursor and conn:
+            conn.rollback()
+        raise
+    finally:
+        if own_cursor:
+            if cur:
+                cur.close()
+            if conn:
+                conn.close()
+
 # =====================================================
 # UTILS
 # =====================================================
@@ -62,12 +267,6 @@ def page_hash(text):
 def chunk_hash(text):
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
-def chunk_text(text, size=200, overlap=50):
-    words = text.split()
-    step = size - overlap
-    for i in range(0, len(words), step):
-        yield " ".join(words[i:i + size])
-
 def extract_keywords(question):
     words = re.findall(r'\b[a-zA-Z]{3,}\b', question.lower())
     return list(set(words))
\ No newline at end of file
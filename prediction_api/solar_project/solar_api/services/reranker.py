@@ -0,0 +1,170 @@
+"""
+Optional cross-encoder reranking of retrieved chunks.
+
+The vector and keyword searches return candidates in merge order; a small
+local cross-encoder scores every (question, chunk) pair in one batched
+forward pass so the context packer can fill its budget best-first. Scoring
+runs on a dedicated thread pool under a strict latency budget: if it does not
+finish in time (or the model is still loading) the caller keeps the original
+retrieval order. A request is only submitted when a pool thread is free, so
+under load the pool never builds a queue of passes nobody will wait for.
+"""
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import List, Optional, Sequence
+
+from .context_packer import ScoredRow
+
+# =====================================================
+# LOGGING SETUP
+# =====================================================
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIG
+# =====================================================
+RERANK_ENABLED = os.getenv("CHATBOT_RERANK", "false").lower() == "true"
+RERANK_MODEL_NAME = os.getenv("CHATBOT_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_BUDGET_MS = float(os.getenv("CHATBOT_RERANK_BUDGET_MS", "150"))  # Give up and keep vector order after this
+RERANK_MAX_CANDIDATES = int(os.getenv("CHATBOT_RERANK_MAX_CANDIDATES", "30"))  # Caps forward-pass cost
+RERANK_MAX_LENGTH = 256  # Tokens per (question, chunk) pair
+RERANK_THREADS = int(os.getenv("CHATBOT_RERANK_THREADS", "2"))
+
+# =====================================================
+# GLOBALS
+# =====================================================
+_RERANKER = None
+_RERANKER_LOCK = threading.Lock()
+_RERANK_EXECUTOR = ThreadPoolExecutor(max_workers=RERANK_THREADS, thread_name_prefix="rerank")
+# One slot per pool thread; held from submission until the pass finishes
+_RERANK_SLOTS = threading.BoundedSemaphore(RERANK_THREADS)
+
+
+def get_reranker():
+    """Lazily load the process-wide cross-encoder."""
+    global _RERANKER
+    if _RERANKER is None:
+        with _RERANKER_LOCK:
+            if _RERANKER is None:
+                from sentence_transformers import CrossEncoder
+
+                logger.info(f"Loading reranker model {RERANK_MODEL_NAME}")
+                _RERANKER = CrossEncoder(RERANK_MODEL_NAME, max_length=RERANK_MAX_LENGTH)
+    return _RERANKER
+
+
+def _score(question: str, texts: List[str]) -> List[float]:
+    scores = get_reranker().predict(
+        [(question, text) for text in texts],
+        batch_size=len(texts),
+        show_progress_bar=False,
+    )
+    return [float(s) for s in scores]
+
+
+def submit_scores(question: str, texts: List[str]) -> Optional[Future]:
+    """
+    Schedule one batched scoring pass; the Future resolves to a score per text.
+
+    Returns None without queueing anything when every pool thread is busy.
+    """
+    if not _RERANK_SLOTS.acquire(blocking=False):
+        return None
+    try:
+        future = _RERANK_EXECUTOR.submit(_score, question, texts)
+    except Exception:
+        _RERANK_SLOTS.release()
+        raise
+    future.add_done_callback(lambda _: _RERANK_SLOTS.release())
+    return future
+
+
+def order_by_scores(rows: Sequence[ScoredRow], scores: List[float]) -> List[ScoredRow]:
+    """
+    Rows rescored with the cross-encoder scores, best first (stable, so ties
+    keep retrieval order). Unscored rows beyond the candidate cap get the
+    lowest score given, so they rank with the least relevant scored row.
+    """
+    rescored = [(text, src, score) for (text, src, _), score in zip(rows, scores)]
+    rescored.sort(key=lambda r: -r[2])
+    floor = min(scores, default=0.0)
+    return rescored + [(text, src, floor) for text, src, _ in rows[len(scores):]]
+
+
+def rerank(
+    question: str,
+    rows: Sequence[ScoredRow],
+    budget_ms: Optional[float] = None,
+) -> List[ScoredRow]:
+    """
+    Rescore (content, source, score) rows by cross-encoder relevance.
+
+    Only the first ``RERANK_MAX_CANDIDATES`` rows are scored; the rest keep
+    their position after them.
+
+    Args:
+        question: User's question
+        rows: Deduplicated candidates in retrieval order
+        budget_ms: Latency budget (defaults to CHATBOT_RERANK_BUDGET_MS)
+
+    Returns:
+        Rescored rows best first, or the input rows unchanged if scoring
+        failed or ran over budget
+    """
+    rows = list(rows)
+    if len(rows) < 2:
+        return rows
+    budget_seconds = (RERANK_BUDGET_MS if budget_ms is None else budget_ms) / 1000.0
+
+    future = submit_scores(question, [row[0] for row in rows[:RERANK_MAX_CANDIDATES]])
+    if future is None:
+        logger.warning("Reranker busy; keeping retrieval order")
+        return rows
+    try:
+        scores = future.result(timeout=budget_seconds)
+    except FutureTimeoutError:
+        future.cancel()
+        logger.warning(f"Reranking exceeded {budget_seconds * 1000:.0f}ms budget; keeping retrieval order")
+        return rows
+    except Exception as e:
+        logger.error(f"Reranking failed: {e}; keeping retrieval order")
+        return rows
+    return order_by_scores(rows, scores)
+
+
+async def arerank(
+    question: str,
+    rows: Sequence[ScoredRow],
+    budget_ms: Optional[float] = None,
+) -> List[ScoredRow]:
+    """Async counterpart of ``rerank`` that waits without blocking the event loop."""
+    rows = list(rows)
+    if len(rows) < 2:
+        return rows
+    budget_seconds = (RERANK_BUDGET_MS if budget_ms is None else budget_ms) / 1000.0
+
+    future = submit_scores(question, [row[0] for row in rows[:RERANK_MAX_CANDIDATES]])
+    if future is None:
+        logger.warning("Reranker busy; keeping retrieval order")
+        return rows
+    try:
+        # shield: the pool future is cancelled below, not through the wrapper
+        scores = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), budget_seconds)
+    except asyncio.TimeoutError:
+        future.cancel()
+        logger.warning(f"Reranking exceeded {budget_seconds * 1000:.0f}ms budget; keeping retrieval order")
+        return rows
+    except Exception as e:
+        logger.error(f"Reranking failed: {e}; keeping retrieval order")
+        return rows
+    return order_by_scores(rows, scores)
+
+
+def warm_up_reranker() -> None:
+    """Load the cross-encoder and run one pass (no-op when reranking is disabled)."""
+    if RERANK_ENABLED:
+        _score("warm up", ["solar panel warm up"] * 4)
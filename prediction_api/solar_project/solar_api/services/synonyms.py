@@ -0,0 +1,240 @@
+"""
+Per-tenant synonym expansion for keyword retrieval.
+
+Each tenant's synonym groups (``tenant_synonym_groups`` table, falling back to
+``DEFAULT_SYNONYM_GROUPS``) are compiled once into an Aho–Corasick automaton,
+so matching a question costs one pass over its characters regardless of how
+many synonyms the dictionary holds. Matches must sit on word boundaries
+("call" does not match inside "recall"). Compiled matchers are cached per
+tenant for ``SYNONYM_CACHE_TTL_SECONDS``; when a tenant's groups cannot be
+read, the defaults are cached for ``SYNONYM_ERROR_CACHE_SECONDS`` so an
+unhealthy database is not queried again for every question.
+
+The expansion feeds the keyword search only; the question is embedded as
+asked so synonym lists don't dilute the query vector.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+from .rag_shared import get_db_connection
+
+# =====================================================
+# LOGGING SETUP
+# =====================================================
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIG
+# =====================================================
+SYNONYM_CACHE_TTL_SECONDS = int(os.getenv("CHATBOT_SYNONYM_CACHE_TTL_SECONDS", "300"))
+SYNONYM_CACHE_MAX_TENANTS = int(os.getenv("CHATBOT_SYNONYM_CACHE_MAX_TENANTS", "500"))
+SYNONYM_ERROR_CACHE_SECONDS = 30  # Defaults served this long after a failed load
+
+DEFAULT_SYNONYM_GROUPS = {
+    # Contact information
+    "phone": ["phone", "telephone", "mobile", "contact number", "phone number", "cell", "call"],
+    "email": ["email", "e-mail", "mail", "email address"],
+    "address": ["address", "location", "office", "office address", "place", "where"],
+    "contact": ["contact", "reach", "get in touch", "phone", "email"],
+
+    # Time related
+    "hours": ["hours", "timing", "time", "schedule", "open", "close", "working hours"],
+    "appointment": ["appointment", "booking", "schedule", "reservation"],
+
+    # Common queries
+    "cost": ["cost", "price", "fee", "charge", "rate", "pricing"],
+    "service": ["service", "services", "offering", "offerings", "provide"],
+    "doctor": ["doctor", "physician", "dr", "specialist"],
+
+    # General
+    "website": ["website", "site", "web", "online", "url"],
+}
+
+
+def normalize_phrase(text: str) -> str:
+    """Lowercase and collapse whitespace so phrases and questions compare alike."""
+    return " ".join(text.lower().split())
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher over plain strings.
+
+    Build once with all patterns; ``find`` reports every (pattern_index,
+    start, end) occurrence in a single scan of the text.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = patterns
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(index)
+
+        # Breadth-first pass to set failure links and merge outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                if self._fail[next_state] == next_state:
+                    self._fail[next_state] = 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find(self, text: str) -> List[Tuple[int, int, int]]:
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index in self._output[state]:
+                end = position + 1
+                matches.append((index, end - len(self.patterns[index]), end))
+        return matches
+
+
+class SynonymMatcher:
+    """Compiled synonym dictionary for one tenant."""
+
+    def __init__(self, groups: Dict[str, List[str]]):
+        self.groups = [
+            list(dict.fromkeys(normalize_phrase(p) for p in [name] + list(synonyms) if p.strip()))
+            for name, synonyms in groups.items()
+        ]
+        phrase_groups: Dict[str, List[int]] = {}
+        for group_index, phrases in enumerate(self.groups):
+            for phrase in phrases:
+                phrase_groups.setdefault(phrase, []).append(group_index)
+        self._phrase_groups = phrase_groups
+        self._phrases = list(phrase_groups)
+        self._automaton = AhoCorasick(self._phrases)
+
+    @staticmethod
+    def _is_boundary(text: str, position: int) -> bool:
+        return position < 0 or position >= len(text) or not text[position].isalnum()
+
+    def matched_phrases(self, question: str) -> List[str]:
+        """Dictionary phrases that occur in the question as whole words."""
+        text = normalize_phrase(question)
+        found = []
+        for index, start, end in self._automaton.find(text):
+            if self._is_boundary(text, start - 1) and self._is_boundary(text, end):
+                found.append(self._phrases[index])
+        return list(dict.fromkeys(found))
+
+    def expand(self, question: str) -> List[str]:
+        """
+        Synonyms to add for keyword search: every phrase of each matched
+        group that the question doesn't already contain, in dictionary order.
+        """
+        matched = self.matched_phrases(question)
+        matched_set = set(matched)
+        expansions = []
+        for phrase in matched:
+            for group_index in self._phrase_groups[phrase]:
+                expansions.extend(p for p in self.groups[group_index] if p not in matched_set)
+        return list(dict.fromkeys(expansions))
+
+
+# =====================================================
+# PER-TENANT CACHE
+# =====================================================
+_DEFAULT_MATCHER: Optional[SynonymMatcher] = None
+_TENANT_MATCHERS: "OrderedDict[str, Tuple[float, SynonymMatcher]]" = OrderedDict()  # tenant -> (expires at, matcher)
+_MATCHERS_LOCK = threading.Lock()
+
+
+def get_default_matcher() -> SynonymMatcher:
+    global _DEFAULT_MATCHER
+    if _DEFAULT_MATCHER is None:
+        _DEFAULT_MATCHER = SynonymMatcher(DEFAULT_SYNONYM_GROUPS)
+    return _DEFAULT_MATCHER
+
+
+def load_tenant_synonym_groups(tenant_id: str) -> Dict[str, List[str]]:
+    """Synonym groups configured for a tenant (empty if none)."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "SELECT name, synonyms FROM tenant_synonym_groups WHERE tenant_id = %s ORDER BY name",
+            (tenant_id,),
+        )
+        return {name: list(synonyms or []) for name, synonyms in cur.fetchall()}
+    finally:
+        cur.close()
+        conn.close()
+
+
+def get_synonym_matcher(tenant_id: str) -> SynonymMatcher:
+    """
+    Compiled matcher for a tenant: its own groups layered over the defaults
+    (a tenant group with the same name replaces the default one).
+    """
+    now = time.monotonic()
+    with _MATCHERS_LOCK:
+        cached = _TENANT_MATCHERS.get(tenant_id)
+        if cached is not None and now < cached[0]:
+            _TENANT_MATCHERS.move_to_end(tenant_id)
+            return cached[1]
+
+    try:
+        tenant_groups = load_tenant_synonym_groups(tenant_id)
+    except Exception as e:
+        logger.warning(
+            f"Could not load synonyms for tenant {tenant_id}: {e}. "
+            f"Using defaults for {SYNONYM_ERROR_CACHE_SECONDS}s."
+        )
+        matcher, ttl = get_default_matcher(), SYNONYM_ERROR_CACHE_SECONDS
+    else:
+        matcher = SynonymMatcher({**DEFAULT_SYNONYM_GROUPS, **tenant_groups}) if tenant_groups else get_default_matcher()
+        ttl = SYNONYM_CACHE_TTL_SECONDS
+
+    with _MATCHERS_LOCK:
+        _TENANT_MATCHERS[tenant_id] = (now + ttl, matcher)
+        _TENANT_MATCHERS.move_to_end(tenant_id)
+        while len(_TENANT_MATCHERS) > SYNONYM_CACHE_MAX_TENANTS:
+            _TENANT_MATCHERS.popitem(last=False)
+    return matcher
+
+
+def invalidate_synonyms(tenant_id: Optional[str] = None) -> None:
+    """Drop cached matchers for one tenant (or all) in this process."""
+    with _MATCHERS_LOCK:
+        if tenant_id is None:
+            _TENANT_MATCHERS.clear()
+        else:
+            _TENANT_MATCHERS.pop(tenant_id, None)
+
+
+def expand_synonyms(tenant_id: str, question: str) -> List[str]:
+    """Synonym terms to add to the keyword search; never raises."""
+    try:
+        expansions = get_synonym_matcher(tenant_id).expand(question)
+        if expansions:
+            logger.debug(f"Synonym expansion for '{question}': {expansions}")
+        return expansions
+    except Exception as e:
+        logger.warning(f"Synonym expansion failed: {e}. Using original question.")
+        return []
@@ -0,0 +1,242 @@
+"""
+Native text extraction for plain-text, Markdown and HTML sources.
+
+Each format is read as a stream of paragraphs, grouped into "pages" of
+about ``TEXT_PAGE_CHARS`` characters and cleaned with ``clean_pdf_text``,
+so these files go through the same page -> chunk -> embed -> insert
+pipeline as PDFs (chunk page numbers are section numbers here). Nothing
+is parsed as PDF and no process pool is used; HTML is read with the
+standard library's ``html.parser``.
+
+- Plain text: paragraphs end at blank lines and at separator lines such
+  as ``=====`` (which also underline headings).
+- Markdown: ``#`` headings and fenced code blocks become paragraphs of
+  their own (code is kept as written, fence lines are dropped), and link,
+  image, emphasis and table syntax is stripped.
+- HTML: visible text only (no scripts or styles); block elements end a
+  paragraph and ``<title>`` is kept as metadata.
+"""
+import logging
+import os
+import re
+from html.parser import HTMLParser
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .pdf_extraction import clean_pdf_text
+
+# =====================================================
+# LOGGING SETUP
+# =====================================================
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIG
+# =====================================================
+TEXT_PAGE_CHARS = int(os.getenv("TEXT_PAGE_CHARS", "6000"))  # Characters per pseudo-page
+READ_CHUNK_CHARS = 64 * 1024  # HTML is fed to the parser this much at a time
+TEXT_ENCODING = "utf-8-sig"  # Drops a leading BOM; undecodable bytes are replaced
+
+RULE_LINE = re.compile(r'^\s*([=\-_*~#+])\1{2,}\s*$')
+MD_HEADING = re.compile(r'^ {0,3}#{1,6}\s+(.*?)(?:\s+#+)?\s*$')
+MD_FENCE = re.compile(r'^ {0,3}(```|~~~)')
+MD_TABLE_RULE = re.compile(r'^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$')
+MD_IMAGE = re.compile(r'!\[([^\]]*)\]\([^)]*\)')
+MD_LINK = re.compile(r'\[([^\]]+)\]\([^)]*\)')
+MD_EMPHASIS = re.compile(r'(?<!\w)(\*\*|__|\*|_|~~|`)(?=\S)(.+?)(?<=\S)\1(?!\w)')
+MD_QUOTE = re.compile(r'^\s*>\s?')
+MD_TAG = re.compile(r'</?[A-Za-z][^>]*>')
+
+
+# =====================================================
+# PARAGRAPHS
+# =====================================================
+def _strip_markdown(line: str) -> str:
+    line = MD_QUOTE.sub('', line)
+    line = MD_IMAGE.sub(r'\1', line)
+    line = MD_LINK.sub(r'\1', line)
+    line = MD_EMPHASIS.sub(r'\2', line)
+    line = MD_TAG.sub('', line)
+    return line.replace('|', ' ')
+
+
+def _line_paragraphs(lines: Iterable[str], markdown: bool = False) -> Iterator[str]:
+    """Group text lines into paragraphs; Markdown headings and code blocks are paragraphs of their own."""
+    current: List[str] = []
+    in_fence = False
+    for line in lines:
+        line = line.rstrip()
+        if markdown:
+            if MD_FENCE.match(line):
+                in_fence = not in_fence
+                if current:
+                    yield "\n".join(current)
+                    current = []
+                continue
+            if not in_fence:
+                if MD_TABLE_RULE.match(line):
+                    continue
+                heading = MD_HEADING.match(line)
+                if heading:
+                    if current:
+                        yield "\n".join(current)
+                        current = []
+                    if heading.group(1):
+                        yield _strip_markdown(heading.group(1))
+                    continue
+                line = _strip_markdown(line)
+        if not line.strip() or RULE_LINE.match(line):
+            if current:
+                yield "\n".join(current)
+                current = []
+            continue
+        current.append(line.strip())
+    if current:
+        yield "\n".join(current)
+
+
+class _HTMLTextParser(HTMLParser):
+    """Collects visible text as paragraphs; block elements end a paragraph."""
+
+    BLOCK_TAGS = {
+        'address', 'article', 'aside', 'blockquote', 'body', 'caption', 'dd', 'div', 'dl', 'dt',
+        'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+        'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'td', 'th',
+        'tr', 'ul',
+    }
+    SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'iframe', 'object'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.paragraphs: List[str] = []
+        self.title = ''
+        self._parts: List[str] = []
+        self._skip_depth = 0
+        self._in_title = False
+
+    def _end_paragraph(self) -> None:
+        text = " ".join("".join(self._parts).split())
+        self._parts = []
+        if text:
+            self.paragraphs.append(text)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == 'title':
+            self._in_title = True
+        elif tag in self.BLOCK_TAGS:
+            self._end_paragraph()
+        elif tag == 'br':
+            self._parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == 'title':
+            self._in_title = False
+        elif tag in self.BLOCK_TAGS:
+            self._end_paragraph()
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._in_title:
+            self.title += data
+        else:
+            self._parts.append(data)
+
+    def close(self):
+        super().close()
+        self._end_paragraph()
+        self.title = " ".join(self.title.split())
+
+    def pop_paragraphs(self) -> List[str]:
+        paragraphs, self.paragraphs = self.paragraphs, []
+        return paragraphs
+
+
+def _html_paragraphs(path: str, parser: Optional[_HTMLTextParser] = None) -> Iterator[str]:
+    parser = parser or _HTMLTextParser()
+    with open(path, encoding=TEXT_ENCODING, errors='replace') as file:
+        for block in iter(lambda: file.read(READ_CHUNK_CHARS), ''):
+            parser.feed(block)
+            yield from parser.pop_paragraphs()
+    parser.close()
+    yield from parser.pop_paragraphs()
+
+
+def iter_paragraphs(path: str, fmt: str, html_parser: Optional[_HTMLTextParser] = None) -> Iterator[str]:
+    """
+    Stream the paragraphs of a text file.
+
+    Args:
+        path: File path
+        fmt: ``text``, ``markdown`` or ``html``
+        html_parser: Parser to use for HTML (lets the caller read ``title``)
+    """
+    if fmt == 'html':
+        yield from _html_paragraphs(path, html_parser)
+        return
+    with open(path, encoding=TEXT_ENCODING, errors='replace') as file:
+        yield from _line_paragraphs(file, markdown=fmt == 'markdown')
+
+
+# =====================================================
+# PAGES
+# =====================================================
+def group_pages(paragraphs: Iterable[str], page_chars: int = TEXT_PAGE_CHARS) -> Iterator[str]:
+    """Join paragraphs into cleaned pages of at least ``page_chars`` characters (the last may be shorter)."""
+    page: List[str] = []
+    size = 0
+    for paragraph in paragraphs:
+        page.append(paragraph)
+        size += len(paragraph) + 2
+        if size >= page_chars:
+            yield clean_pdf_text("\n\n".join(page))
+            page, size = [], 0
+    if page:
+        yield clean_pdf_text("\n\n".join(page))
+
+
+def iter_text_pages(path: str, num_pages: Optional[int] = None, fmt: str = 'text') -> Iterator[str]:
+    """
+    Cleaned pages of a text, Markdown or HTML file, in order.
+
+    ``num_pages`` (from ``read_text_info``) is accepted so the signature
+    matches ``pdf_extraction.iter_pages``; pages are re-derived while
+    reading.
+    """
+    return group_pages(iter_paragraphs(path, fmt))
+
+
+def _markdown_title(path: str) -> str:
+    """Text of the first ``#`` heading (outside code fences), or empty."""
+    in_fence = False
+    with open(path, encoding=TEXT_ENCODING, errors='replace') as file:
+        for line in file:
+            if MD_FENCE.match(line):
+                in_fence = not in_fence
+                continue
+            heading = None if in_fence else MD_HEADING.match(line.rstrip())
+            if heading and heading.group(1):
+                return _strip_markdown(heading.group(1)).strip()
+    return ''
+
+
+def read_text_info(path: str, fmt: str = 'text') -> Tuple[int, Dict]:
+    """
+    Page count and title of a text, Markdown or HTML file.
+
+    The title is the HTML ``<title>`` or the first Markdown heading.
+    Counting pages reads the file once more than ingesting it does; text
+    sources are small next to their embedding cost.
+    """
+    html_parser = _HTMLTextParser() if fmt == 'html' else None
+    num_pages = sum(1 for _ in group_pages(iter_paragraphs(path, fmt, html_parser)))
+    if html_parser is not None:
+        title = html_parser.title
+    elif fmt == 'markdown':
+        title = _markdown_title(path)
+    else:
+        title = ''
+    return num_pages, {'title': title} if title else {}
@@ -0,0 +1,309 @@
+"""
+Lightweight per-request tracing for the chatbot pipeline.
+
+A ``Trace`` is opened per request (``start_trace``) and stored in a context
+variable, so pipeline stages can wrap themselves in ``span(...)`` without
+threading a tracer through every call. Spans record their duration and
+attributes (row counts, token counts, cache hits). When the trace finishes
+it is handed to the configured sinks:
+
+- ``log``        one JSON line per request on the ``solar_api.tracing`` logger
+- ``prometheus`` ``chatbot_stage_duration_seconds`` histogram per stage
+                 (requires ``prometheus_client``; exposed by whatever already
+                 serves the default registry)
+- ``otel``       OpenTelemetry spans, replayed with their recorded timestamps
+                 (requires ``opentelemetry-api`` and a configured SDK)
+
+Select sinks with ``CHATBOT_TRACE_SINKS`` (comma separated, default ``log``).
+When ``CHATBOT_TRACE_HEADER_ENABLED=true`` (off by default: traces expose
+internal timings and query details), clients can ask for the trace in the
+API response with the ``X-Debug-Trace: 1`` header.
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# =====================================================
+# LOGGING SETUP
+# =====================================================
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIG
+# =====================================================
+TRACE_SINKS = [s.strip() for s in os.getenv("CHATBOT_TRACE_SINKS", "log").split(",") if s.strip()]
+TRACE_HEADER_ENABLED = os.getenv("CHATBOT_TRACE_HEADER_ENABLED", "false").lower() == "true"
+TRACE_DEBUG_HEADER = "HTTP_X_DEBUG_TRACE"  # X-Debug-Trace as seen in request.META
+
+# =====================================================
+# GLOBALS
+# =====================================================
+_CURRENT_TRACE: contextvars.ContextVar = contextvars.ContextVar("chatbot_trace", default=None)
+_CURRENT_SPAN: contextvars.ContextVar = contextvars.ContextVar("chatbot_span", default=None)
+
+
+class Span:
+    """A timed pipeline stage."""
+
+    def __init__(self, name: str, start_ms: float, attributes: Optional[Dict] = None):
+        self.name = name
+        self.start_ms = start_ms
+        self.duration_ms: Optional[float] = None
+        self.attributes = dict(attributes or {})
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "start_ms": round(self.start_ms, 3),
+            "duration_ms": round(self.duration_ms or 0.0, 3),
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Returned by ``span`` when no trace is active."""
+
+    def set(self, **attributes) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """Spans recorded for one request."""
+
+    def __init__(self, name: str, **attributes):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attributes = attributes
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.spans: List[Span] = []
+        self._finished = False
+
+    def elapsed_ms(self, since: Optional[float] = None) -> float:
+        return ((since if since is not None else time.perf_counter()) - self._started) * 1000
+
+    @contextmanager
+    def active(self) -> Iterator["Trace"]:
+        """Make this the current trace for the enclosed block."""
+        token = _CURRENT_TRACE.set(self)
+        try:
+            yield self
+        finally:
+            _CURRENT_TRACE.reset(token)
+
+    def add_span(self, name: str, started: float, **attributes) -> Span:
+        """Record a span that started at ``started`` (perf_counter) and ends now."""
+        span_ = Span(name, self.elapsed_ms(started), attributes)
+        span_.duration_ms = (time.perf_counter() - started) * 1000
+        self.spans.append(span_)
+        return span_
+
+    def finish(self) -> None:
+        """Close the trace and export it (once)."""
+        if self._finished:
+            return
+        self._finished = True
+        self.duration_ms = self.elapsed_ms()
+        for sink in get_sinks():
+            try:
+                sink.export(self)
+            except Exception as e:
+                logger.warning(f"Trace sink {type(sink).__name__} failed: {e}")
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms if self.duration_ms is not None else self.elapsed_ms(), 3),
+            "attributes": self.attributes,
+            "spans": [s.to_dict() for s in self.spans],
+        }
+
+
+@contextmanager
+def start_trace(name: str, **attributes) -> Iterator[Trace]:
+    """Open a trace for the enclosed block and export it on exit."""
+    trace = Trace(name, **attributes)
+    with trace.active():
+        try:
+            yield trace
+        finally:
+            trace.finish()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time the enclosed block as a span of the current trace.
+
+    Yields an object with ``set(**attributes)``; without an active trace
+    this is a no-op.
+    """
+    trace = _CURRENT_TRACE.get()
+    if trace is None:
+        yield _NOOP_SPAN
+        return
+
+    started = time.perf_counter()
+    span_ = Span(name, trace.elapsed_ms(started), attributes)
+    token = _CURRENT_SPAN.set(span_)
+    try:
+        yield span_
+    except BaseException as e:
+        span_.set(error=type(e).__name__)
+        raise
+    finally:
+        _CURRENT_SPAN.reset(token)
+        span_.duration_ms = (time.perf_counter() - started) * 1000
+        trace.spans.append(span_)
+
+
+def annotate(**attributes) -> None:
+    """Add attributes to the innermost active span (no-op outside a span)."""
+    span_ = _CURRENT_SPAN.get()
+    if span_ is not None:
+        span_.set(**attributes)
+
+
+def annotate_trace(**attributes) -> None:
+    """Add request-level attributes to the current trace."""
+    trace = _CURRENT_TRACE.get()
+    if trace is not None:
+        trace.attributes.update(attributes)
+
+
+def current_trace() -> Optional[Trace]:
+    return _CURRENT_TRACE.get()
+
+
+def wants_trace(request) -> bool:
+    """True if the client asked for the trace in the response."""
+    return TRACE_HEADER_ENABLED and request.META.get(TRACE_DEBUG_HEADER, "").lower() in ("1", "true", "yes")
+
+
+# =====================================================
+# SINKS
+# =====================================================
+class TraceSink(ABC):
+    """Receives every finished trace."""
+
+    @abstractmethod
+    def export(self, trace: Trace) -> None:
+        """Record one finished trace."""
+
+
+class LogJSONSink(TraceSink):
+    """One JSON line per trace."""
+
+    def __init__(self):
+        self.logger = logging.getLogger("solar_api.tracing")
+
+    def export(self, trace: Trace) -> None:
+        self.logger.info(json.dumps(trace.to_dict(), default=str))
+
+
+class PrometheusSink(TraceSink):
+    """Stage latency histograms and a cache hit counter."""
+
+    def __init__(self):
+        from prometheus_client import Counter, Histogram
+
+        self.stage_seconds = Histogram(
+            "chatbot_stage_duration_seconds",
+            "Duration of chatbot pipeline stages",
+            ["trace", "stage"],
+        )
+        self.cache_lookups = Counter(
+            "chatbot_answer_cache_lookups_total",
+            "Semantic answer cache lookups",
+            ["result"],
+        )
+
+    def export(self, trace: Trace) -> None:
+        self.stage_seconds.labels(trace.name, "total").observe(trace.duration_ms / 1000)
+        for span_ in trace.spans:
+            self.stage_seconds.labels(trace.name, span_.name).observe((span_.duration_ms or 0.0) / 1000)
+            if span_.name == "cache_lookup" and "hit" in span_.attributes:
+                self.cache_lookups.labels("hit" if span_.attributes["hit"] else "miss").inc()
+
+
+class OpenTelemetrySink(TraceSink):
+    """Replays the trace as OpenTelemetry spans with the recorded timings."""
+
+    def __init__(self):
+        from opentelemetry import trace as otel_trace
+
+        self._otel = otel_trace
+        self.tracer = otel_trace.get_tracer("solar_api.chatbot")
+
+    def export(self, trace: Trace) -> None:
+        start_ns = int(trace.started_at * 1e9)
+        root = self.tracer.start_span(
+            trace.name, start_time=start_ns, attributes=self._attributes(trace.attributes)
+        )
+        context = self._otel.set_span_in_context(root)
+        for span_ in trace.spans:
+            child_start = start_ns + int(span_.start_ms * 1e6)
+            child = self.tracer.start_span(
+                span_.name, context=context, start_time=child_start,
+                attributes=self._attributes(span_.attributes),
+            )
+            child.end(end_time=child_start + int((span_.duration_ms or 0.0) * 1e6))
+        root.end(end_time=start_ns + int(trace.duration_ms * 1e6))
+
+    @staticmethod
+    def _attributes(attributes: Dict) -> Dict:
+        return {
+            k: v if isinstance(v, (bool, int, float, str)) else str(v)
+            for k, v in attributes.items() if v is not None
+        }
+
+
+SINK_FACTORIES = {
+    "log": LogJSONSink,
+    "prometheus": PrometheusSink,
+    "otel": OpenTelemetrySink,
+}
+
+_SINKS: Optional[List[TraceSink]] = None
+_SINKS_LOCK = threading.Lock()
+
+
+def get_sinks() -> List[TraceSink]:
+    """Sinks named in CHATBOT_TRACE_SINKS; unavailable ones are skipped with a warning."""
+    global _SINKS
+    if _SINKS is None:
+        with _SINKS_LOCK:
+            if _SINKS is None:
+                sinks = []
+                for name in TRACE_SINKS:
+                    factory = SINK_FACTORIES.get(name)
+                    if factory is None:
+                        logger.warning(f"Unknown trace sink '{name}' (expected one of {sorted(SINK_FACTORIES)})")
+                        continue
+                    try:
+                        sinks.append(factory())
+                    except ImportError as e:
+                        logger.warning(f"Trace sink '{name}' unavailable: {e}")
+                _SINKS = sinks
+    return _SINKS
+
+
+def register_sink(sink: TraceSink) -> None:
+    """Add a custom sink at runtime."""
+    get_sinks().append(sink)
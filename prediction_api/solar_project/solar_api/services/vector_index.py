@@ -0,0 +1,361 @@
+"""
+Vector search outside pgvector.
+
+``CHATBOT_VECTOR_BACKEND`` selects where tenant chunks are searched:
+
+- ``pgvector`` (default): the ``documents`` table, no local state
+- ``memory``: an in-process NumPy index for small tenants (this module)
+- ``faiss``: an on-disk FAISS index per tenant (see ``ann_index``)
+
+Both local backends implement ``VectorIndex`` and are served through a
+``VectorIndexCache``; retrieval falls back to pgvector whenever
+``get_tenant_index`` returns None.
+
+In-memory backend
+-----------------
+
+Tenants with one or two PDFs hold a few hundred chunks; for them a round
+trip to Postgres costs more than the search itself. With
+``CHATBOT_VECTOR_BACKEND=memory`` each such tenant's active chunks are loaded
+once into a contiguous float32 matrix and searched with a dot product and
+``argpartition`` top-k. The keyword fallback is answered from the same
+in-memory chunks, so a warm request needs no retrieval query at all.
+
+- Indexes load lazily on the tenant's first question and are keyed by the
+  tenant content version: any ingestion bump triggers a reload.
+- Tenants above ``MEMORY_INDEX_MAX_CHUNKS`` stay on pgvector.
+- Resident indexes are capped at ``MEMORY_INDEX_MAX_MB`` per process, with
+  least recently used tenants evicted first.
+- Evicted or replaced indexes are closed ``INDEX_CLOSE_GRACE_SECONDS``
+  later, once requests still holding them are done.
+"""
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .context_packer import ScoredRow
+from .rag_shared import get_db_connection, get_tenant_content_version
+
+# =====================================================
+# LOGGING SETUP
+# =====================================================
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIG
+# =====================================================
+VECTOR_BACKEND = os.getenv("CHATBOT_VECTOR_BACKEND", "pgvector").lower()  # pgvector | memory | faiss
+MEMORY_INDEX_MAX_CHUNKS = int(os.getenv("CHATBOT_MEMORY_INDEX_MAX_CHUNKS", "20000"))  # Larger tenants use pgvector
+MEMORY_INDEX_MAX_MB = int(os.getenv("CHATBOT_MEMORY_INDEX_MAX_MB", "256"))  # Per process, all tenants
+# How long a loaded index is trusted without re-reading the content version,
+# when the caller has not already read it (other workers may have ingested).
+MEMORY_INDEX_REVALIDATE_SECONDS = float(os.getenv("CHATBOT_MEMORY_INDEX_REVALIDATE_SECONDS", "2"))
+KEYWORD_ROWS_PER_TERM = 3  # Same cap as the SQL keyword search
+# Evicted or replaced indexes are closed after this long, so requests that
+# fetched them just before stay able to search them.
+INDEX_CLOSE_GRACE_SECONDS = 30.0
+
+
+class VectorIndex(ABC):
+    """A tenant's chunks searchable without a database round trip."""
+
+    backend = ""
+    version = 0
+    nbytes = 0
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of chunks in the index."""
+
+    @abstractmethod
+    def search(self, query_embedding: List[float], top_k: int) -> List[ScoredRow]:
+        """Top-k chunks by cosine similarity, best first."""
+
+    @abstractmethod
+    def keyword_search(
+        self,
+        keywords: List[str],
+        query_embedding: List[float],
+        rows_per_term: int = KEYWORD_ROWS_PER_TERM,
+    ) -> List[ScoredRow]:
+        """Equivalent of the SQL ``ILIKE '%term%'`` keyword fallback."""
+
+    def close(self) -> None:
+        """Release files or connections held by the index (nothing by default)."""
+
+
+def normalize_vector(embedding: List[float]) -> np.ndarray:
+    """Query embedding as a unit-length float32 vector."""
+    query = np.asarray(embedding, dtype=np.float32)
+    return query / max(float(np.linalg.norm(query)), 1e-12)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Row-wise L2 normalization as a contiguous float32 matrix."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.ascontiguousarray(matrix / np.maximum(norms, 1e-12), dtype=np.float32)
+
+
+def parse_vector(text: str) -> np.ndarray:
+    """Parse a pgvector text literal ("[0.1,0.2,...]")."""
+    return np.array(text.strip("[]").split(","), dtype=np.float32)
+
+
+class TenantVectorIndex(VectorIndex):
+    """One tenant's active chunks with their embeddings as a float32 matrix."""
+
+    backend = "memory"
+
+    def __init__(self, contents: List[str], sources: List[str], matrix: np.ndarray, version: int):
+        self.contents = contents
+        self.sources = sources
+        self._lowered = [c.lower() for c in contents]
+        # L2-normalize so the dot product equals pgvector's cosine similarity
+        self.matrix = normalize_rows(matrix)
+        self.version = version
+        # Matrix plus a rough size for the texts (kept twice: original and lowered)
+        self.nbytes = self.matrix.nbytes + sum(len(c) for c in contents) * 2 + sum(len(s) for s in sources)
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+    def search(self, query_embedding: List[float], top_k: int) -> List[ScoredRow]:
+        if not self.contents or top_k <= 0:
+            return []
+        scores = self.matrix @ normalize_vector(query_embedding)
+        if top_k < len(scores):
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.contents[i], self.sources[i], float(scores[i])) for i in top]
+
+    def keyword_search(
+        self,
+        keywords: List[str],
+        query_embedding: List[float],
+        rows_per_term: int = KEYWORD_ROWS_PER_TERM,
+    ) -> List[ScoredRow]:
+        if not keywords:
+            return []
+        query = normalize_vector(query_embedding)
+        rows = []
+        for kw in keywords:
+            term = kw.lower()
+            hits = [i for i, text in enumerate(self._lowered) if term in text][:rows_per_term]
+            rows.extend((self.contents[i], self.sources[i], float(self.matrix[i] @ query)) for i in hits)
+        return rows
+
+
+def count_tenant_chunks(cur, tenant_id: str) -> int:
+    cur.execute("""
+        SELECT COUNT(*)
+        FROM documents d
+        JOIN pages p ON d.page_url = p.url AND d.tenant_id = p.tenant_id
+        WHERE p.is_active = TRUE
+          AND p.tenant_id = %s
+    """, (tenant_id,))
+    return cur.fetchone()[0]
+
+
+def load_tenant_index(tenant_id: str, version: int, max_chunks: int = MEMORY_INDEX_MAX_CHUNKS) -> Optional[TenantVectorIndex]:
+    """
+    Read a tenant's active chunks into a ``TenantVectorIndex``.
+
+    Returns None when the tenant has more than ``max_chunks`` chunks.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        total = count_tenant_chunks(cur, tenant_id)
+        if total > max_chunks:
+            logger.info(f"Tenant {tenant_id} has {total} chunks; staying on pgvector")
+            return None
+
+        cur.execute("""
+            SELECT d.content, d.source, d.embedding::text
+            FROM documents d
+            JOIN pages p ON d.page_url = p.url AND d.tenant_id = p.tenant_id
+            WHERE p.is_active = TRUE
+              AND p.tenant_id = %s
+            ORDER BY d.id
+        """, (tenant_id,))
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+
+    contents = [r[0] for r in rows]
+    sources = [r[1] for r in rows]
+    vectors = [parse_vector(r[2]) for r in rows]
+    matrix = np.vstack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+    return TenantVectorIndex(contents, sources, matrix, version)
+
+
+class VectorIndexCache:
+    """
+    Process-wide LRU of tenant indexes, bounded by total bytes.
+
+    ``loader(tenant_id, version, max_chunks)`` builds a tenant's index or
+    returns None for tenants that should stay on pgvector; those are
+    remembered per content version so they are not re-checked on every
+    request.
+
+    Indexes that are evicted or replaced by a newer version are closed
+    ``INDEX_CLOSE_GRACE_SECONDS`` later rather than immediately, since a
+    request may have fetched one just before.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str, int, int], Optional[VectorIndex]],
+        max_bytes: int,
+        max_chunks: int,
+        revalidate_seconds: float,
+    ):
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.max_chunks = max_chunks
+        self.revalidate_seconds = revalidate_seconds
+        self._lock = threading.Lock()
+        self._indexes: "OrderedDict[str, VectorIndex]" = OrderedDict()
+        self._checked_at: Dict[str, float] = {}
+        self._too_large: Dict[str, int] = {}  # tenant_id -> content version
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._retired: List[Tuple[float, VectorIndex]] = []  # (discarded at, index), oldest first
+        self._bytes = 0
+
+    def get(self, tenant_id: str, version: Optional[int] = None) -> Optional[VectorIndex]:
+        """
+        Index for the tenant at its current content version, loading it if
+        needed; None if the tenant should be served by pgvector.
+
+        Args:
+            tenant_id: Tenant identifier
+            version: Current content version if the caller already read it
+        """
+        now = time.monotonic()
+        if version is None:
+            with self._lock:
+                index = self._indexes.get(tenant_id)
+                if index is not None and now - self._checked_at.get(tenant_id, 0.0) < self.revalidate_seconds:
+                    self._indexes.move_to_end(tenant_id)
+                    return index
+            version = get_tenant_content_version(tenant_id)
+
+        with self._lock:
+            self._close_retired()
+            if self._too_large.get(tenant_id) == version:
+                return None
+            index = self._indexes.get(tenant_id)
+            if index is not None and index.version == version:
+                self._indexes.move_to_end(tenant_id)
+                self._checked_at[tenant_id] = now
+                return index
+            load_lock = self._load_locks.setdefault(tenant_id, threading.Lock())
+
+        # One loader per tenant; concurrent requests wait for it
+        with load_lock:
+            with self._lock:
+                index = self._indexes.get(tenant_id)
+                if index is not None and index.version == version:
+                    return index
+
+            started = time.perf_counter()
+            index = self.loader(tenant_id, version, self.max_chunks)
+            with self._lock:
+                if index is None or index.nbytes > self.max_bytes:
+                    self._too_large[tenant_id] = version
+                    self._discard(tenant_id)
+                    return None
+                self._discard(tenant_id)
+                self._indexes[tenant_id] = index
+                self._checked_at[tenant_id] = time.monotonic()
+                self._bytes += index.nbytes
+                self._too_large.pop(tenant_id, None)
+                while self._bytes > self.max_bytes and len(self._indexes) > 1:
+                    evicted_id, _ = next(iter(self._indexes.items()))
+                    self._discard(evicted_id)
+                    logger.info(f"Evicted vector index for tenant {evicted_id}")
+
+        logger.info(
+            f"Loaded {index.backend} vector index for tenant {tenant_id}: {len(index)} chunks, "
+            f"{index.nbytes / 1e6:.1f} MB in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        return index
+
+    def _discard(self, tenant_id: str) -> None:
+        """Remove a tenant's index and schedule it for closing; caller holds ``_lock``."""
+        index = self._indexes.pop(tenant_id, None)
+        if index is not None:
+            self._bytes -= index.nbytes
+            self._retired.append((time.monotonic(), index))
+        self._checked_at.pop(tenant_id, None)
+
+    def _close_retired(self) -> None:
+        """Close indexes discarded more than the grace period ago; caller holds ``_lock``."""
+        cutoff = time.monotonic() - INDEX_CLOSE_GRACE_SECONDS
+        while self._retired and self._retired[0][0] <= cutoff:
+            _, index = self._retired.pop(0)
+            try:
+                index.close()
+            except Exception as e:
+                logger.warning(f"Failed to close {index.backend} vector index: {e}")
+
+    def invalidate(self, tenant_id: Optional[str] = None) -> None:
+        """Drop one tenant's index (or all) in this process."""
+        with self._lock:
+            if tenant_id is None:
+                for cached_id in list(self._indexes):
+                    self._discard(cached_id)
+                self._too_large.clear()
+            else:
+                self._discard(tenant_id)
+                self._too_large.pop(tenant_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "tenants": len(self._indexes),
+                "chunks": sum(len(i) for i in self._indexes.values()),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_index_cache = VectorIndexCache(
+    load_tenant_index,
+    max_bytes=MEMORY_INDEX_MAX_MB * 1024 * 1024,
+    max_chunks=MEMORY_INDEX_MAX_CHUNKS,
+    revalidate_seconds=MEMORY_INDEX_REVALIDATE_SECONDS,
+)
+
+
+def get_index_cache() -> Optional[VectorIndexCache]:
+    """Tenant index cache of the configured backend (None for pgvector)."""
+    if VECTOR_BACKEND == "memory":
+        return _index_cache
+    if VECTOR_BACKEND == "faiss":
+        from .ann_index import get_local_index_cache
+
+        return get_local_index_cache()
+    return None
+
+
+def get_tenant_index(tenant_id: str, version: Optional[int] = None) -> Optional[VectorIndex]:
+    """
+    Local index for the tenant, or None to use pgvector (backend not
+    enabled, tenant too large, or the index could not be loaded). Never raises.
+    """
+    try:
+        cache = get_index_cache()
+        return cache.get(tenant_id, version) if cache is not None else None
+    except Exception as e:
+        logger.warning(f"{VECTOR_BACKEND} vector index unavailable for tenant {tenant_id}: {e}. Using pgvector.")
+        return None
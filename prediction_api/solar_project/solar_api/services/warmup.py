@@ -0,0 +1,174 @@
+"""
+Worker warm-up: load every model a request might need before the worker is
+reported ready, and record how long each component took.
+
+Run from the gunicorn ``post_fork`` hook (see gunicorn.conf.py) or lazily on
+the first readiness probe. Until all required components are warm the
+readiness endpoint answers 503, so load balancers keep traffic away from
+workers that would still pay model-loading latency.
+"""
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple
+
+# =====================================================
+# LOGGING SETUP
+# =====================================================
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIG
+# =====================================================
+# Representative inputs so the first real encode hits already-allocated buffers
+WARMUP_QUERY = "search_query: How much does a rooftop solar system cost?"
+WARMUP_DOCUMENT = "search_document: " + " ".join(["solar panel installation subsidy warranty"] * 40)
+WARMUP_DOCUMENT_BATCH = int(os.getenv("WARMUP_DOCUMENT_BATCH", "8"))
+
+
+class WarmupComponent(NamedTuple):
+    """A named warm-up step; optional components don't block readiness."""
+    name: str
+    func: Callable[[], None]
+    required: bool
+
+
+# =====================================================
+# COMPONENTS
+# =====================================================
+def _warm_embedder() -> None:
+    from .rag_shared import EMBEDDING_SERVER_URL, encode_texts, get_embedder
+
+    if not EMBEDDING_SERVER_URL:
+        get_embedder()
+    # Query-sized and batch-sized passes (or a round trip to the embedding server)
+    encode_texts([WARMUP_QUERY])
+    encode_texts([WARMUP_DOCUMENT] * WARMUP_DOCUMENT_BATCH, batch_size=WARMUP_DOCUMENT_BATCH)
+
+
+def _warm_view_service(module_path: str, attribute: str, model_attributes: List[str]) -> Callable[[], None]:
+    """Import a view module (which instantiates its service) and check its models loaded."""
+    def warm() -> None:
+        service = getattr(importlib.import_module(module_path), attribute)
+        missing = [a for a in model_attributes if getattr(service, a, None) is None]
+        if missing:
+            raise RuntimeError(f"{attribute} models failed to load: {', '.join(missing)}")
+    return warm
+
+
+def _warm_tokenizer() -> None:
+    from .context_packer import count_tokens
+
+    count_tokens(WARMUP_QUERY)
+
+
+def _warm_reranker() -> None:
+    from .reranker import warm_up_reranker
+
+    warm_up_reranker()
+
+
+def _warm_llm_client() -> None:
+    from .llm_client import get_llm_manager
+
+    get_llm_manager().ensure_configured()
+
+
+_COMPONENTS: List[WarmupComponent] = [
+    WarmupComponent("embedder", _warm_embedder, True),
+    WarmupComponent(
+        "solar_generation_model",
+        _warm_view_service("solar_api.views.solar_gen_prediction_view", "prediction_service", ["model"]),
+        True,
+    ),
+    WarmupComponent(
+        "bill_prediction_models",
+        _warm_view_service(
+            "solar_api.views.bill_prediction_view", "bill_service", ["general_model", "high_usage_model"]
+        ),
+        True,
+    ),
+    WarmupComponent("tokenizer", _warm_tokenizer, False),
+    # Optional: until it is loaded, reranking just falls back to retrieval order
+    WarmupComponent("reranker", _warm_reranker, False),
+    WarmupComponent("llm_client", _warm_llm_client, False),
+]
+
+
+def register_warmup_component(name: str, func: Callable[[], None], required: bool = True) -> None:
+    """Add a component to the warm-up sequence (e.g. a newly introduced model)."""
+    _COMPONENTS.append(WarmupComponent(name, func, required))
+
+
+# =====================================================
+# STATE
+# =====================================================
+_LOCK = threading.Lock()
+_STATE: Dict = {
+    "status": "pending",  # pending -> warming -> ready | failed
+    "total_seconds": None,
+    "components": {},
+}
+
+
+def warm_up() -> Dict:
+    """
+    Run every registered warm-up component once (idempotent, thread-safe).
+
+    Returns:
+        Warm-up status dict (see ``get_warmup_status``)
+    """
+    with _LOCK:
+        if _STATE["status"] != "pending":
+            return get_warmup_status()
+        _STATE["status"] = "warming"
+
+    started = time.perf_counter()
+    all_required_ok = True
+
+    for component in _COMPONENTS:
+        component_started = time.perf_counter()
+        try:
+            component.func()
+            result = {"status": "ok"}
+        except Exception as e:
+            logger.error(f"Warm-up of {component.name} failed: {e}", exc_info=True)
+            result = {"status": "error", "error": str(e)}
+            all_required_ok = all_required_ok and not component.required
+        result["seconds"] = round(time.perf_counter() - component_started, 3)
+        result["required"] = component.required
+        with _LOCK:
+            _STATE["components"][component.name] = result
+        logger.info(f"Warm-up {component.name}: {result['status']} in {result['seconds']}s")
+
+    with _LOCK:
+        _STATE["total_seconds"] = round(time.perf_counter() - started, 3)
+        _STATE["status"] = "ready" if all_required_ok else "failed"
+    logger.info(f"Worker warm-up {_STATE['status']} in {_STATE['total_seconds']}s (pid {os.getpid()})")
+    return get_warmup_status()
+
+
+def start_warm_up_in_background() -> None:
+    """Kick off ``warm_up`` on a daemon thread if it has not started yet."""
+    with _LOCK:
+        if _STATE["status"] != "pending":
+            return
+    threading.Thread(target=warm_up, name="worker-warmup", daemon=True).start()
+
+
+def is_ready() -> bool:
+    return _STATE["status"] == "ready"
+
+
+def get_warmup_status() -> Dict:
+    """Snapshot of the warm-up state with per-component timings."""
+    with _LOCK:
+        return {
+            "status": _STATE["status"],
+            "ready": _STATE["status"] == "ready",
+            "pid": os.getpid(),
+            "total_seconds": _STATE["total_seconds"],
+            "components": {name: dict(result) for name, result in _STATE["components"].items()},
+        }
@@ -0,0 +1,106 @@
+"""
+Semantic answer cache: similarity threshold, content versions and eviction.
+"""
+import unittest
+from unittest import mock
+
+try:
+    import numpy as np
+
+    from .services import chatbot_service
+    from .services.chatbot_service import CachedAnswer, SemanticAnswerCache
+except ImportError as e:  # numpy, groq or the retrieval stack not installed
+    raise unittest.SkipTest(f"Chatbot service unavailable: {e}")
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+WARRANTY = unit(1.0, 0.0, 0.0)
+WARRANTY_REPHRASED = unit(1.0, 0.1, 0.0)  # Cosine ~0.995
+PRICING = unit(0.0, 1.0, 0.0)
+INSTALLATION = unit(0.0, 0.0, 1.0)
+
+
+class SemanticAnswerCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = 1000.0
+        patcher = mock.patch.object(chatbot_service.time, "monotonic", side_effect=lambda: self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = SemanticAnswerCache(threshold=0.95, max_entries=2, max_tenants=2, ttl_seconds=60)
+
+    def test_hit_above_threshold_returns_answer_and_sources(self):
+        self.cache.store("t1", WARRANTY, "Panels carry 25 years.", version=1, sources=["file://warranty.pdf"])
+
+        self.assertEqual(
+            self.cache.lookup("t1", WARRANTY_REPHRASED, version=1),
+            CachedAnswer("Panels carry 25 years.", ["file://warranty.pdf"]),
+        )
+
+    def test_miss_below_threshold(self):
+        self.cache.store("t1", WARRANTY, "Panels carry 25 years.", version=1)
+
+        self.assertIsNone(self.cache.lookup("t1", unit(1.0, 0.5, 0.0), version=1))  # Cosine ~0.89
+        self.assertIsNone(self.cache.lookup("t1", PRICING, version=1))
+
+    def test_tenants_do_not_share_answers(self):
+        self.cache.store("t1", WARRANTY, "Panels carry 25 years.", version=1)
+        self.assertIsNone(self.cache.lookup("t2", WARRANTY, version=1))
+
+    def test_version_bump_misses_and_drops_old_answers(self):
+        self.cache.store("t1", WARRANTY, "Panels carry 25 years.", version=1)
+
+        self.assertIsNone(self.cache.lookup("t1", WARRANTY, version=2))
+        # The stale bucket is gone, even for a caller still on the old version
+        self.assertIsNone(self.cache.lookup("t1", WARRANTY, version=1))
+
+    def test_store_under_a_new_version_replaces_old_answers(self):
+        self.cache.store("t1", WARRANTY, "Panels carry 25 years.", version=1)
+        self.cache.store("t1", PRICING, "From 1500 per kW.", version=2)
+
+        self.assertIsNone(self.cache.lookup("t1", WARRANTY, version=2))
+        self.assertEqual(self.cache.lookup("t1", PRICING, version=2).text, "From 1500 per kW.")
+
+    def test_entries_expire_after_the_ttl(self):
+        self.cache.store("t1", WARRANTY, "Panels carry 25 years.", version=1)
+
+        self.clock += 60
+        self.assertIsNotNone(self.cache.lookup("t1", WARRANTY, version=1))
+        self.clock += 1
+        self.assertIsNone(self.cache.lookup("t1", WARRANTY, version=1))
+
+    def test_least_recently_used_entry_is_evicted_per_tenant(self):
+        self.cache.store("t1", WARRANTY, "warranty", version=1)
+        self.cache.store("t1", PRICING, "pricing", version=1)
+        self.cache.lookup("t1", WARRANTY, version=1)  # Pricing is now the oldest
+        self.cache.store("t1", INSTALLATION, "installation", version=1)
+
+        self.assertIsNone(self.cache.lookup("t1", PRICING, version=1))
+        self.assertEqual(self.cache.lookup("t1", WARRANTY, version=1).text, "warranty")
+        self.assertEqual(self.cache.lookup("t1", INSTALLATION, version=1).text, "installation")
+
+    def test_least_recently_used_tenant_is_evicted(self):
+        self.cache.store("t1", WARRANTY, "t1 warranty", version=1)
+        self.cache.store("t2", WARRANTY, "t2 warranty", version=1)
+        self.cache.lookup("t1", WARRANTY, version=1)  # t2 is now the oldest
+        self.cache.store("t3", WARRANTY, "t3 warranty", version=1)
+
+        self.assertIsNone(self.cache.lookup("t2", WARRANTY, version=1))
+        self.assertEqual(self.cache.lookup("t1", WARRANTY, version=1).text, "t1 warranty")
+        self.assertEqual(self.cache.lookup("t3", WARRANTY, version=1).text, "t3 warranty")
+
+    def test_invalidate_drops_only_that_tenant(self):
+        self.cache.store("t1", WARRANTY, "t1 warranty", version=1)
+        self.cache.store("t2", WARRANTY, "t2 warranty", version=1)
+
+        self.cache.invalidate("t1")
+
+        self.assertIsNone(self.cache.lookup("t1", WARRANTY, version=1))
+        self.assertIsNotNone(self.cache.lookup("t2", WARRANTY, version=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
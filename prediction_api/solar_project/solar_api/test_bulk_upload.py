@@ -0,0 +1,135 @@
+"""
+Staging of bulk uploads (loose files and ZIP archives) before they are queued.
+
+Archives are untrusted input: member paths are flattened, sizes are checked
+against the bytes actually written and the entry count is capped.
+"""
+import io
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import uuid
+import zipfile
+from unittest import mock
+
+try:
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.test import SimpleTestCase, override_settings
+
+    from .services import ingestion_queue
+    from .services.ingestion_queue import stage_bulk_upload
+except ImportError as e:  # Django or the ingestion stack not installed
+    raise unittest.SkipTest(f"Ingestion queue unavailable: {e}")
+
+
+def zip_upload(members, name="docs.zip"):
+    """In-memory ZIP upload of ``{member name: bytes}`` (stored, uncompressed)."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as zf:
+        for member, data in members.items():
+            zf.writestr(member, data)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="application/zip")
+
+
+def understate_sizes(data: bytes, declared: int) -> bytes:
+    """Rewrite every member's uncompressed size in a ZIP to ``declared``."""
+    data = bytearray(data)
+    for signature, offset in ((b"PK\x03\x04", 22), (b"PK\x01\x02", 24)):
+        start = data.find(signature)
+        while start != -1:
+            struct.pack_into("<I", data, start + offset, declared)
+            start = data.find(signature, start + 4)
+    return bytes(data)
+
+
+class StageBulkUploadTests(SimpleTestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.job_id = uuid.uuid4()
+        self.job_dir = os.path.join(self.media_root, ingestion_queue.INGESTION_UPLOAD_DIR, str(self.job_id))
+
+    def limit(self, name, value):
+        patcher = mock.patch.object(ingestion_queue, name, value)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stage(self, members=None, files=()):
+        archive = zip_upload(members) if members is not None else None
+        return stage_bulk_upload(self.job_id, list(files), archive)
+
+    def test_loose_files_and_archive_members_are_staged(self):
+        accepted, skipped = self.stage(
+            {"faq.md": b"# FAQ\n\nAnswers.", "notes.exe": b"MZ"},
+            files=[SimpleUploadedFile("guide.txt", b"Panel guide.")],
+        )
+
+        self.assertEqual(sorted(f["name"] for f in accepted), ["faq.md", "guide.txt"])
+        self.assertEqual(skipped, [{"name": "notes.exe", "reason": "unsupported file type"}])
+        for f in accepted:
+            self.assertEqual(os.path.dirname(f["path"]), self.job_dir)
+            self.assertTrue(os.path.exists(f["path"]))
+
+    def test_parent_directory_members_stay_in_the_job_directory(self):
+        accepted, skipped = self.stage({"../../escape.txt": b"outside?", "a/../../b/deep.txt": b"deep"})
+
+        self.assertEqual(skipped, [])
+        self.assertEqual(sorted(f["name"] for f in accepted), ["deep.txt", "escape.txt"])
+        for f in accepted:
+            self.assertEqual(os.path.dirname(f["path"]), self.job_dir)
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, "escape.txt")))
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, ingestion_queue.INGESTION_UPLOAD_DIR, "escape.txt")))
+
+    def test_member_larger_than_declared_is_skipped(self):
+        self.limit("BULK_MAX_FILE_BYTES", 1000)
+        upload = zip_upload({"big.txt": b"x" * 5000})
+        archive = SimpleUploadedFile("docs.zip", understate_sizes(upload.read(), 100))
+
+        accepted, skipped = stage_bulk_upload(self.job_id, [], archive)
+
+        self.assertEqual(accepted, [])
+        self.assertEqual([s["name"] for s in skipped], ["big.txt"])
+        self.assertFalse(os.path.exists(os.path.join(self.job_dir, "big.txt")))
+
+    def test_member_over_the_file_limit_is_skipped(self):
+        self.limit("BULK_MAX_FILE_BYTES", 1000)
+        accepted, skipped = self.stage({"big.txt": b"x" * 5000, "small.txt": b"x" * 10})
+
+        self.assertEqual([f["name"] for f in accepted], ["small.txt"])
+        self.assertEqual([s["name"] for s in skipped], ["big.txt"])
+
+    def test_too_many_entries_rejects_the_archive(self):
+        self.limit("BULK_MAX_ARCHIVE_ENTRIES", 3)
+        with self.assertRaisesRegex(ValueError, "more than 3 entries"):
+            self.stage({f"doc{i}.txt": b"text" for i in range(4)})
+
+    def test_duplicate_names_keep_the_first(self):
+        accepted, skipped = self.stage({"a/doc.txt": b"first", "b/doc.txt": b"second"})
+
+        self.assertEqual([f["name"] for f in accepted], ["doc.txt"])
+        self.assertEqual(skipped, [{"name": "doc.txt", "reason": "duplicate file name"}])
+        with open(accepted[0]["path"], "rb") as f:
+            self.assertEqual(f.read(), b"first")
+
+    def test_total_bytes_cutoff(self):
+        self.limit("BULK_MAX_TOTAL_BYTES", 2500)
+        accepted, skipped = self.stage({f"doc{i}.txt": b"x" * 1000 for i in range(3)})
+
+        self.assertEqual([f["name"] for f in accepted], ["doc0.txt", "doc1.txt"])
+        self.assertEqual([s["name"] for s in skipped], ["doc2.txt"])
+        self.assertIn("in total", skipped[0]["reason"])
+
+    def test_invalid_archive(self):
+        archive = SimpleUploadedFile("docs.zip", b"not a zip")
+        with self.assertRaisesRegex(ValueError, "not a valid ZIP"):
+            stage_bulk_upload(self.job_id, [], archive)
+
+
+if __name__ == "__main__":
+    unittest.main()
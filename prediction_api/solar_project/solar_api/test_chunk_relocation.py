@@ -0,0 +1,95 @@
+"""
+Page and heading metadata of chunks kept by the incremental chunk diff.
+
+Needs a pgvector database (``PGVECTOR_TEST_DATABASE``, see
+``pgvector_testing``); skipped without one.
+"""
+import unittest
+
+import numpy as np
+
+from .pgvector_testing import connect_pgvector_test_db
+
+try:
+    from .services.pdf_ingestion_service import (
+        ChunkLocation,
+        get_page_chunk_hashes,
+        insert_chunk_batch,
+        relocate_kept_chunks,
+    )
+except ImportError as e:  # Ingestion stack (Django, psycopg2, models) not installed
+    raise unittest.SkipTest(f"Ingestion service unavailable: {e}")
+
+DIM = 768
+SOURCE = "file://manual.pdf"
+TENANT = "tenant-relocate"
+
+
+def stored_row(digest, page, heading):
+    vector = np.zeros(DIM, dtype=np.float32)
+    vector[0] = 1.0
+    return {
+        'content': f"Chunk {digest} about inverter warranty terms",
+        'source': SOURCE,
+        'page_url': SOURCE,
+        'tenant_id': TENANT,
+        'embedding': vector.tolist(),
+        'hash': digest,
+        'page_start': page,
+        'page_end': page,
+        'heading': heading,
+    }
+
+
+class RelocateKeptChunksTests(unittest.TestCase):
+
+    def setUp(self):
+        self.conn, self.cur = connect_pgvector_test_db()
+        insert_chunk_batch(self.cur, [
+            stored_row("a", 1, "Warranty"),
+            stored_row("b", 2, "Warranty"),
+            stored_row("c", 3, None),
+        ], 'values')
+
+    def tearDown(self):
+        self.conn.rollback()
+        self.conn.close()
+
+    def test_reads_stored_locations(self):
+        stored = get_page_chunk_hashes(self.cur, [SOURCE], TENANT)[SOURCE]
+        self.assertEqual(stored, {
+            "a": ChunkLocation(1, 1, "Warranty"),
+            "b": ChunkLocation(2, 2, "Warranty"),
+            "c": ChunkLocation(3, 3, None),
+        })
+
+    def test_page_inserted_at_the_front_shifts_kept_chunks(self):
+        stored = get_page_chunk_hashes(self.cur, [SOURCE], TENANT)[SOURCE]
+        kept = {
+            "a": ChunkLocation(2, 2, "Warranty"),
+            "b": ChunkLocation(3, 4, "Inverter Warranty"),
+            "c": ChunkLocation(3, 3, None),  # Not moved
+        }
+
+        self.assertEqual(relocate_kept_chunks(self.cur, SOURCE, TENANT, stored, kept), 2)
+        self.assertEqual(get_page_chunk_hashes(self.cur, [SOURCE], TENANT)[SOURCE], kept)
+
+    def test_other_tenants_are_untouched(self):
+        other = {**stored_row("a", 1, "Warranty"), 'tenant_id': "tenant-other"}
+        insert_chunk_batch(self.cur, [other], 'values')
+        stored = get_page_chunk_hashes(self.cur, [SOURCE], TENANT)[SOURCE]
+
+        relocate_kept_chunks(self.cur, SOURCE, TENANT, stored, {"a": ChunkLocation(5, 5, None)})
+
+        self.assertEqual(
+            get_page_chunk_hashes(self.cur, [SOURCE], "tenant-other")[SOURCE],
+            {"a": ChunkLocation(1, 1, "Warranty")},
+        )
+
+    def test_nothing_moved_runs_no_update(self):
+        stored = get_page_chunk_hashes(self.cur, [SOURCE], TENANT)[SOURCE]
+        self.assertEqual(relocate_kept_chunks(self.cur, SOURCE, TENANT, stored, dict(stored)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Sentence-aware chunking.
+
+Token counts use the word-based estimate (the tokenizer is patched out), so
+these tests neither download nor depend on the embedding model.
+"""
+import math
+import unittest
+from unittest import mock
+
+try:
+    from .services import chunker
+    from .services.chunker import count_tokens_batch, iter_chunks
+    from .services.pdf_extraction import clean_pdf_text
+except ImportError as e:  # Embedding stack or PyPDF2 not installed
+    raise unittest.SkipTest(f"Chunker unavailable: {e}")
+
+
+def words(prefix, count):
+    return [f"{prefix}{i}" for i in range(count)]
+
+
+class EstimatedTokensTestCase(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(chunker, 'get_tokenizer', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TokenCountFallbackTests(EstimatedTokensTestCase):
+    def test_estimates_from_words_and_punctuation_without_tokenizer(self):
+        # Solar / panels / , / inverters / . -> 5 pre-tokens
+        self.assertEqual(count_tokens_batch(["Solar panels, inverters.", ""]), [math.ceil(5 * 1.2), 0])
+
+    def test_estimates_when_tokenizer_call_fails(self):
+        tokenizer = mock.Mock(side_effect=RuntimeError("tokenizer crashed"))
+        with mock.patch.object(chunker, 'get_tokenizer', return_value=tokenizer):
+            self.assertEqual(count_tokens_batch(["Solar panels"]), [math.ceil(2 * 1.2)])
+
+    def test_chunks_without_tokenizer(self):
+        text = " ".join(f"Sentence number {i} covers panels." for i in range(20))
+        chunks = list(iter_chunks([(1, text)], max_tokens=30, overlap_tokens=0))
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(chunk.tokens, 30)
+
+
+class HeadingTests(EstimatedTokensTestCase):
+    def test_heading_before_long_sentence_is_metadata_not_a_chunk(self):
+        sentence = " ".join(words("w", 100)) + "."
+        chunks = list(iter_chunks([(1, f"Inverter Warranty\n\n{sentence}")], max_tokens=40))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertNotIn("Inverter Warranty", [chunk.text for chunk in chunks])
+        self.assertEqual({chunk.heading for chunk in chunks}, {"Inverter Warranty"})
+
+    def test_heading_is_kept_with_text_that_fits(self):
+        chunks = list(iter_chunks([(1, "Inverter Warranty\n\nThe inverter is covered for ten years.")]))
+
+        self.assertEqual(len(chunks), 1)
+        self.assertTrue(chunks[0].text.startswith("Inverter Warranty\n\n"))
+        self.assertEqual(chunks[0].heading, "Inverter Warranty")
+
+    def test_consecutive_and_trailing_headings_are_not_chunks(self):
+        text = "Warranty\n\nPanel Warranty\n\nPanels are covered for twenty years.\n\nContact"
+        chunks = list(iter_chunks([(1, text)]))
+
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(chunks[0].heading, "Panel Warranty")
+        self.assertNotIn("Contact", chunks[0].text)
+
+    def test_pdf_line_breaks_keep_headings(self):
+        raw = (
+            "Panels are covered for twenty years.\n"
+            "Inverter Warranty\n"
+            "The inverter is covered for ten\n"
+            "years from installation.\n"
+        )
+        cleaned = clean_pdf_text(raw)
+        self.assertIn("\n\nInverter Warranty\n\n", cleaned)
+        self.assertIn("ten years from installation.", cleaned)
+
+        chunks = list(iter_chunks([(1, cleaned)]))
+        self.assertEqual(chunks[-1].heading, "Inverter Warranty")
+
+    def test_wrapped_lines_are_not_headings(self):
+        raw = "The warranty covers the\nSolar Panel\nand the inverter."
+        self.assertEqual(clean_pdf_text(raw), "The warranty covers the Solar Panel and the inverter.")
+
+
+class LongSentenceTests(EstimatedTokensTestCase):
+    def test_pieces_fit_and_do_not_overlap(self):
+        sentence_words = words("w", 120)
+        text = "Short opener here. " + " ".join(sentence_words) + ". Short closer here."
+        chunks = list(iter_chunks([(1, text)], max_tokens=40, overlap_tokens=20))
+
+        for chunk in chunks:
+            self.assertLessEqual(chunk.tokens, 40)
+        emitted = [word.rstrip(".") for chunk in chunks for word in chunk.text.split() if word.startswith("w")]
+        # Every word of the long sentence appears exactly once, in order
+        self.assertEqual(emitted, sentence_words)
+
+
+class OverlapAndPageTests(EstimatedTokensTestCase):
+    def test_whole_sentences_overlap(self):
+        sentences = [f"Sentence {i} is here." for i in range(12)]
+        chunks = list(iter_chunks([(1, " ".join(sentences))], max_tokens=30, overlap_tokens=10))
+
+        self.assertGreater(len(chunks), 1)
+        for previous, current in zip(chunks, chunks[1:]):
+            last_sentence = previous.text.rsplit("Sentence", 1)[1]
+            self.assertTrue(current.text.startswith("Sentence" + last_sentence))
+
+    def test_chunks_record_page_spans(self):
+        pages = [(page, " ".join(f"Page {page} fact {i}." for i in range(4))) for page in (1, 2, 3)]
+        chunks = list(iter_chunks(pages, max_tokens=40, overlap_tokens=0))
+
+        self.assertEqual(chunks[0].page_start, 1)
+        self.assertEqual(chunks[-1].page_end, 3)
+        for chunk in chunks:
+            self.assertLessEqual(chunk.page_start, chunk.page_end)
+            self.assertIn(f"Page {chunk.page_start} ", chunk.text)
+            self.assertIn(f"Page {chunk.page_end} ", chunk.text)
+        self.assertTrue(any(chunk.page_start < chunk.page_end for chunk in chunks))
+        for previous, current in zip(chunks, chunks[1:]):
+            self.assertLessEqual(previous.page_start, current.page_start)
+
+
+if __name__ == '__main__':
+    unittest.main()
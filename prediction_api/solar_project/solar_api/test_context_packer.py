@@ -0,0 +1,131 @@
+"""
+Context packing: knapsack selection, near-duplicate removal and score scaling.
+
+Token counts use the chars/4 estimate (tiktoken is patched out).
+"""
+import itertools
+import random
+import unittest
+from unittest import mock
+
+try:
+    from .services import context_packer
+    from .services.context_packer import (
+        MIN_PACK_VALUE,
+        count_tokens,
+        drop_near_duplicates,
+        format_context_entry,
+        knapsack,
+        normalize_scores,
+        pack_context,
+    )
+except ImportError as e:  # numpy, groq or httpx not installed
+    raise unittest.SkipTest(f"Context packer unavailable: {e}")
+
+PARAGRAPH = (
+    "The inverter warranty covers manufacturing defects for ten years from the date of "
+    "installation, provided the system was installed by a certified partner and registered "
+    "online within ninety days of commissioning."
+)
+
+
+def brute_force_best(weights, values, capacity):
+    best = 0.0
+    for size in range(len(weights) + 1):
+        for subset in itertools.combinations(range(len(weights)), size):
+            if sum(weights[i] for i in subset) <= capacity:
+                best = max(best, sum(values[i] for i in subset))
+    return best
+
+
+class KnapsackTests(unittest.TestCase):
+    def test_exact_optimum_beats_greedy(self):
+        # Greedy by value takes the 5-weight item (7) and the 1-weight item (1) = 8
+        chosen = knapsack([1, 3, 4, 5], [1.0, 4.0, 5.0, 7.0], 7)
+        self.assertEqual(chosen, [1, 2])
+
+    def test_matches_brute_force_and_respects_capacity(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            count = rng.randint(0, 8)
+            weights = [rng.randint(1, 20) for _ in range(count)]
+            values = [round(rng.uniform(0.01, 1.0), 3) for _ in range(count)]
+            capacity = rng.randint(0, 40)
+
+            chosen = knapsack(weights, values, capacity)
+
+            self.assertEqual(chosen, sorted(set(chosen)))
+            self.assertLessEqual(sum(weights[i] for i in chosen), capacity)
+            self.assertAlmostEqual(sum(values[i] for i in chosen), brute_force_best(weights, values, capacity))
+
+    def test_items_heavier_than_capacity_are_skipped(self):
+        self.assertEqual(knapsack([50, 2], [1.0, 0.1], 10), [1])
+        self.assertEqual(knapsack([], [], 10), [])
+
+
+class NearDuplicateTests(unittest.TestCase):
+    def test_near_copy_is_dropped_keeping_the_first(self):
+        near_copy = PARAGRAPH.replace("ninety", "90")
+        unrelated = "Battery storage adds backup power during grid outages and evening peaks."
+        rows = [(PARAGRAPH, "a", 0.9), (near_copy, "b", 0.8), (unrelated, "c", 0.7)]
+
+        self.assertEqual(drop_near_duplicates(rows), [rows[0], rows[2]])
+
+    def test_threshold_controls_what_counts_as_duplicate(self):
+        rows = [(PARAGRAPH, "a", 0.9), (PARAGRAPH.replace("ninety", "90"), "b", 0.8)]
+        self.assertEqual(len(drop_near_duplicates(rows, threshold=1.01)), 2)
+
+
+class NormalizeScoresTests(unittest.TestCase):
+    def test_scales_logits_to_pack_range_keeping_order(self):
+        scaled = normalize_scores([-3.0, 1.0, -1.0])
+        self.assertEqual(scaled[0], MIN_PACK_VALUE)
+        self.assertEqual(scaled[1], 1.0)
+        self.assertTrue(MIN_PACK_VALUE < scaled[2] < 1.0)
+
+    def test_equal_scores_are_all_one(self):
+        self.assertEqual(normalize_scores([0.4, 0.4, 0.4]), [1.0, 1.0, 1.0])
+        self.assertEqual(normalize_scores([]), [])
+
+
+class PackContextTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(context_packer, "get_encoding", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def rows(self, count, score=None):
+        rng = random.Random(count)
+        return [
+            (f"Fact {i}: " + " ".join(f"word{rng.randint(0, 999)}" for _ in range(rng.randint(5, 40))), f"s{i}",
+             score if score is not None else rng.uniform(-5, 5))
+            for i in range(count)
+        ]
+
+    def tokens(self, packed):
+        return sum(count_tokens(format_context_entry(text, src)) + 1 for text, src in packed)
+
+    def test_budget_is_never_exceeded(self):
+        for budget in (0, 10, 57, 200, 1000):
+            packed = pack_context(self.rows(20), budget)
+            self.assertLessEqual(self.tokens(packed), budget)
+
+    def test_everything_fits_in_a_large_budget(self):
+        rows = self.rows(6)
+        packed = pack_context(rows, 10_000)
+        # Highest score first
+        self.assertEqual(packed, [(text, src) for text, src, _ in sorted(rows, key=lambda r: -r[2])])
+
+    def test_equal_scores_fill_the_budget_with_as_many_chunks_as_fit(self):
+        rows = [(f"Fact {i} " + "x" * 36, f"s{i}", 0.5) for i in range(5)]  # 12 tokens each with source
+        packed = pack_context(rows, 40)
+        self.assertEqual(len(packed), 3)
+
+    def test_lowest_scoring_chunk_still_fills_leftover_room(self):
+        rows = [("High " + "x" * 40, "a", 2.0), ("Low " + "y" * 12, "b", -4.0)]
+        budget = self.tokens([("High " + "x" * 40, "a"), ("Low " + "y" * 12, "b")])
+        self.assertEqual([src for _, src in pack_context(rows, budget)], ["a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Chunk inserts through binary COPY.
+
+The encoding tests run anywhere; the round trip needs a pgvector database
+(``PGVECTOR_TEST_DATABASE``, see ``pgvector_testing``) and is skipped
+without one.
+"""
+import struct
+import unittest
+
+import numpy as np
+
+from .pgvector_testing import connect_pgvector_test_db
+
+try:
+    from .services.pdf_ingestion_service import COPY_BINARY_HEADER, encode_copy_binary, insert_chunk_batch
+except ImportError as e:  # Ingestion stack (Django, psycopg2, models) not installed
+    raise unittest.SkipTest(f"Ingestion service unavailable: {e}")
+
+DIM = 768
+
+
+def chunk_rows(rng, count=5):
+    rows = []
+    for i in range(count):
+        vector = rng.standard_normal(DIM).astype(np.float32)
+        rows.append({
+            'content': f"Chunk {i} about inverter \x00warranty terms",
+            'source': "file://copy.txt",
+            'page_url': "file://copy.txt",
+            'tenant_id': "tenant-copy",
+            'embedding': (vector / np.linalg.norm(vector)).tolist(),
+            'hash': f"hash-{i}",
+            # Alternate full and missing chunk metadata
+            'page_start': i + 1 if i % 2 else None,
+            'page_end': i + 2 if i % 2 else None,
+            'heading': "Warranty" if i % 2 else None,
+        })
+    return rows
+
+
+class EncodeCopyBinaryTests(unittest.TestCase):
+
+    def test_layout(self):
+        rows = chunk_rows(np.random.default_rng(0), count=2)
+        data = encode_copy_binary(rows).getvalue()
+
+        self.assertTrue(data.startswith(COPY_BINARY_HEADER))
+        self.assertEqual(data[-2:], struct.pack("!h", -1))
+        fields, = struct.unpack_from("!h", data, len(COPY_BINARY_HEADER))
+        self.assertEqual(fields, 9)
+        self.assertNotIn(b"\x00warranty", data)
+
+    def test_nul_is_stripped(self):
+        rows = chunk_rows(np.random.default_rng(0), count=1)
+        length, = struct.unpack_from("!i", encode_copy_binary(rows).getvalue(), len(COPY_BINARY_HEADER) + 2)
+        self.assertEqual(length, len(rows[0]['content'].replace("\x00", "").encode("utf-8")))
+
+
+class CopyRoundTripTests(unittest.TestCase):
+
+    def setUp(self):
+        self.conn, self.cur = connect_pgvector_test_db()
+
+    def tearDown(self):
+        self.conn.rollback()
+        self.conn.close()
+
+    def stored_rows(self):
+        self.cur.execute("""
+            SELECT content, source, page_url, tenant_id, embedding::text, hash, page_start, page_end, heading
+            FROM documents
+            ORDER BY hash
+        """)
+        return self.cur.fetchall()
+
+    def test_copy_matches_values(self):
+        rows = chunk_rows(np.random.default_rng(1))
+
+        inserted, method = insert_chunk_batch(self.cur, rows, 'copy')
+        self.assertEqual((inserted, method), (len(rows), 'copy'))
+        via_copy = self.stored_rows()
+
+        self.cur.execute("DELETE FROM documents")
+        inserted, method = insert_chunk_batch(self.cur, rows, 'values')
+        self.assertEqual((inserted, method), (len(rows), 'values'))
+        self.assertEqual(self.stored_rows(), via_copy)
+
+        for row, stored in zip(rows, via_copy):
+            content, source, page_url, tenant_id, embedding, digest, page_start, page_end, heading = stored
+            self.assertEqual(content, row['content'].replace("\x00", ""))
+            self.assertEqual(
+                (source, page_url, tenant_id, digest), (row['source'], row['page_url'], row['tenant_id'], row['hash'])
+            )
+            self.assertEqual((page_start, page_end, heading), (row['page_start'], row['page_end'], row['heading']))
+            stored_vector = np.array(embedding.strip("[]").split(","), dtype=np.float32)
+            np.testing.assert_array_equal(stored_vector, np.asarray(row['embedding'], dtype=np.float32))
+
+    def test_conflicts_are_skipped(self):
+        rows = chunk_rows(np.random.default_rng(2))
+        insert_chunk_batch(self.cur, rows, 'copy')
+        inserted, method = insert_chunk_batch(self.cur, rows, 'copy')
+        self.assertEqual((inserted, method), (0, 'copy'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Bounded-queue ingestion pipeline: ordering, backpressure, error propagation and cancellation.
+"""
+import itertools
+import threading
+import time
+import unittest
+
+from .services.ingestion_pipeline import run_pipeline
+
+NAME = "test-pipeline"
+
+
+def double(items):
+    for item in items:
+        yield item * 2
+
+
+def fail_at(value, error):
+    def stage(items):
+        for item in items:
+            if item == value:
+                raise error
+            yield item
+    return stage
+
+
+class RunPipelineTests(unittest.TestCase):
+    def tearDown(self):
+        # Every step thread has exited once run_pipeline returns or raises
+        self.assertEqual([t.name for t in threading.enumerate() if t.name.startswith(NAME)], [])
+
+    def run_pipeline(self, source, stages, sink, **kwargs):
+        return run_pipeline(source, stages, sink, name=NAME, **kwargs)
+
+    def test_items_pass_through_stages_in_order(self):
+        result = self.run_pipeline(range(50), [double, double], list, queue_size=2)
+        self.assertEqual(result, [i * 4 for i in range(50)])
+
+    def test_no_stages(self):
+        self.assertEqual(self.run_pipeline(range(5), [], sum), 10)
+
+    def test_stage_error_is_raised_and_cancels_the_rest(self):
+        cancelled = threading.Event()
+
+        def tracked(items):
+            try:
+                yield from items
+            finally:
+                cancelled.set()
+
+        with self.assertRaisesRegex(ValueError, "bad chunk"):
+            self.run_pipeline(itertools.count(), [fail_at(10, ValueError("bad chunk")), tracked], list)
+        self.assertTrue(cancelled.is_set())
+
+    def test_source_error_is_raised(self):
+        def source():
+            yield 1
+            raise OSError("unreadable page")
+
+        with self.assertRaisesRegex(OSError, "unreadable page"):
+            self.run_pipeline(source(), [double], list)
+
+    def test_sink_error_is_raised_and_cancels_blocked_producers(self):
+        produced = []
+
+        def source():
+            for i in itertools.count():
+                produced.append(i)
+                yield i
+
+        def sink(items):
+            for item in items:
+                if item == 6:
+                    raise RuntimeError("insert failed")
+
+        with self.assertRaisesRegex(RuntimeError, "insert failed"):
+            self.run_pipeline(source(), [double], sink, queue_size=1)
+        # The infinite source stopped instead of filling memory
+        self.assertLess(len(produced), 100)
+
+    def test_sink_error_wins_over_the_cancellation_it_causes(self):
+        def sink(items):
+            next(items)
+            raise KeyError("writer")
+
+        with self.assertRaises(KeyError):
+            self.run_pipeline(itertools.count(), [fail_at(-1, ValueError())], sink)
+
+    def test_sink_may_stop_early(self):
+        result = self.run_pipeline(itertools.count(), [double], lambda items: list(itertools.islice(items, 3)))
+        self.assertEqual(result, [0, 2, 4])
+
+    def test_slow_sink_bounds_buffered_items(self):
+        produced = []
+
+        def source():
+            for i in itertools.count():
+                produced.append(i)
+                yield i
+
+        def sink(items):
+            first = next(items)
+            time.sleep(0.3)  # Upstream fills its queues and blocks
+            return first, len(produced)
+
+        first, buffered = self.run_pipeline(source(), [double], sink, queue_size=1)
+
+        self.assertEqual(first, 0)
+        # Sink + two queues + the stage and source each holding one item
+        self.assertLessEqual(buffered, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,227 @@
+"""
+LLM client manager: token buckets, model fallback and the shared concurrency limit.
+
+Runs against ``StubBackend``; no network access or API key is needed.
+"""
+import asyncio
+import unittest
+from unittest import mock
+
+try:
+    import httpx
+
+    from .services import llm_client
+    from .services.llm_client import (
+        LLMCapacityError,
+        LLMClientManager,
+        ModelQuota,
+        RateLimitError,
+        StubBackend,
+        TokenBucket,
+        estimate_tokens,
+    )
+except ImportError as e:  # groq or httpx not installed
+    raise unittest.SkipTest(f"LLM client unavailable: {e}")
+
+MESSAGES = [
+    {"role": "system", "content": "Answer from the context."},
+    {"role": "user", "content": "CONTEXT:\nPanels carry a 25 year warranty.\n\nQUESTION: How long is the warranty?"},
+]
+
+
+def rate_limit_error():
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    return RateLimitError("rate limited", response=httpx.Response(429, request=request), body=None)
+
+
+class RateLimitedBackend(StubBackend):
+    """Stub backend whose listed models always answer with a 429."""
+
+    def __init__(self, limited):
+        self.limited = set(limited)
+
+    def complete(self, model, messages, max_tokens, temperature):
+        if model in self.limited:
+            raise rate_limit_error()
+        return super().complete(model, messages, max_tokens, temperature)
+
+    def stream(self, model, messages, max_tokens, temperature):
+        if model in self.limited:
+            raise rate_limit_error()
+        return super().stream(model, messages, max_tokens, temperature)
+
+
+class TokenBucketTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = 1000.0
+        patcher = mock.patch.object(llm_client.time, "monotonic", side_effect=lambda: self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.bucket = TokenBucket(capacity=60, refill_per_second=1)
+
+    def test_reserve_within_capacity_does_not_wait(self):
+        self.assertEqual(self.bucket.reserve(60), 0.0)
+
+    def test_overdraft_waits_for_the_refill(self):
+        self.bucket.reserve(50)
+        self.assertEqual(self.bucket.reserve(20), 10.0)
+        # The balance stays negative until the refill catches up
+        self.clock += 5
+        self.assertEqual(self.bucket.reserve(0), 5.0)
+
+    def test_reservation_is_capped_at_capacity(self):
+        self.assertEqual(self.bucket.reserve(500), 0.0)
+        self.assertEqual(self.bucket.reserve(1), 1.0)
+
+    def test_refund_returns_tokens_up_to_capacity(self):
+        self.bucket.reserve(60)
+        self.bucket.refund(30)
+        self.assertEqual(self.bucket.reserve(30), 0.0)
+
+        self.bucket.refund(1000)
+        self.assertEqual(self.bucket.reserve(60), 0.0)
+
+    def test_refill_is_capped_at_capacity(self):
+        self.bucket.reserve(60)
+        self.clock += 3600
+        self.assertEqual(self.bucket.reserve(60), 0.0)
+        self.assertEqual(self.bucket.reserve(1), 1.0)
+
+
+class ModelQuotaTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(llm_client.time, "monotonic", return_value=1000.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.quota = ModelQuota(requests_per_minute=60, tokens_per_minute=600)
+
+    def test_wait_is_the_longer_of_requests_and_tokens(self):
+        self.assertEqual(self.quota.reserve(600), 0.0)
+        self.assertEqual(self.quota.reserve(60), 6.0)  # 60 tokens at 10/s
+
+    def test_refund_returns_the_request_and_its_tokens(self):
+        self.quota.reserve(600)
+        self.quota.refund(600)
+        self.assertEqual(self.quota.reserve(600), 0.0)
+
+    def test_settle_refunds_an_overestimate(self):
+        self.quota.reserve(600)
+        self.quota.settle(600, 100)
+        self.assertEqual(self.quota.reserve(500), 0.0)
+        self.assertGreater(self.quota.reserve(1), 0.0)
+
+    def test_settle_charges_an_underestimate(self):
+        self.quota.reserve(100)
+        self.quota.settle(100, 700)
+        self.assertEqual(self.quota.tokens.reserve(0), 10.0)  # 100 tokens over at 10/s
+
+
+class ManagerTestCase(unittest.TestCase):
+    def setUp(self):
+        for name, value in (("LLM_MAX_CONCURRENCY", 1), ("LLM_ACQUIRE_TIMEOUT_SECONDS", 0.2)):
+            patcher = mock.patch.object(llm_client, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.manager = LLMClientManager("stub", models=["primary", "fallback"])
+        self.addCleanup(self.manager.close)
+
+    def use_backend(self, backend):
+        self.manager._backend = backend
+
+    def assertSlotFree(self):
+        self.assertTrue(self.manager._slots.acquire(blocking=False))
+        self.manager._slots.release()
+
+    def assertQuotaUntouched(self, model):
+        quota = self.manager._quotas[model]
+        self.assertEqual(quota.requests._tokens, quota.requests.capacity)
+        self.assertAlmostEqual(quota.tokens._tokens, quota.tokens.capacity, places=0)
+
+
+class CompletionTests(ManagerTestCase):
+    def test_stub_answers_from_the_first_context_line(self):
+        result = self.manager.complete(MESSAGES, max_tokens=200, temperature=0)
+
+        self.assertEqual(result.text, "Based on the available information: Panels carry a 25 year warranty.")
+        self.assertEqual(result.model, "stub:primary")
+        self.assertSlotFree()
+
+    def test_quota_is_settled_against_reported_usage(self):
+        result = self.manager.complete(MESSAGES, max_tokens=200, temperature=0)
+
+        tokens = self.manager._quotas["primary"].tokens
+        used = result.prompt_tokens + result.completion_tokens
+        self.assertLess(used, estimate_tokens(MESSAGES, 200))
+        self.assertAlmostEqual(tokens.capacity - tokens._tokens, used, places=0)
+
+    def test_rate_limit_falls_back_to_the_next_model(self):
+        self.use_backend(RateLimitedBackend(["primary"]))
+
+        result = self.manager.complete(MESSAGES, max_tokens=200, temperature=0)
+
+        self.assertEqual(result.model, "stub:fallback")
+        self.assertSlotFree()
+
+    def test_rate_limit_on_the_last_model_is_raised(self):
+        self.use_backend(RateLimitedBackend(["primary", "fallback"]))
+
+        with self.assertRaises(RateLimitError):
+            self.manager.complete(MESSAGES, max_tokens=200, temperature=0)
+        self.assertSlotFree()
+
+    def test_stream_falls_back_and_releases_the_slot_when_done(self):
+        self.use_backend(RateLimitedBackend(["primary"]))
+
+        stream = self.manager.stream(MESSAGES, max_tokens=200, temperature=0)
+        self.assertFalse(self.manager._slots.acquire(blocking=False))
+        text = "".join(stream)
+
+        self.assertEqual(text, "Based on the available information: Panels carry a 25 year warranty.")
+        self.assertSlotFree()
+
+    def test_no_free_slot_refunds_the_quota(self):
+        self.manager._slots.acquire()
+        self.addCleanup(self.manager._slots.release)
+
+        with self.assertRaises(LLMCapacityError):
+            self.manager.complete(MESSAGES, max_tokens=200, temperature=0)
+        self.assertQuotaUntouched("primary")
+
+
+class AsyncCompletionTests(ManagerTestCase):
+    def test_async_completion_falls_back_on_rate_limit(self):
+        self.use_backend(RateLimitedBackend(["primary"]))
+
+        result = asyncio.run(self.manager.acomplete(MESSAGES, max_tokens=200, temperature=0))
+
+        self.assertEqual(result.model, "stub:fallback")
+        self.assertSlotFree()
+
+    def test_async_callers_share_the_sync_limit(self):
+        self.manager._slots.acquire()  # Held by a sync request
+        self.addCleanup(self.manager._slots.release)
+
+        with self.assertRaises(LLMCapacityError):
+            asyncio.run(self.manager.acomplete(MESSAGES, max_tokens=200, temperature=0))
+        self.assertQuotaUntouched("primary")
+
+    def test_async_waiter_gets_the_slot_once_released(self):
+        async def run():
+            self.manager._slots.acquire()
+            waiter = asyncio.ensure_future(self.manager.acomplete(MESSAGES, max_tokens=200, temperature=0))
+            await asyncio.sleep(0.05)
+            self.assertFalse(waiter.done())
+            self.manager._slots.release()
+            return await waiter
+
+        self.assertEqual(asyncio.run(run()).model, "stub:primary")
+        self.assertSlotFree()
+
+    def test_slots_are_not_bound_to_one_event_loop(self):
+        for _ in range(2):
+            result = asyncio.run(self.manager.acomplete(MESSAGES, max_tokens=200, temperature=0))
+            self.assertEqual(result.model, "stub:primary")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Synonym matching (Aho-Corasick on word boundaries) and the per-tenant cache.
+"""
+import unittest
+from unittest import mock
+
+try:
+    from .services import synonyms
+    from .services.synonyms import AhoCorasick, SynonymMatcher, get_synonym_matcher, invalidate_synonyms
+except ImportError as e:  # Embedding stack (imported by rag_shared) not installed
+    raise unittest.SkipTest(f"Synonym service unavailable: {e}")
+
+
+class AhoCorasickTests(unittest.TestCase):
+    def test_reports_every_overlapping_occurrence(self):
+        automaton = AhoCorasick(["he", "she", "his", "hers"])
+        found = {(automaton.patterns[index], start, end) for index, start, end in automaton.find("ushers")}
+        self.assertEqual(found, {("she", 1, 4), ("he", 2, 4), ("hers", 2, 6)})
+
+    def test_no_patterns_no_matches(self):
+        self.assertEqual(AhoCorasick([]).find("anything"), [])
+
+
+class SynonymMatcherTests(unittest.TestCase):
+    def setUp(self):
+        self.matcher = SynonymMatcher({
+            "phone": ["telephone", "call", "phone number"],
+            "cost": ["price", "fee"],
+        })
+
+    def test_matches_only_whole_words(self):
+        self.assertEqual(self.matcher.matched_phrases("Can I recall my order?"), [])
+        self.assertEqual(self.matcher.matched_phrases("Please call me"), ["call"])
+        self.assertEqual(self.matcher.matched_phrases("Fees apply"), [])
+        self.assertEqual(self.matcher.matched_phrases("Any fee, or price?"), ["fee", "price"])
+
+    def test_multi_word_phrases_ignore_case_and_spacing(self):
+        matched = self.matcher.matched_phrases("What is your  Phone\nNumber?")
+        self.assertIn("phone number", matched)
+        self.assertIn("phone", matched)
+
+    def test_expand_adds_the_rest_of_each_matched_group(self):
+        self.assertEqual(self.matcher.expand("What is the price?"), ["cost", "fee"])
+        self.assertEqual(self.matcher.expand("Solar panels"), [])
+
+
+class TenantMatcherCacheTests(unittest.TestCase):
+    def setUp(self):
+        invalidate_synonyms()
+        self.addCleanup(invalidate_synonyms)
+        self.clock = 1000.0
+        patcher = mock.patch.object(synonyms.time, "monotonic", side_effect=lambda: self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def load(self, **kwargs):
+        patcher = mock.patch.object(synonyms, "load_tenant_synonym_groups", **kwargs)
+        loader = patcher.start()
+        self.addCleanup(patcher.stop)
+        return loader
+
+    def test_tenant_groups_replace_defaults_of_the_same_name(self):
+        self.load(return_value={"cost": ["tariff"]})
+        matcher = get_synonym_matcher("tenant-a")
+
+        self.assertEqual(matcher.expand("What is the tariff?"), ["cost"])
+        self.assertEqual(matcher.expand("What is the price?"), [])
+
+    def test_loaded_matcher_is_cached_until_the_ttl(self):
+        loader = self.load(return_value={})
+        get_synonym_matcher("tenant-a")
+        self.clock += synonyms.SYNONYM_CACHE_TTL_SECONDS - 1
+        get_synonym_matcher("tenant-a")
+        self.assertEqual(loader.call_count, 1)
+
+        self.clock += 2
+        get_synonym_matcher("tenant-a")
+        self.assertEqual(loader.call_count, 2)
+
+    def test_load_failure_caches_defaults_briefly(self):
+        loader = self.load(side_effect=RuntimeError("database down"))
+
+        self.assertIs(get_synonym_matcher("tenant-a"), synonyms.get_default_matcher())
+        get_synonym_matcher("tenant-a")
+        self.assertEqual(loader.call_count, 1)
+
+        self.clock += synonyms.SYNONYM_ERROR_CACHE_SECONDS + 1
+        get_synonym_matcher("tenant-a")
+        self.assertEqual(loader.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+"""
+Plain-text, Markdown and HTML extraction into paragraphs and pseudo-pages.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from .services.text_extraction import (
+        TEXT_PAGE_CHARS,
+        group_pages,
+        iter_paragraphs,
+        iter_text_pages,
+        read_text_info,
+    )
+except ImportError as e:  # PyPDF2 (imported by pdf_extraction) not installed
+    raise unittest.SkipTest(f"Text extraction unavailable: {e}")
+
+
+class TextExtractionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+
+class PlainTextTests(TextExtractionTestCase):
+    def test_blank_lines_and_rules_end_paragraphs(self):
+        path = self.write("faq.txt", (
+            "Warranty\n"
+            "========\n"
+            "Panels are covered\n"
+            "for twenty years.\n"
+            "\n"
+            "Inverters for ten.\n"
+            "-----\n"
+            "Contact us.\n"
+        ))
+
+        self.assertEqual(list(iter_paragraphs(path, "text")), [
+            "Warranty",
+            "Panels are covered\nfor twenty years.",
+            "Inverters for ten.",
+            "Contact us.",
+        ])
+
+    def test_pages_are_cleaned(self):
+        path = self.write("faq.txt", "Panels are covered\nfor twenty years.\n\nInverters for ten.\n")
+
+        self.assertEqual(list(iter_text_pages(path)), ["Panels are covered for twenty years.\n\nInverters for ten."])
+        self.assertEqual(read_text_info(path), (1, {}))
+
+    def test_byte_order_mark_is_dropped(self):
+        path = self.write("faq.txt", "﻿Solar panels last.\n")
+        self.assertEqual(list(iter_paragraphs(path, "text")), ["Solar panels last."])
+
+
+class MarkdownTests(TextExtractionTestCase):
+    def test_headings_and_code_blocks_are_paragraphs(self):
+        path = self.write("guide.md", (
+            "# Installation Guide\n"
+            "Mount the **rails** first.\n"
+            "## Wiring ##\n"
+            "Run the check:\n"
+            "```bash\n"
+            "check --strict *.conf\n"
+            "# not a heading\n"
+            "```\n"
+            "See [the manual](http://example.com) and ![diagram](d.png).\n"
+        ))
+
+        self.assertEqual(list(iter_paragraphs(path, "markdown")), [
+            "Installation Guide",
+            "Mount the rails first.",
+            "Wiring",
+            "Run the check:",
+            # Fence lines are dropped; the code itself is kept as written
+            "check --strict *.conf\n# not a heading",
+            "See the manual and diagram.",
+        ])
+
+    def test_tables_lose_their_syntax(self):
+        path = self.write("prices.md", (
+            "| Size | Price |\n"
+            "|------|:-----:|\n"
+            "| 3 kW | 1500 |\n"
+        ))
+
+        paragraph, = iter_paragraphs(path, "markdown")
+        self.assertNotIn("|", paragraph)
+        self.assertNotIn("---", paragraph)
+        self.assertEqual(paragraph.split(), ["Size", "Price", "3", "kW", "1500"])
+
+    def test_title_is_the_first_heading_outside_fences(self):
+        path = self.write("guide.md", "```\n# Code comment\n```\nIntro text.\n\n# *Solar* Guide\n")
+        self.assertEqual(read_text_info(path, "markdown")[1], {"title": "Solar Guide"})
+
+
+class HTMLTests(TextExtractionTestCase):
+    PAGE = (
+        "<html><head><title> Solar\n FAQ </title>"
+        "<style>body { color: red; }</style>"
+        "<script>var secret = 'tracking';</script></head>"
+        "<body><h1>Warranty</h1><p>Panels are covered<br>for <b>twenty</b> years.</p>"
+        "<noscript>Enable JavaScript</noscript>"
+        "<ul><li>Inverters</li><li>Batteries &amp; cables</li></ul></body></html>"
+    )
+
+    def test_visible_text_only_with_block_paragraphs(self):
+        path = self.write("faq.html", self.PAGE)
+
+        self.assertEqual(list(iter_paragraphs(path, "html")), [
+            "Warranty",
+            "Panels are covered for twenty years.",
+            "Inverters",
+            "Batteries & cables",
+        ])
+
+    def test_title_is_metadata_not_text(self):
+        path = self.write("faq.html", self.PAGE)
+
+        num_pages, info = read_text_info(path, "html")
+        self.assertEqual((num_pages, info), (1, {"title": "Solar FAQ"}))
+        self.assertNotIn("Solar FAQ", "".join(iter_text_pages(path, fmt="html")))
+
+
+class PageGroupingTests(unittest.TestCase):
+    def test_pages_close_once_they_reach_the_limit(self):
+        paragraphs = [f"Paragraph {i} " + "x" * 40 for i in range(10)]  # 52 chars, 54 with the break
+        pages = list(group_pages(paragraphs, page_chars=150))
+
+        # Three paragraphs (162 chars) reach 150; the last page holds the rest
+        self.assertEqual([page.count("Paragraph") for page in pages], [3, 3, 3, 1])
+        self.assertEqual("\n\n".join(pages).count("Paragraph"), 10)
+
+    def test_default_limit_is_text_page_chars(self):
+        paragraph = ("Panels last. " * TEXT_PAGE_CHARS)[:TEXT_PAGE_CHARS // 2].strip()  # Half a page
+        pages = list(group_pages([paragraph] * 5))
+
+        self.assertEqual(len(pages), 3)
+        for page in pages[:-1]:
+            self.assertGreaterEqual(len(page), TEXT_PAGE_CHARS - 4)
+
+    def test_empty_input_has_no_pages(self):
+        self.assertEqual(list(group_pages([], page_chars=150)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
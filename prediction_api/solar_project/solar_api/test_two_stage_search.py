@@ -0,0 +1,75 @@
+"""Two-stage vector search for a small tenant next to a large one (needs PGVECTOR_TEST_DATABASE)."""
+import unittest
+
+import numpy as np
+
+from .pgvector_testing import connect_pgvector_test_db
+
+DIM = 768
+
+
+class SmallTenantTwoStageSearchTests(unittest.TestCase):
+    """The tenant filter runs after the HNSW scan, so the coarse stage can miss a small tenant entirely."""
+
+    def setUp(self):
+        self.conn, self.cur = connect_pgvector_test_db()
+        from psycopg2.extras import execute_values
+
+        from .services.chatbot_service import vector_search
+
+        self.vector_search = vector_search
+        rng = np.random.default_rng(7)
+        self.query = self._unit(rng.standard_normal(DIM))
+
+        # The large tenant's chunks all sit close to the query, so an index
+        # scan limited by ef_search only ever sees them
+        large = [self._unit(self.query + 0.05 * rng.standard_normal(DIM)) for _ in range(1500)]
+        small = [self._unit(rng.standard_normal(DIM)) for _ in range(20)]
+        rows = [("large", i, v) for i, v in enumerate(large)] + [("small", i, v) for i, v in enumerate(small)]
+
+        self.cur.executemany(
+            "INSERT INTO pages (url, tenant_id, content_hash) VALUES (%s, %s, 'h')",
+            [("file://doc.txt", "large"), ("file://doc.txt", "small")],
+        )
+        execute_values(
+            self.cur,
+            "INSERT INTO documents (content, source, page_url, tenant_id, embedding, hash) VALUES %s",
+            [
+                (f"{tenant} chunk {i}", "file://doc.txt", "file://doc.txt", tenant, str(v.tolist()), f"{tenant}-{i}")
+                for tenant, i, v in rows
+            ],
+            template="(%s, %s, %s, %s, %s::vector, %s)",
+        )
+        self.cur.execute("ANALYZE documents")
+        self.cur.execute("ANALYZE pages")
+        # Make the planner take the HNSW index, as it does on a large table
+        self.cur.execute("SET LOCAL enable_seqscan = off")
+
+    def tearDown(self):
+        self.conn.rollback()
+        self.conn.close()
+
+    @staticmethod
+    def _unit(vector):
+        return vector / np.linalg.norm(vector)
+
+    def test_small_tenant_gets_full_exact_results(self):
+        query = self.query.tolist()
+        exact = self.vector_search(self.cur, "small", query, top_k=15, two_stage=False)
+        two_stage = self.vector_search(self.cur, "small", query, top_k=15, two_stage=True, oversample=4)
+
+        self.assertEqual(len(exact), 15)
+        self.assertEqual([row[0] for row in two_stage], [row[0] for row in exact])
+        self.assertTrue(all(row[0].startswith("small ") for row in two_stage))
+
+    def test_ef_search_covers_coarse_limit(self):
+        from .services.chatbot_service import hnsw_settings
+
+        self.vector_search(self.cur, "large", self.query.tolist(), top_k=15, two_stage=True, oversample=8)
+        self.cur.execute("SHOW hnsw.ef_search")
+        self.assertGreaterEqual(int(self.cur.fetchone()[0]), 15 * 8)
+        self.assertGreaterEqual(int(dict(hnsw_settings(500))["hnsw.ef_search"]), 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
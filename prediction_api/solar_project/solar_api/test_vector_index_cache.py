@@ -0,0 +1,91 @@
+"""
+Tenant index cache: reloads on version bumps, LRU eviction by bytes and
+delayed closing of discarded indexes.
+"""
+import unittest
+from unittest import mock
+
+try:
+    from .services import vector_index
+    from .services.vector_index import INDEX_CLOSE_GRACE_SECONDS, VectorIndex, VectorIndexCache
+except ImportError as e:  # numpy or the database stack not installed
+    raise unittest.SkipTest(f"Vector index unavailable: {e}")
+
+
+class FakeIndex(VectorIndex):
+    backend = "fake"
+
+    def __init__(self, tenant_id, version, nbytes):
+        self.tenant_id = tenant_id
+        self.version = version
+        self.nbytes = nbytes
+        self.closed = False
+
+    def __len__(self):
+        return 0
+
+    def search(self, query_embedding, top_k):
+        return []
+
+    def keyword_search(self, keywords, query_embedding, rows_per_term=3):
+        return []
+
+    def close(self):
+        self.closed = True
+
+
+class VectorIndexCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = 1000.0
+        patcher = mock.patch.object(vector_index.time, "monotonic", side_effect=lambda: self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.loaded = []
+        self.cache = VectorIndexCache(self.load, max_bytes=100, max_chunks=10, revalidate_seconds=0)
+
+    def load(self, tenant_id, version, max_chunks):
+        index = FakeIndex(tenant_id, version, 60)
+        self.loaded.append(index)
+        return index
+
+    def test_same_version_is_served_from_cache(self):
+        first = self.cache.get("t1", 1)
+        self.assertIs(self.cache.get("t1", 1), first)
+        self.assertEqual(len(self.loaded), 1)
+
+    def test_replaced_index_is_closed_after_the_grace_period(self):
+        old = self.cache.get("t1", 1)
+        new = self.cache.get("t1", 2)
+        self.assertIsNot(new, old)
+
+        # A request that fetched the old index just before can still use it
+        self.clock += INDEX_CLOSE_GRACE_SECONDS - 1
+        self.cache.get("t1", 2)
+        self.assertFalse(old.closed)
+
+        self.clock += 2
+        self.cache.get("t1", 2)
+        self.assertTrue(old.closed)
+        self.assertFalse(new.closed)
+
+    def test_evicted_index_is_closed_after_the_grace_period(self):
+        t1 = self.cache.get("t1", 1)
+        self.cache.get("t2", 1)  # 120 bytes > 100: t1 is evicted
+        self.assertEqual(self.cache.stats()["tenants"], 1)
+
+        self.clock += INDEX_CLOSE_GRACE_SECONDS + 1
+        self.cache.get("t2", 1)
+        self.assertTrue(t1.closed)
+
+    def test_invalidate_all_closes_every_index_later(self):
+        t1 = self.cache.get("t1", 1)
+        self.cache.invalidate()
+        self.assertEqual(self.cache.stats(), {"tenants": 0, "chunks": 0, "bytes": 0, "max_bytes": 100})
+
+        self.clock += INDEX_CLOSE_GRACE_SECONDS + 1
+        self.cache.get("t2", 1)
+        self.assertTrue(t1.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,11 +2,16 @@ from django.urls import path
 
 from .views.bill_optimization_view import BillOptimizationView
 from .views.bill_prediction_view import BillPredictionView
+from .views.chatbot_async_view import chatbot_ask_async
 from .views.chatbot_view import (
+    BulkIngestionAPIView,
     ChatbotAPIView,
+    ChatbotStreamAPIView,
     DeleteKnowledgeBaseAPIView,
+    IngestionJobStatusAPIView,
     PDFIngestionAPIView,
 )
+from .views.health_view import ReadinessAPIView
 from .views.solar_gen_prediction_view import SolarGenerationPrediction
 
 urlpatterns = [
@@ -14,6 +19,11 @@ urlpatterns = [
     path('predict-bill/', BillPredictionView.as_view(), name='bill-prediction'),
     path('solar/bill-optimization-slab/', BillOptimizationView.as_view(), name='bill-optimization-slab'),
     path('chatbot/ask/', ChatbotAPIView.as_view(), name='chatbot-ask'),
+    path('chatbot/ask/stream/', ChatbotStreamAPIView.as_view(), name='chatbot-ask-stream'),
+    path('chatbot/ask/async/', chatbot_ask_async, name='chatbot-ask-async'),
     path('chatbot/ingest-pdf/', PDFIngestionAPIView.as_view(), name='chatbot-ingest-pdf'),
+    path('chatbot/ingest-pdf/bulk/', BulkIngestionAPIView.as_view(), name='chatbot-ingest-bulk'),
+    path('chatbot/ingest-pdf/jobs/<uuid:job_id>/', IngestionJobStatusAPIView.as_view(), name='chatbot-ingest-job'),
     path('chatbot/delete-knowledge-base/', DeleteKnowledgeBaseAPIView.as_view(), name='chatbot-delete-knowledge-base'),
+    path('health/ready/', ReadinessAPIView.as_view(), name='health-ready'),
 ]
\ No newline at end of file
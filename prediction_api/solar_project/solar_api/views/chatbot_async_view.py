@@ -0,0 +1,101 @@
+"""
+Async chatbot endpoint for ASGI deployments.
+
+DRF's APIView is synchronous, so this is a native Django async view that
+reproduces ChatbotAPIView's contract (JWT auth, validation, response shape)
+on top of the async RAG pipeline. Under an ASGI server a single process can
+keep hundreds of chats in flight while they wait on Postgres and the LLM.
+"""
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from solar_api.services.async_chatbot_service import aget_chatbot_response
+from solar_api.services.tracing import start_trace, wants_trace
+from solar_api.views.chatbot_view import validate_question, validate_tenant_id
+
+# =====================================================
+# LOGGING SETUP
+# =====================================================
+logger = logging.getLogger(__name__)
+
+_jwt_authentication = JWTAuthentication()
+
+
+def _authenticate(request):
+    """Return the authenticated user or None (runs the ORM lookup synchronously)."""
+    try:
+        result = _jwt_authentication.authenticate(request)
+    except (AuthenticationFailed, InvalidToken, TokenError) as e:
+        logger.warning(f"JWT authentication failed: {e}")
+        return None
+    return result[0] if result else None
+
+
+@csrf_exempt
+@require_POST
+async def chatbot_ask_async(request):
+    """Handle chatbot query on the async pipeline (POST /chatbot/ask/async/)."""
+    try:
+        user = await sync_to_async(_authenticate)(request)
+        if user is None:
+            return JsonResponse(
+                {'detail': 'Authentication credentials were not provided or are invalid.'},
+                status=401
+            )
+
+        try:
+            body = json.loads(request.body or b'{}')
+        except (ValueError, UnicodeDecodeError):
+            return JsonResponse({'error': 'Request body must be valid JSON'}, status=400)
+        if not isinstance(body, dict):
+            return JsonResponse({'error': 'Request body must be a JSON object'}, status=400)
+
+        question = body.get('question')
+        tenant_id = body.get('tenant_id')
+
+        logger.info(f"Async chatbot query for tenant: {tenant_id}")
+
+        # Validate question
+        question_validation = validate_question(question)
+        if not question_validation['valid']:
+            logger.warning(f"Question validation failed: {question_validation['error']}")
+            return JsonResponse(
+                {'error': question_validation['error'], 'field': 'question'},
+                status=400
+            )
+
+        # Validate tenant_id
+        tenant_validation = validate_tenant_id(tenant_id)
+        if not tenant_validation['valid']:
+            logger.warning(f"Tenant validation failed: {tenant_validation['error']}")
+            return JsonResponse(
+                {'error': tenant_validation['error'], 'field': 'tenant_id'},
+                status=400
+            )
+
+        with start_trace('chatbot.ask_async', tenant_id=tenant_id) as trace:
+            answer, error = await aget_chatbot_response(question, tenant_id)
+        if error:
+            logger.warning(f"Chatbot service returned error: {error}")
+
+        response_data = {
+            'question': question,
+            'answer': answer,
+            'tenant_id': tenant_id,
+        }
+        if wants_trace(request):
+            response_data['trace'] = trace.to_dict()
+
+        return JsonResponse(response_data, status=200)
+
+    except Exception as e:
+        logger.error(f"Unexpected error in async chatbot endpoint: {e}", exc_info=True)
+        return JsonResponse({'error': 'An unexpected error occurred'}, status=500)
@@ -2,12 +2,16 @@
 Production-grade Django REST Framework views with comprehensive error handling,
 validation, logging, and proper HTTP status codes.
 """
+import json
 import logging
 import os
-from typing import Any, Dict
+import uuid
+from typing import Any, Dict, Iterator, Tuple
 
-from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
@@ -17,18 +21,35 @@ from rest_framework.views import APIView
 
 from solar_api.services.chatbot_service import (
     get_chatbot_response,
+    stream_chatbot_response,
     APIKeyMissingError,
     EmbeddingError,
     DatabaseError,
     LLMError,
 )
 from solar_api.services.pdf_ingestion_service import (
+    EXTRACTORS,
+    get_extractor,
     ingest_pdf,
+    ingest_pdf_batch,
+    save_upload,
     delete_tenant_knowledge_base,
     PDFExtractionError,
     InsufficientContentError,
     PDFIngestionError,
 )
+from solar_api.models import IngestionJob
+from solar_api.services.ingestion_queue import (
+    BULK_MAX_FILES,
+    BULK_MAX_TOTAL_BYTES,
+    INGESTION_QUEUE_ENABLED,
+    describe_job,
+    enqueue_batch_ingestion,
+    enqueue_ingestion,
+    remove_upload_dir,
+    stage_bulk_upload,
+)
+from solar_api.services.tracing import start_trace, wants_trace
 
 # =====================================================
 # LOGGING SETUP
@@ -40,7 +61,7 @@ logger = logging.getLogger(__name__)
 # =====================================================
 def validate_pdf_file(pdf_file: Any) -> Dict[str, Any]:
     """
-    Validate uploaded PDF file.
+    Validate uploaded document (PDF, plain text, Markdown or HTML).
     
     Args:
         pdf_file: Uploaded file object
@@ -52,8 +73,8 @@ def validate_pdf_file(pdf_file: Any) -> Dict[str, Any]:
         return {'valid': False, 'error': 'PDF file is required'}
     
     # Check file extension
-    if not pdf_file.name.lower().endswith('.pdf'):
-        return {'valid': False, 'error': 'File must be a PDF'}
+    if get_extractor(pdf_file.name) is None:
+        return {'valid': False, 'error': f"File must be one of: {', '.join(sorted(EXTRACTORS))}"}
     
     # Check file size (limit to 10MB)
     max_size = 10 * 1024 * 1024  # 10MB
@@ -112,6 +133,26 @@ def validate_question(question: str) -> Dict[str, Any]:
     return {'valid': True}
 
 
+def format_sse(events: Iterator[Tuple[str, Dict]]) -> Iterator[str]:
+    """
+    Serialize (event, payload) tuples as Server-Sent Events frames.
+    
+    Args:
+        events: Iterator of (event_name, payload_dict)
+        
+    Yields:
+        SSE frames ("event: ...\ndata: ...\n\n")
+    """
+    try:
+        for event, payload in events:
+            yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    finally:
+        # Propagate client disconnects (generator close) to the pipeline
+        close = getattr(events, 'close', None)
+        if close:
+            close()
+
+
 # =====================================================
 # API VIEWS
 # =====================================================
@@ -130,6 +171,13 @@ class PDFIngestionAPIView(APIView):
     
     @swagger_auto_schema(
         operation_description="""Upload a PDF file to ingest its content into the vector database.
+
+By default the upload is queued and the response is 202 with a job id;
+poll GET /chatbot/ingest-pdf/jobs/<job_id>/ for progress. With
+INGESTION_QUEUE_ENABLED=false the PDF is ingested inline and the
+response is 200 with the result. The upload is hashed while it is
+written to disk; a file byte-identical to the tenant's current copy is
+answered with 200 (skipped) without being queued or parsed.
         
 The PDF will be:
 1. Validated for format and size
@@ -139,14 +187,15 @@ The PDF will be:
 5. Stored in vector database
 
 Maximum file size: 10MB
-Supported format: PDF only""",
+Supported formats: PDF, plain text (.txt), Markdown (.md) and HTML (.html);
+text formats are read natively, without PDF parsing""",
         manual_parameters=[
             openapi.Parameter(
                 'pdf_file',
                 openapi.IN_FORM,
                 type=openapi.TYPE_FILE,
                 required=True,
-                description='PDF file to upload and ingest (max 10MB)'
+                description='PDF, .txt, .md or .html file to upload and ingest (max 10MB)'
             ),
             openapi.Parameter(
                 'tenant_id',
@@ -157,8 +206,22 @@ Supported format: PDF only""",
             ),
         ],
         responses={
+            202: openapi.Response(
+                description='PDF queued for ingestion',
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'message': openapi.Schema(type=openapi.TYPE_STRING),
+                        'job_id': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID),
+                        'status': openapi.Schema(type=openapi.TYPE_STRING),
+                        'status_url': openapi.Schema(type=openapi.TYPE_STRING),
+                        'file_name': openapi.Schema(type=openapi.TYPE_STRING),
+                        'tenant_id': openapi.Schema(type=openapi.TYPE_STRING),
+                    }
+                )
+            ),
             200: openapi.Response(
-                description='PDF ingested successfully',
+                description='PDF ingested successfully (queue disabled)',
                 schema=openapi.Schema(
                     type=openapi.TYPE_OBJECT,
                     properties={
@@ -167,6 +230,22 @@ Supported format: PDF only""",
                         'tenant_id': openapi.Schema(type=openapi.TYPE_STRING),
                         'chunks_generated': openapi.Schema(type=openapi.TYPE_INTEGER),
                         'chunks_inserted': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'chunks_conflicted': openapi.Schema(
+                            type=openapi.TYPE_INTEGER,
+                            description='Chunks skipped because identical content occurs earlier in this PDF'
+                        ),
+                        'chunks_unchanged': openapi.Schema(
+                            type=openapi.TYPE_INTEGER,
+                            description='Chunks kept from the previous upload of this file (not re-embedded)'
+                        ),
+                        'chunks_relocated': openapi.Schema(
+                            type=openapi.TYPE_INTEGER,
+                            description='Kept chunks whose pages or heading changed (metadata updated in place)'
+                        ),
+                        'chunks_deleted': openapi.Schema(
+                            type=openapi.TYPE_INTEGER,
+                            description='Chunks of the previous upload that no longer occur'
+                        ),
                         'text_length': openapi.Schema(type=openapi.TYPE_INTEGER),
                     }
                 )
@@ -229,13 +308,45 @@ Supported format: PDF only""",
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
+            if INGESTION_QUEUE_ENABLED:
+                try:
+                    job = enqueue_ingestion(pdf_file, tenant_id)
+                except Exception as e:
+                    logger.error(f"Failed to queue PDF ingestion: {e}")
+                    return Response(
+                        {'error': 'Failed to process uploaded file', 'details': str(e)},
+                        status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                    )
+                if job is None:
+                    logger.info(f"PDF skipped (identical file): {pdf_file.name}")
+                    return Response(
+                        {
+                            'message': 'PDF already ingested with same content (skipped)',
+                            'file_name': pdf_file.name,
+                            'tenant_id': tenant_id,
+                            'status': 'skipped'
+                        },
+                        status=status.HTTP_200_OK
+                    )
+                return Response(
+                    {
+                        'message': 'PDF queued for ingestion',
+                        'job_id': str(job.id),
+                        'status': job.status,
+                        'status_url': reverse('chatbot-ingest-job', kwargs={'job_id': job.id}),
+                        'file_name': pdf_file.name,
+                        'tenant_id': tenant_id,
+                    },
+                    status=status.HTTP_202_ACCEPTED
+                )
+            
             try:
-                # Save uploaded file temporarily
-                file_path = default_storage.save(
-                    f'temp_pdfs/{pdf_file.name}',
-                    ContentFile(pdf_file.read())
+                # Stream the upload to a temporary file, hashing it on the way
+                upload_path = default_storage.path(
+                    default_storage.get_available_name(f'temp_pdfs/{pdf_file.name}')
                 )
-                temp_file_path = default_storage.path(file_path)
+                file_hash = save_upload(pdf_file, upload_path)
+                temp_file_path = upload_path
                 logger.debug(f"Temporary file saved: {temp_file_path}")
                 
             except Exception as e:
@@ -247,7 +358,7 @@ Supported format: PDF only""",
             
             try:
                 # Ingest PDF
-                result = ingest_pdf(temp_file_path, tenant_id)
+                result = ingest_pdf(temp_file_path, tenant_id, file_hash=file_hash)
                 
                 # Handle skipped case (unchanged content)
                 if result.get('status') == 'skipped':
@@ -271,6 +382,10 @@ Supported format: PDF only""",
                         'tenant_id': tenant_id,
                         'chunks_generated': result.get('chunks_generated', 0),
                         'chunks_inserted': result.get('chunks_inserted', 0),
+                        'chunks_conflicted': result.get('chunks_conflicted', 0),
+                        'chunks_unchanged': result.get('chunks_unchanged', 0),
+                        'chunks_relocated': result.get('chunks_relocated', 0),
+                        'chunks_deleted': result.get('chunks_deleted', 0),
                         'text_length': result.get('text_length', 0),
                     },
                     status=status.HTTP_200_OK
@@ -322,6 +437,269 @@ Supported format: PDF only""",
                     logger.warning(f"Failed to clean up temp file: {e}")
 
 
+class BulkIngestionAPIView(APIView):
+    """
+    Bulk ingestion: several documents and/or a ZIP archive of them in one
+    request, ingested as one batch job.
+    
+    Uploads are streamed to temporary files on disk instead of being held
+    in memory, and ZIP members are decompressed to disk one at a time.
+    """
+    parser_classes = [MultiPartParser]
+    
+    def initial(self, request, *args, **kwargs):
+        # Must be set before the body is parsed: every upload goes to disk
+        request._request.upload_handlers = [TemporaryFileUploadHandler(request._request)]
+        super().initial(request, *args, **kwargs)
+    
+    @swagger_auto_schema(
+        operation_description=f"""Upload several documents, a ZIP archive of them, or both, for ingestion as one batch.
+PDF, plain text, Markdown and HTML files are accepted.
+
+The files share one ingestion pipeline, so chunks from different files fill
+the same embedding batches. A file that cannot be ingested is rejected
+without affecting the others, and finished files are committed every
+INGEST_COMMIT_DOCUMENTS files, so they become searchable while the batch
+is still running. The result lists one entry per file.
+
+By default the batch is queued and the response is 202 with a job id;
+poll GET /chatbot/ingest-pdf/jobs/<job_id>/ for progress. With
+INGESTION_QUEUE_ENABLED=false the batch is ingested inline and the
+response is 200 with the result.
+
+Limits: 10MB per file, {BULK_MAX_FILES} files and {BULK_MAX_TOTAL_BYTES // (1024 * 1024)}MB per request.
+Files over a limit, unsupported file types and repeated file names are
+skipped and listed in the response.""",
+        manual_parameters=[
+            openapi.Parameter(
+                'files',
+                openapi.IN_FORM,
+                type=openapi.TYPE_FILE,
+                required=False,
+                description='Document to ingest (repeat the field for several files)'
+            ),
+            openapi.Parameter(
+                'archive',
+                openapi.IN_FORM,
+                type=openapi.TYPE_FILE,
+                required=False,
+                description='ZIP archive of documents (folders are flattened)'
+            ),
+            openapi.Parameter(
+                'tenant_id',
+                openapi.IN_FORM,
+                type=openapi.TYPE_STRING,
+                required=True,
+                description='Tenant identifier (alphanumeric, underscores, hyphens only)'
+            ),
+        ],
+        responses={
+            202: openapi.Response(
+                description='Batch queued for ingestion',
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'message': openapi.Schema(type=openapi.TYPE_STRING),
+                        'job_id': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID),
+                        'status': openapi.Schema(type=openapi.TYPE_STRING),
+                        'status_url': openapi.Schema(type=openapi.TYPE_STRING),
+                        'files': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING)),
+                        'skipped': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+                        'tenant_id': openapi.Schema(type=openapi.TYPE_STRING),
+                    }
+                )
+            ),
+            200: openapi.Response(
+                description='Batch ingested (queue disabled)',
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'message': openapi.Schema(type=openapi.TYPE_STRING),
+                        'tenant_id': openapi.Schema(type=openapi.TYPE_STRING),
+                        'status': openapi.Schema(
+                            type=openapi.TYPE_STRING, description='success, partial (some files failed) or failed'
+                        ),
+                        'documents_total': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'documents_ingested': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'documents_skipped': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'documents_failed': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'chunks_inserted': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'chunks_cached': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'documents': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+                        'skipped': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+                    }
+                )
+            ),
+            400: openapi.Response(
+                description='Bad request - validation failed or no usable file',
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'error': openapi.Schema(type=openapi.TYPE_STRING),
+                        'details': openapi.Schema(type=openapi.TYPE_STRING),
+                    }
+                )
+            ),
+            500: openapi.Response(description='Internal server error'),
+        },
+        tags=['PDF Ingestion']
+    )
+    def post(self, request):
+        """Handle a bulk upload."""
+        job_id = uuid.uuid4()
+        queued = False
+        
+        try:
+            files = request.FILES.getlist('files')
+            archive = request.FILES.get('archive')
+            tenant_id = request.data.get('tenant_id')
+            
+            logger.info(f"Bulk ingestion request for tenant: {tenant_id}")
+            
+            # Validate tenant_id
+            tenant_validation = validate_tenant_id(tenant_id)
+            if not tenant_validation['valid']:
+                logger.warning(f"Tenant validation failed: {tenant_validation['error']}")
+                return Response(
+                    {
+                        'error': tenant_validation['error'],
+                        'field': 'tenant_id'
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            if not files and not archive:
+                return Response(
+                    {'error': 'Upload files or a ZIP archive', 'field': 'files'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if archive and not archive.name.lower().endswith('.zip'):
+                return Response(
+                    {'error': 'Archive must be a ZIP file', 'field': 'archive'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            try:
+                accepted, skipped = stage_bulk_upload(job_id, files, archive)
+            except ValueError as e:
+                return Response(
+                    {'error': 'Invalid archive', 'details': str(e), 'field': 'archive'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            if not accepted:
+                return Response(
+                    {'error': 'No supported files to ingest', 'skipped': skipped},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            if INGESTION_QUEUE_ENABLED:
+                job = enqueue_batch_ingestion(job_id, accepted, tenant_id)
+                queued = True
+                return Response(
+                    {
+                        'message': f'{len(accepted)} files queued for ingestion',
+                        'job_id': str(job.id),
+                        'status': job.status,
+                        'status_url': reverse('chatbot-ingest-job', kwargs={'job_id': job.id}),
+                        'files': [f['name'] for f in accepted],
+                        'skipped': skipped,
+                        'tenant_id': tenant_id,
+                    },
+                    status=status.HTTP_202_ACCEPTED
+                )
+            
+            try:
+                result = ingest_pdf_batch([f['path'] for f in accepted], tenant_id)
+            except PDFIngestionError as e:
+                logger.error(f"Bulk ingestion error: {e}")
+                return Response(
+                    {'error': 'PDF ingestion failed', 'details': str(e)},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
+            
+            logger.info(
+                f"Bulk ingestion {result['status']}: {result['documents_ingested']} ingested, "
+                f"{result['documents_skipped']} unchanged, {result['documents_failed']} failed"
+            )
+            return Response(
+                {
+                    'message': f"Ingested {result['documents_ingested']} of {result['documents_total']} files",
+                    'tenant_id': tenant_id,
+                    **result,
+                    'skipped': skipped,
+                },
+                status=status.HTTP_200_OK
+            )
+            
+        except Exception as e:
+            # Unexpected error
+            logger.error(f"Unexpected error in bulk ingestion: {e}", exc_info=True)
+            return Response(
+                {'error': 'An unexpected error occurred', 'details': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+            
+        finally:
+            # A queued job removes its files once it finishes
+            if not queued:
+                remove_upload_dir(job_id)
+
+
+class IngestionJobStatusAPIView(APIView):
+    """
+    Status and progress of a queued PDF ingestion.
+    """
+    
+    @swagger_auto_schema(
+        operation_description="""Get the status of a PDF ingestion job.
+
+Status is one of queued, running, succeeded or failed. While running,
+progress holds the current stage (hashing, ingesting, committing) and
+pages_extracted / pages_total, chunks_embedded and rows_inserted, which
+advance together since pages are embedded and inserted as they are read
+(chunks_total is set once every page is chunked). A failed attempt that will be retried goes back to queued
+with the error of the last attempt.
+
+Batch jobs (bulk uploads) list their files, report documents_done /
+documents_total and current_file, and their result holds one entry per
+file in documents.""",
+        responses={
+            200: openapi.Response(
+                description='Job status',
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'job_id': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID),
+                        'tenant_id': openapi.Schema(type=openapi.TYPE_STRING),
+                        'file_name': openapi.Schema(type=openapi.TYPE_STRING),
+                        'files': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_STRING),
+                            description='File names of a batch job (null for single-file jobs)'
+                        ),
+                        'status': openapi.Schema(type=openapi.TYPE_STRING),
+                        'attempts': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'max_attempts': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'progress': openapi.Schema(type=openapi.TYPE_OBJECT),
+                        'result': openapi.Schema(type=openapi.TYPE_OBJECT),
+                        'error': openapi.Schema(type=openapi.TYPE_STRING),
+                    }
+                )
+            ),
+            404: openapi.Response(description='Job not found'),
+        },
+        tags=['PDF Ingestion']
+    )
+    def get(self, request, job_id):
+        """Return the job's status."""
+        try:
+            job = IngestionJob.objects.get(pk=job_id)
+        except IngestionJob.DoesNotExist:
+            return Response({'error': 'Ingestion job not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(describe_job(job), status=status.HTTP_200_OK)
+
+
 class ChatbotAPIView(APIView):
     """
     Production-grade chatbot API with comprehensive error handling.
@@ -430,8 +808,9 @@ Note: Requires GROQ_API_KEY environment variable to be set.""",
                 )
             
             try:
-                # Get chatbot response
-                answer, error = get_chatbot_response(question, tenant_id)
+                # Get chatbot response (stage timings recorded on the trace)
+                with start_trace('chatbot.ask', tenant_id=tenant_id) as trace:
+                    answer, error = get_chatbot_response(question, tenant_id)
                 
                 # Check if there was an internal error
                 if error:
@@ -439,14 +818,16 @@ Note: Requires GROQ_API_KEY environment variable to be set.""",
                     # Still return 200 with user-friendly message
                     # The service already provides a good user-facing message
                 
-                return Response(
-                    {
-                        'question': question,
-                        'answer': answer,
-                        'tenant_id': tenant_id,
-                    },
-                    status=status.HTTP_200_OK
-                )
+                response_data = {
+                    'question': question,
+                    'answer': answer,
+                    'tenant_id': tenant_id,
+                }
+                # Stage timings for debugging, on request (X-Debug-Trace: 1)
+                if wants_trace(request):
+                    response_data['trace'] = trace.to_dict()
+                
+                return Response(response_data, status=status.HTTP_200_OK)
                 
             except APIKeyMissingError as e:
                 # Configuration error - HTTP 503
@@ -481,6 +862,99 @@ Note: Requires GROQ_API_KEY environment variable to be set.""",
             )
 
 
+class ChatbotStreamAPIView(APIView):
+    """
+    Streaming variant of the chatbot API using Server-Sent Events.
+    
+    Features:
+    - Same validation as the blocking endpoint
+    - Sources are sent as soon as retrieval finishes
+    - Answer tokens are forwarded as the LLM generates them
+    - Client disconnects close the upstream LLM stream
+    """
+    parser_classes = [JSONParser]
+    
+    @swagger_auto_schema(
+        operation_description="""Query the chatbot and stream the answer as Server-Sent Events.
+
+Events (each `data:` line is JSON):
+1. `sources` - `{"sources": [...]}` once context has been retrieved
+2. `token` - `{"text": "..."}` for every generated fragment
+3. `done` - `{"cached": bool}` after the final token (plus `trace` when sent with `X-Debug-Trace: 1` and `CHATBOT_TRACE_HEADER_ENABLED=true`)
+4. `error` - `{"error": "..."}` if the pipeline fails (ends the stream)
+
+Note: Requires GROQ_API_KEY environment variable to be set.""",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=['question', 'tenant_id'],
+            properties={
+                'question': openapi.Schema(
+                    type=openapi.TYPE_STRING,
+                    description='The question to ask (3-1000 characters)',
+                    min_length=3,
+                    max_length=1000
+                ),
+                'tenant_id': openapi.Schema(
+                    type=openapi.TYPE_STRING,
+                    description='Tenant identifier (alphanumeric, underscores, hyphens only)'
+                ),
+            },
+        ),
+        responses={
+            200: openapi.Response(description='text/event-stream of sources, token, done or error events'),
+            400: openapi.Response(
+                description='Bad request - validation failed',
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'error': openapi.Schema(type=openapi.TYPE_STRING),
+                        'field': openapi.Schema(type=openapi.TYPE_STRING),
+                    }
+                )
+            ),
+        },
+        tags=['Chatbot']
+    )
+    def post(self, request):
+        """Handle streaming chatbot query."""
+        question = request.data.get('question')
+        tenant_id = request.data.get('tenant_id')
+        
+        logger.info(f"Streaming chatbot query for tenant: {tenant_id}")
+        
+        # Validate question
+        question_validation = validate_question(question)
+        if not question_validation['valid']:
+            logger.warning(f"Question validation failed: {question_validation['error']}")
+            return Response(
+                {
+                    'error': question_validation['error'],
+                    'field': 'question'
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Validate tenant_id
+        tenant_validation = validate_tenant_id(tenant_id)
+        if not tenant_validation['valid']:
+            logger.warning(f"Tenant validation failed: {tenant_validation['error']}")
+            return Response(
+                {
+                    'error': tenant_validation['error'],
+                    'field': 'tenant_id'
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        response = StreamingHttpResponse(
+            format_sse(stream_chatbot_response(question, tenant_id, include_trace=wants_trace(request))),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+        return response
+
+
 class DeleteKnowledgeBaseAPIView(APIView):
     """
     Production-grade knowledge base deletion API.
@@ -0,0 +1,23 @@
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from solar_api.services.warmup import get_warmup_status, start_warm_up_in_background
+
+
+class ReadinessAPIView(APIView):
+    """
+    Readiness probe: 200 once this worker has finished warming up, 503 before.
+
+    The first probe starts the warm-up if no gunicorn hook did (e.g. runserver
+    or an ASGI worker), so orchestrators can rely on it either way.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        start_warm_up_in_background()
+        warmup_status = get_warmup_status()
+        http_status = status.HTTP_200_OK if warmup_status["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE
+        return Response(warmup_status, status=http_status)
@@ -3,6 +3,11 @@ ASGI config for solar_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI worker to run the async chatbot endpoint
+(``/solar_generation/chatbot/ask/async/``) on a single event loop:
+
+    gunicorn solar_project.asgi:application -k uvicorn.workers.UvicornWorker
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -92,6 +92,9 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Bulk PDF ingestion (chatbot/ingest-pdf/bulk/): the configured file count plus a ZIP archive
+DATA_UPLOAD_MAX_NUMBER_FILES = int(os.getenv("BULK_INGEST_MAX_FILES", "100")) + 1
+
 from datetime import timedelta
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),